@@ -0,0 +1,177 @@
+"""Server-Sent Events feed of new ``ActivityLog`` rows for the admin dashboard.
+
+Each server process runs one ``ActivityBroadcaster``. While at least one admin
+is connected, a single task reads rows past its cursor and fans them out to
+every connection's queue. Many open streams therefore cost one query per poll
+per process, not one per connection. Writes in this process wake the task as
+soon as they commit (``post_save`` on ``ActivityLog``, plus ``notify_written``
+for ``bulk_create``). Writes from other processes and workers are seen on the
+next ``POLL_SECONDS`` tick, so the table itself is the cross-process channel.
+
+A stream first replays rows after its cursor (``Last-Event-ID`` on reconnect,
+or ``?after=``), then follows live events. It sends a comment line every
+``HEARTBEAT_SECONDS`` so proxies keep it open, and closes after
+``STREAM_SECONDS``. EventSource reconnects with the last id it saw, which also
+re-checks the admin's token.
+
+The view is async and only streams under ASGI (``config.asgi``). Under a WSGI
+worker a stream would hold the worker for its whole life. The rest of the app
+stays on WSGI, because Django's ASGI handler buffers synchronous streaming
+responses. The stream is therefore served by a separate ASGI process.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from .models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 2
+HEARTBEAT_SECONDS = 15
+STREAM_SECONDS = 10 * 60
+PAGE_SIZE = 200
+# A connection further behind than this is closed; it catches up from the table on reconnect.
+QUEUE_SIZE = 1000
+RETRY_MS = 3000
+
+
+def log_to_json(log):
+    return {
+        "id": log.id,
+        "user_id": log.user_id,
+        "user_email": log.user_email,
+        "user_name": log.user_name,
+        "action": log.action,
+        "status": log.status,
+        "details": log.details,
+        "time": log.created_at.isoformat() if log.created_at else None,
+    }
+
+
+def _fetch_after(after_id, limit=PAGE_SIZE):
+    logs = ActivityLog.objects.filter(id__gt=after_id).order_by('id')[:limit]
+    return [log_to_json(log) for log in logs]
+
+
+def latest_activity_id():
+    return ActivityLog.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+class _Subscriber:
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+
+class ActivityBroadcaster:
+    """Per-process fan-out of new activity rows to connected streams."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._loop = None
+        self._wake = None
+        self._task = None
+        self._lock = threading.Lock()
+
+    async def subscribe(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (e.g. a restarted test loop): start over on it.
+            with self._lock:
+                self._subscribers = set()
+                self._loop, self._wake, self._task = loop, asyncio.Event(), None
+        subscriber = _Subscriber()
+        self._subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            cursor = await sync_to_async(latest_activity_id)()
+            if self._task is None or self._task.done():
+                self._task = loop.create_task(self._run(cursor))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    def wake(self):
+        """Thread-safe: make the poller read new rows now."""
+        with self._lock:
+            loop, event = self._loop, self._wake
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(event.set)
+
+    async def _run(self, cursor):
+        fetch = sync_to_async(_fetch_after)
+        while self._subscribers:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                events = await fetch(cursor)
+                while events:
+                    cursor = events[-1]["id"]
+                    self._publish(events)
+                    events = await fetch(cursor) if len(events) == PAGE_SIZE else []
+            except Exception:
+                logger.exception('Activity stream poll failed')
+
+    def _publish(self, events):
+        for subscriber in list(self._subscribers):
+            for event in events:
+                try:
+                    subscriber.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # The stream notices and closes; the client resumes from its last id.
+                    subscriber.overflowed = True
+                    self._subscribers.discard(subscriber)
+                    break
+
+
+broadcaster = ActivityBroadcaster()
+
+
+def notify_written():
+    """Wake the local broadcaster once the current transaction commits (call after ``bulk_create``)."""
+    transaction.on_commit(broadcaster.wake)
+
+
+def activity_saved(sender, instance, created, **kwargs):
+    if created:
+        notify_written()
+
+
+def _frame(event):
+    return f"id: {event['id']}\nevent: activity\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(after_id):
+    """Yield SSE frames: the backlog after ``after_id``, then live events and heartbeats."""
+    subscriber = await broadcaster.subscribe()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_SECONDS
+    sent = after_id
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        fetch = sync_to_async(_fetch_after)
+        backlog = await fetch(sent)
+        while backlog:
+            for event in backlog:
+                yield _frame(event)
+            sent = backlog[-1]["id"]
+            backlog = await fetch(sent) if len(backlog) == PAGE_SIZE else []
+        while not subscriber.overflowed and loop.time() < deadline:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if event["id"] > sent:
+                sent = event["id"]
+                yield _frame(event)
+    finally:
+        broadcaster.unsubscribe(subscriber)
@@ -1,7 +1,9 @@
 """Admin-only API: activity logs, form logs, support tickets, settings, export. RBAC: only Admin can access."""
 import csv
 import json
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
@@ -11,8 +13,14 @@ from .models import (
     ActivityLog, FormLog, SupportTicket, AdminSettings, User, ErrorLog, 
     Transaction
 )
-from .permissions import require_admin
+from .permissions import get_user_from_request, require_admin
+from .notifications import notify_account_action
+from .activity_stream import event_stream, latest_activity_id
 from .services import get_client_ip, get_user_agent, log_activity, send_alert_to_admin
+from .user_directory import (
+    BULK_ACTIONS, DEFAULT_PAGE_SIZE, MAX_BULK_USERS, MAX_PAGE, MAX_PAGE_SIZE, bulk_user_action, list_users,
+    parse_filters, user_counts,
+)
 from django.db.models import Sum
 from datetime import timedelta
 
@@ -57,6 +65,36 @@ def activity_logs_list(request):
     })
 
 
+async def activity_stream_view(request):
+    """SSE feed of new activity logs. EventSource cannot send headers, so ?token= is accepted as well.
+
+    Resumes after the Last-Event-ID header (sent by EventSource on reconnect) or ?after=;
+    a fresh connection starts at the newest log.
+    """
+    # Django 4.2's method decorators are sync-only and would hide this coroutine view from the handler.
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "The activity stream needs the ASGI server (config.asgi)"}, status=503)
+    token = request.GET.get("token")
+    if token and "HTTP_AUTHORIZATION" not in request.META:
+        request.META["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    user = await sync_to_async(get_user_from_request)(request)
+    if not user:
+        return JsonResponse({"detail": "Authentication required"}, status=401)
+    if not user.is_active or user.role not in ('admin', 'super_admin'):
+        return JsonResponse({"detail": "Admin privileges required"}, status=403)
+    cursor = request.META.get("HTTP_LAST_EVENT_ID") or request.GET.get("after")
+    try:
+        after_id = int(cursor) if cursor else await sync_to_async(latest_activity_id)()
+    except ValueError:
+        return JsonResponse({"detail": "Last-Event-ID / after must be an integer"}, status=400)
+    response = StreamingHttpResponse(event_stream(after_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 @require_http_methods(["GET"])
 @require_admin
 def activity_logs_export(request):
@@ -206,12 +244,38 @@ def settings_view(request):
 @require_http_methods(["GET"])
 @require_admin
 def users_list(request):
-    qs = User.objects.all().order_by("email")
-    out = [
-        {"id": u.id, "email": u.email, "full_name": u.full_name, "role": u.role, "status": u.status, "is_active": u.is_active, "is_locked": getattr(u, 'is_locked', False)}
-        for u in qs
-    ]
-    return JsonResponse({"users": out})
+    """?q= (email/name prefix), role, status, locked, sort (email|name|joined, - for descending), page, page_size."""
+    try:
+        filters = parse_filters(request.GET)
+        page = max(int(request.GET.get("page", 1)), 1)
+        page_size = min(max(int(request.GET.get("page_size", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+    if page > MAX_PAGE:
+        return JsonResponse({"detail": f"page must be at most {MAX_PAGE}"}, status=400)
+    result = list_users(filters, page, page_size)
+    result["counts"] = user_counts()
+    return JsonResponse(result)
+
+
+@require_http_methods(["POST"])
+@csrf_exempt
+@require_admin
+def users_bulk_action(request, action):
+    """POST {user_ids: [...]} to approve, reject, lock, unlock or force-logout many users at once."""
+    if action not in BULK_ACTIONS:
+        return JsonResponse({"detail": f"action must be one of {', '.join(BULK_ACTIONS)}"}, status=404)
+    try:
+        data = json.loads(request.body) if request.body else {}
+    except Exception:
+        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+    user_ids = data.get("user_ids")
+    if not isinstance(user_ids, list) or not all(type(i) is int for i in user_ids):
+        return JsonResponse({"detail": "user_ids must be a list of integers"}, status=400)
+    if not user_ids or len(user_ids) > MAX_BULK_USERS:
+        return JsonResponse({"detail": f"user_ids must hold between 1 and {MAX_BULK_USERS} ids"}, status=400)
+    result = bulk_user_action(request, action, user_ids)
+    return JsonResponse({"action": action, **result})
 
 
 @require_http_methods(["POST"])
@@ -230,6 +294,7 @@ def user_lock(request, user_id):
         return JsonResponse({"detail": "Cannot lock another admin"}, status=403)
     user.is_locked = bool(lock)
     user.save(update_fields=['is_locked'])
+    notify_account_action('USER_LOCK' if lock else 'USER_UNLOCK', [user.id])
     log_activity(request.user.id, request.user.email, request.user.full_name or '', 'USER_LOCK' if lock else 'USER_UNLOCK', request, status='Success', details=f"Target: {user.email}")
     return JsonResponse({"message": f"User {'locked' if lock else 'unlocked'}", "user_id": user_id})
 @require_http_methods(["POST"])
@@ -241,6 +306,7 @@ def user_approve(request, user_id):
         return JsonResponse({"detail": "User not found"}, status=404)
     user.status = "approved"
     user.save(update_fields=['status'])
+    notify_account_action('USER_APPROVE', [user.id])
     log_activity(request.user.id, request.user.email, request.user.full_name or '', 'USER_APPROVE', request, status='Success', details=f"Target: {user.email}")
     return JsonResponse({"id": user.id, "status": user.status})
 
@@ -254,6 +320,7 @@ def user_reject(request, user_id):
     user.status = "rejected"
     user.token_version += 1
     user.save(update_fields=['status', 'token_version'])
+    notify_account_action('USER_REJECT', [user.id])
     log_activity(request.user.id, request.user.email, request.user.full_name or '', 'USER_REJECT', request, status='Success', details=f"Target: {user.email}")
     return JsonResponse({"id": user.id, "status": user.status})
 
@@ -336,8 +403,9 @@ def system_stats_view(request):
     
     # Active sessions defined as users who logged in or performed an action in last hour
     active_sessions = ActivityLog.objects.filter(created_at__gte=one_hour_ago).values('user_id').distinct().count()
-    total_users = User.objects.count()
-    pending_users = User.objects.filter(status='pending').count()
+    counts = user_counts()
+    total_users = counts['total']
+    pending_users = counts['by_status'].get('pending', 0)
     
     # Financial volume
     total_inc = Transaction.objects.filter(type='INCOME').aggregate(Sum('amount'))['amount__sum'] or 0
@@ -22,11 +22,29 @@ def create_default_users(sender, **kwargs):
     except Exception:
         pass
 
+def repair_search_index(sender, using='default', **kwargs):
+    from django.db import connections
+    from .search import ensure_search_index
+    try:
+        ensure_search_index(connections[using])
+    except Exception:
+        pass
+
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
     verbose_name = 'API'
 
     def ready(self):
-        from django.db.models.signals import post_migrate
+        from django.db.models.signals import post_delete, post_init, post_migrate, post_save
+        from .activity_stream import activity_saved
+        from .models import ActivityLog, User
+        from .notifications import activity_logged
+        from .user_directory import remember_key, track_user_deleted, track_user_saved
         post_migrate.connect(create_default_users, sender=self)
+        post_migrate.connect(repair_search_index, sender=self)
+        post_init.connect(remember_key, sender=User)
+        post_save.connect(track_user_saved, sender=User)
+        post_delete.connect(track_user_deleted, sender=User)
+        post_save.connect(activity_saved, sender=ActivityLog)
+        post_save.connect(activity_logged, sender=ActivityLog)
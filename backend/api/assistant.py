@@ -0,0 +1,412 @@
+"""Natural-language questions about a user's finances.
+
+A question is parsed into a small ``QueryPlan`` (intent, one or two date
+ranges, optional category and type, result size) and the plan is executed
+against pre-aggregated data: totals and category breakdowns come from
+``range_reports`` (monthly rollups), and "biggest transaction" questions are a
+single top-N query on the ``(user_id, type, amount)`` index. Nothing scans the
+user's history in Python, so answers cost the same whatever its size.
+
+Examples: "how much did I spend on food last quarter", "income March vs April",
+"top 3 expenses this year", "where did my money go in 2024", "net savings
+compared to last month".
+"""
+import calendar
+import re
+from datetime import date, timedelta
+
+from .models import MonthlyRollup, Transaction
+from .range_reports import range_report
+
+INTENT_OVERVIEW = 'overview'
+INTENT_EXPENSES = 'expenses'
+INTENT_INCOME = 'income'
+INTENT_NET = 'net'
+INTENT_COUNT = 'count'
+INTENT_AVERAGE = 'average'
+INTENT_LARGEST = 'largest'
+INTENT_CATEGORIES = 'categories'
+
+DEFAULT_TOP = 5
+MAX_TOP = 20
+
+MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+MONTHS['sept'] = 9
+_MONTH_RE = r'\b(' + '|'.join(sorted(MONTHS, key=len, reverse=True)) + r')\b(?:\s+(\d{4}))?'
+_COMPARE_RE = re.compile(r'\b(?:vs|versus|compared (?:to|with)|against|than)\b')
+_UNITS = {'day': 'day', 'days': 'day', 'week': 'week', 'weeks': 'week', 'month': 'month', 'months': 'month',
+          'year': 'year', 'years': 'year'}
+ALL_TIME_START = date(1900, 1, 1)
+# Ranges and the periods compared with them must stay inside what ``date`` can represent.
+MIN_YEAR, MAX_YEAR = 1, 9998
+_NUMBER_WORDS = {'a': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+                 'eight': 8, 'nine': 9, 'ten': 10, 'twelve': 12}
+
+
+class DateOutOfRange(ValueError):
+    """A date in the question cannot be represented (year 0, or a comparison reaching past year 9999)."""
+
+
+class DateRange:
+    __slots__ = ('start', 'end', 'label')
+
+    def __init__(self, start, end, label):
+        self.start, self.end, self.label = start, end, label
+
+    def to_json(self):
+        return {'start': self.start.isoformat(), 'end': self.end.isoformat(), 'label': self.label}
+
+
+class QueryPlan:
+    __slots__ = ('intent', 'ranges', 'category', 'type', 'limit')
+
+    def __init__(self, intent, ranges, category=None, tx_type=None, limit=None):
+        self.intent = intent
+        self.ranges = ranges
+        self.category = category
+        self.type = tx_type
+        self.limit = limit
+
+    def to_json(self):
+        return {
+            'intent': self.intent, 'ranges': [r.to_json() for r in self.ranges],
+            'category': self.category, 'type': self.type, 'limit': self.limit,
+        }
+
+
+# --- date ranges -----------------------------------------------------------
+
+def _month_range(year, month):
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _shift_months(year, month, delta):
+    index = year * 12 + month - 1 + delta
+    return index // 12, index % 12 + 1
+
+
+def _quarter_range(year, quarter):
+    start = date(year, quarter * 3 - 2, 1)
+    return start, _month_range(year, quarter * 3)[1]
+
+
+def _month_label(year, month, today):
+    name = calendar.month_name[month]
+    return f"in {name}" if year == today.year else f"in {name} {year}"
+
+
+def _clip(start, end, today):
+    """Ranges never extend past today; future periods simply hold nothing yet."""
+    return start, min(end, today) if start <= today else end
+
+
+def parse_date_range(text, today):
+    """The first date range mentioned in ``text`` as a ``DateRange``, or None."""
+    m = re.search(r'\b(\d{4}-\d{2}-\d{2})\b(?:\s*(?:to|until|-|and)\s*(\d{4}-\d{2}-\d{2}))?', text)
+    if m:
+        try:
+            start = date.fromisoformat(m.group(1))
+            end = date.fromisoformat(m.group(2)) if m.group(2) else today
+        except ValueError:
+            return None
+        if end < start:
+            start, end = end, start
+        return DateRange(start, end, f"from {start.isoformat()} to {end.isoformat()}")
+
+    m = re.search(r'\b(?:last|past|previous)\s+(\d+|' + '|'.join(_NUMBER_WORDS) + r')?\s*(days?|weeks?|months?|years?)\b', text)
+    if m and m.group(1):
+        n = int(m.group(1)) if m.group(1).isdigit() else _NUMBER_WORDS[m.group(1)]
+        unit = _UNITS[m.group(2)]
+        n = max(1, min(n, 1200))
+        if unit == 'day':
+            start = today - timedelta(days=n - 1)
+        elif unit == 'week':
+            start = today - timedelta(weeks=n) + timedelta(days=1)
+        elif unit == 'month':
+            y, mo = _shift_months(today.year, today.month, -n)
+            start = date(y, mo, min(today.day, calendar.monthrange(y, mo)[1])) + timedelta(days=1)
+        else:
+            y = today.year - n
+            start = date(y, today.month, min(today.day, calendar.monthrange(y, today.month)[1])) + timedelta(days=1)
+        return DateRange(start, today, f"in the last {n} {unit}{'s' if n != 1 else ''}")
+
+    m = re.search(r'\bq([1-4])(?:\s+(\d{4}))?\b', text)
+    if m:
+        year = int(m.group(2)) if m.group(2) else today.year
+        start, end = _quarter_range(year, int(m.group(1)))
+        return DateRange(*_clip(start, end, today), f"in Q{m.group(1)} {year}")
+
+    if re.search(r'\btoday\b', text):
+        return DateRange(today, today, "today")
+    if re.search(r'\byesterday\b', text):
+        day = today - timedelta(days=1)
+        return DateRange(day, day, "yesterday")
+    if re.search(r'\b(?:all time|ever|overall|in total|lifetime)\b', text):
+        return DateRange(ALL_TIME_START, today, "all time")
+    if re.search(r'\b(?:ytd|year to date)\b', text):
+        return DateRange(date(today.year, 1, 1), today, "this year so far")
+
+    m = re.search(r'\b(this|last|previous|current)\s+(week|month|quarter|year)\b', text)
+    if m:
+        back = m.group(1) in ('last', 'previous')
+        unit = m.group(2)
+        if unit == 'week':
+            monday = today - timedelta(days=today.weekday()) - timedelta(weeks=back)
+            return DateRange(*_clip(monday, monday + timedelta(days=6), today), f"{'last' if back else 'this'} week")
+        if unit == 'month':
+            y, mo = _shift_months(today.year, today.month, -back)
+            return DateRange(*_clip(*_month_range(y, mo), today), f"{'last' if back else 'this'} month")
+        if unit == 'quarter':
+            q = (today.month - 1) // 3 + 1
+            y, q = (today.year - 1, 4) if back and q == 1 else (today.year, q - back)
+            return DateRange(*_clip(*_quarter_range(y, q), today), f"{'last' if back else 'this'} quarter (Q{q} {y})")
+        y = today.year - back
+        return DateRange(*_clip(date(y, 1, 1), date(y, 12, 31), today), f"{'last' if back else 'this'} year")
+
+    m = re.search(r'\bsince\s+' + _MONTH_RE, text)
+    if m:
+        month = MONTHS[m.group(1)]
+        year = int(m.group(2)) if m.group(2) else (today.year if month <= today.month else today.year - 1)
+        return DateRange(date(year, month, 1), today, f"since {_month_label(year, month, today)[3:]}")
+
+    m = re.search(_MONTH_RE, text)
+    if m:
+        month = MONTHS[m.group(1)]
+        # Without a year, a month means its most recent occurrence.
+        year = int(m.group(2)) if m.group(2) else (today.year if month <= today.month else today.year - 1)
+        return DateRange(*_clip(*_month_range(year, month), today), _month_label(year, month, today))
+
+    m = re.search(r'\b(19\d{2}|20\d{2})\b', text)
+    if m:
+        year = int(m.group(1))
+        return DateRange(*_clip(date(year, 1, 1), date(year, 12, 31), today), f"in {year}")
+    return None
+
+
+def _previous_period(rng):
+    """The period of the same length just before ``rng`` (whole months map to whole months)."""
+    if rng.start.day == 1 and rng.end == _month_range(rng.end.year, rng.end.month)[1]:
+        months = (rng.end.year - rng.start.year) * 12 + rng.end.month - rng.start.month + 1
+        y, mo = _shift_months(rng.start.year, rng.start.month, -months)
+        end_y, end_mo = _shift_months(rng.end.year, rng.end.month, -months)
+        return DateRange(date(y, mo, 1), _month_range(end_y, end_mo)[1], "the period before")
+    length = rng.end - rng.start
+    end = rng.start - timedelta(days=1)
+    return DateRange(end - length, end, "the period before")
+
+
+# --- intents and categories -----------------------------------------------------
+
+def _intent(text):
+    if re.search(r'\bcategor|\bwhere\b.*\b(?:money|spend|spent|go)\b|\bspen[dt]\b.*\bmost on\b|\bbreakdown\b', text):
+        return INTENT_CATEGORIES
+    if re.search(r'\b(?:biggest|largest|highest|most expensive|top)\b', text):
+        return INTENT_LARGEST
+    if re.search(r'\b(?:how many|number of|count)\b', text):
+        return INTENT_COUNT
+    if re.search(r'\b(?:average|avg|per month|monthly average)\b', text):
+        return INTENT_AVERAGE
+    if re.search(r'\b(?:sav(?:e|ed|ing|ings)|net|left over|profit|balance)\b', text):
+        return INTENT_NET
+    if re.search(r'\b(?:income|earn(?:ed|ings)?|made|revenue|salary|received)\b', text):
+        return INTENT_INCOME
+    if re.search(r'\b(?:spen[dt]|spending|expenses?|cost|paid|pay)\b', text):
+        return INTENT_EXPENSES
+    return None
+
+
+def _type(text, intent):
+    if re.search(r'\b(?:income|earn(?:ed|ings)?|revenue|salary|received|payments? in)\b', text):
+        return 'INCOME'
+    if intent in (INTENT_LARGEST, INTENT_CATEGORIES, INTENT_EXPENSES):
+        return 'EXPENSE'
+    return None
+
+
+def _limit(text, intent):
+    m = re.search(r'\b(?:top|biggest|largest|highest)\s+(\d+)\b|\b(\d+)\s+(?:biggest|largest|highest)\b', text)
+    if m:
+        return max(1, min(int(m.group(1) or m.group(2)), MAX_TOP))
+    if intent == INTENT_LARGEST and not re.search(r'\b(?:expenses|purchases|transactions|payments|items)\b', text):
+        return 1
+    return DEFAULT_TOP
+
+
+def user_categories(user_id):
+    """Distinct categories the user has used, read from the rollups (one indexed query)."""
+    return list(MonthlyRollup.objects.filter(user_id=user_id).order_by().values_list('category', flat=True).distinct())
+
+
+def match_category(text, categories):
+    """The longest known category named in ``text`` (singular or plural), or None."""
+    for category in sorted(categories, key=len, reverse=True):
+        name = re.sub(r'(?<=\w)e?s$', '', category.lower().strip())
+        if name and re.search(r'\b' + re.escape(name) + r'(?:s|es)?\b', text):
+            return category
+    return None
+
+
+def parse_query(query, categories=(), today=None):
+    """Turn a question into a ``QueryPlan``; defaults to this month when no range is given.
+
+    Raises ``DateOutOfRange`` when a mentioned date, or the period compared with it, is not a valid date.
+    """
+    today = today or date.today()
+    text = re.sub(r"[^\w\s\-]", ' ', query.lower())
+    text = re.sub(r'\s+', ' ', text).strip()
+    intent = _intent(text)
+    category = match_category(text, categories)
+    if intent is None:
+        intent = INTENT_EXPENSES if category else INTENT_OVERVIEW
+
+    parts = _COMPARE_RE.split(text, maxsplit=1)
+    ranges = []
+    try:
+        if len(parts) == 2 and intent not in (INTENT_LARGEST, INTENT_CATEGORIES):
+            first = parse_date_range(parts[0], today)
+            second = parse_date_range(parts[1], today)
+            if first is None:
+                first = parse_date_range('this month', today) if second is None or second.label != 'this month' \
+                    else parse_date_range('last month', today)
+            ranges = [first, second or _previous_period(first)]
+        else:
+            ranges = [parse_date_range(text, today) or parse_date_range('this month', today)]
+    except (ValueError, OverflowError) as e:
+        raise DateOutOfRange(str(e))
+    if any(not MIN_YEAR <= d.year <= MAX_YEAR for rng in ranges for d in (rng.start, rng.end)):
+        raise DateOutOfRange("dates must fall between years 1 and 9998")
+    return QueryPlan(intent, ranges, category, _type(text, intent), _limit(text, intent))
+
+
+# --- execution -------------------------------------------------------------
+
+def _money(value):
+    return f"-${abs(value):,.2f}" if value < 0 else f"${value:,.2f}"
+
+
+def _months_in(rng):
+    return (rng.end.year - rng.start.year) * 12 + rng.end.month - rng.start.month + 1
+
+
+def _range_totals(user_id, rng, category):
+    """``{'income', 'expenses', 'net', 'count', 'categories'}`` for one range (rollup-backed)."""
+    report = range_report(user_id, rng.start, rng.end, 'total')
+    if category is None:
+        t = report['totals']
+        return {'income': t['income'], 'expenses': t['expenses'], 'net': t['net'],
+                'count': t['transaction_count'], 'categories': report['categories']}
+    rows = [c for c in report['categories'] if c['category'] == category]
+    income = sum(c['total'] for c in rows if c['type'] == 'INCOME')
+    expenses = sum(c['total'] for c in rows if c['type'] == 'EXPENSE')
+    return {'income': income, 'expenses': expenses, 'net': income - expenses,
+            'count': sum(c['count'] for c in rows), 'categories': rows}
+
+
+def _metric(plan):
+    if plan.intent == INTENT_INCOME or (plan.intent in (INTENT_COUNT, INTENT_AVERAGE) and plan.type == 'INCOME'):
+        return 'income'
+    if plan.intent == INTENT_NET:
+        return 'net'
+    if plan.intent == INTENT_COUNT:
+        return 'count'
+    return 'expenses'
+
+
+def _describe(metric, category, label):
+    on = f" on {category}" if category and metric == 'expenses' else (f" from {category}" if category else "")
+    noun = {'income': 'Income', 'expenses': 'Spending', 'net': 'Net savings', 'count': 'Transactions'}[metric]
+    return f"{noun}{on} {label}"
+
+
+def _format(metric, value):
+    return str(int(value)) if metric == 'count' else _money(value)
+
+
+def _answer_largest(user_id, plan):
+    rng = plan.ranges[0]
+    qs = Transaction.objects.filter(user_id=user_id, type=plan.type or 'EXPENSE')
+    if rng.start > ALL_TIME_START:
+        # Unbounded questions walk the (user_id, type, amount) index and stop after ``limit`` rows.
+        qs = qs.filter(date__gte=rng.start, date__lte=rng.end)
+    if plan.category:
+        qs = qs.filter(category=plan.category)
+    rows = list(qs.order_by('-amount', '-id').values('id', 'category', 'amount', 'date', 'description')[:plan.limit])
+    kind = 'income' if plan.type == 'INCOME' else 'expense'
+    items = [{**r, 'amount': float(r['amount']), 'date': r['date'].isoformat()} for r in rows]
+    if not rows:
+        return f"No {kind} transactions found for {rng.label}.", {'transactions': []}
+    if len(rows) == 1:
+        r = items[0]
+        return (f"Your biggest {kind} {rng.label} was {r['category']} for {_money(r['amount'])} on {r['date']}.",
+                {'transactions': items})
+    lines = [f"{i}. {r['category']}: {_money(r['amount'])} on {r['date']}" for i, r in enumerate(items, 1)]
+    return f"Your {len(rows)} biggest {kind}s {rng.label}:\n" + "\n".join(lines), {'transactions': items}
+
+
+def _answer_categories(user_id, plan):
+    rng = plan.ranges[0]
+    tx_type = plan.type or 'EXPENSE'
+    rows = [c for c in range_report(user_id, rng.start, rng.end, 'total')['categories'] if c['type'] == tx_type]
+    total = sum(c['total'] for c in rows)
+    top = rows[:plan.limit]
+    kind = 'income' if tx_type == 'INCOME' else 'spending'
+    if not top:
+        return f"No {kind} recorded {rng.label}.", {'categories': []}
+    lines = [f"{i}. {c['category']}: {_money(c['total'])} ({c['total'] / total * 100:.0f}%)" if total else
+             f"{i}. {c['category']}: {_money(c['total'])}" for i, c in enumerate(top, 1)]
+    return (f"Top {kind} categories {rng.label} (total {_money(total)}):\n" + "\n".join(lines),
+            {'categories': top, 'total': total})
+
+
+def execute_plan(user_id, plan):
+    """Run ``plan`` for ``user_id``; returns ``(response_text, data)``."""
+    if plan.intent == INTENT_LARGEST:
+        return _answer_largest(user_id, plan)
+    if plan.intent == INTENT_CATEGORIES:
+        return _answer_categories(user_id, plan)
+
+    results = [_range_totals(user_id, rng, plan.category) for rng in plan.ranges]
+    data = {'periods': [{**rng.to_json(), **{k: v for k, v in r.items() if k != 'categories'}}
+                        for rng, r in zip(plan.ranges, results)]}
+
+    if plan.intent == INTENT_OVERVIEW:
+        rng, r = plan.ranges[0], results[0]
+        text = (f"{rng.label[0].upper()}{rng.label[1:]}: income {_money(r['income'])}, "
+                f"spending {_money(r['expenses'])}, net {_money(r['net'])} across {r['count']} transactions.")
+        return text, data
+
+    metric = _metric(plan)
+    if plan.intent == INTENT_AVERAGE:
+        rng = plan.ranges[0]
+        months = _months_in(rng)
+        average = results[0][metric] / months
+        data['average_per_month'] = average
+        return (f"{_describe(metric, plan.category, rng.label)} averaged {_format(metric, average)} per month "
+                f"over {months} month{'s' if months != 1 else ''}.", data)
+
+    if len(plan.ranges) == 1:
+        rng = plan.ranges[0]
+        return f"{_describe(metric, plan.category, rng.label)}: {_format(metric, results[0][metric])}.", data
+
+    (a, b), (ra, rb) = plan.ranges, results
+    va, vb = ra[metric], rb[metric]
+    diff = va - vb
+    if diff == 0:
+        change = "no change"
+    else:
+        pct = f" ({abs(diff) / abs(vb) * 100:.0f}%)" if vb else ""
+        change = f"{'up' if diff > 0 else 'down'} {_format(metric, abs(diff))}{pct}"
+    data['difference'] = diff
+    return (f"{_describe(metric, plan.category, a.label)}: {_format(metric, va)} vs "
+            f"{_format(metric, vb)} {b.label}, {change}.", data)
+
+
+def answer(user_id, query, today=None):
+    """Parse and answer ``query``; returns ``{'response', 'plan', 'data'}``."""
+    try:
+        plan = parse_query(query, user_categories(user_id), today)
+    except DateOutOfRange:
+        return {'response': "Sorry, I couldn't understand the date in that question.", 'plan': None, 'data': None}
+    text, data = execute_plan(user_id, plan)
+    return {'response': text, 'plan': plan.to_json(), 'data': data}
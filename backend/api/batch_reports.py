@@ -0,0 +1,230 @@
+"""Month-end report generation for every approved user.
+
+All inputs are fetched with a handful of set-based queries (users, per-user
+totals, data versions, existing cache entries, one streaming scan of the
+month's rows); only PDF rendering is fanned out to a process pool. Progress is
+tracked on Report rows, so an interrupted run resumes where it stopped.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+from itertools import groupby
+
+from django.core.files.storage import default_storage
+from django.db.models import Count, F, Max, Q, Sum
+from django.utils import timezone
+
+from .models import MonthlyDataVersion, Report, ReportCacheEntry, Transaction, User
+from .report_cache import content_storage_name, photo_fingerprint, store
+
+logger = logging.getLogger(__name__)
+
+DB_CHUNK_SIZE = 5000
+
+
+def _month_bounds(year, month):
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def _latest_reports(year, month, user_ids):
+    """``{user_id: id}`` of each user's newest Report row for the month."""
+    rows = (
+        Report.objects.filter(year=year, month=month, user_id__in=user_ids)
+        .order_by().values('user_id').annotate(last=Max('id')).values_list('user_id', 'last')
+    )
+    return dict(rows)
+
+
+def _claim_jobs(year, month, user_ids, force):
+    """Ensure a Report row per user and claim the ones still to be rendered.
+
+    A user's month can carry several rows (earlier runs, jobs from the API);
+    only the newest one is requeued or claimed, older history is left alone.
+    Rows still ``running`` were left by an interrupted run and are taken over
+    whatever their age, so don't start two batches for the same month at once.
+    Returns the claimed rows by user id and the ids of those taken over.
+    """
+    latest = _latest_reports(year, month, user_ids)
+    if force:
+        Report.objects.filter(id__in=latest.values(), status__in=(Report.STATUS_DONE, Report.STATUS_FAILED)).update(
+            status=Report.STATUS_QUEUED,
+        )
+    missing = [uid for uid in user_ids if uid not in latest]
+    if missing:
+        Report.objects.bulk_create(
+            [Report(user_id=uid, year=year, month=month, status=Report.STATUS_QUEUED) for uid in missing],
+            batch_size=1000,
+        )
+        latest.update(_latest_reports(year, month, missing))
+    interrupted = set(
+        Report.objects.filter(id__in=latest.values(), status=Report.STATUS_RUNNING).values_list('id', flat=True)
+    )
+    # The claim timestamp doubles as a token: rows another worker grabbed in between won't carry it.
+    token = timezone.now()
+    Report.objects.filter(
+        id__in=latest.values(), status__in=(Report.STATUS_QUEUED, Report.STATUS_RUNNING),
+    ).update(status=Report.STATUS_RUNNING, started_at=token, attempts=F('attempts') + 1)
+    jobs = {
+        r.user_id: r
+        for r in Report.objects.filter(id__in=latest.values(), status=Report.STATUS_RUNNING, started_at=token)
+    }
+    return jobs, {r.id for r in jobs.values()} & interrupted
+
+
+def _summaries(start, end):
+    rows = (
+        Transaction.objects.filter(date__gte=start, date__lt=end)
+        .order_by()
+        .values('user_id')
+        .annotate(
+            total_income=Sum('amount', filter=Q(type='INCOME')),
+            total_expenses=Sum('amount', filter=Q(type='EXPENSE')),
+            transaction_count=Count('id'),
+        )
+    )
+    out = {}
+    for r in rows:
+        inc, exp = float(r['total_income'] or 0), float(r['total_expenses'] or 0)
+        out[r['user_id']] = {
+            'total_income': inc, 'total_expenses': exp, 'net': inc - exp,
+            'transaction_count': r['transaction_count'],
+        }
+    return out
+
+
+def _rows_by_user(start, end):
+    """Yield ``(user_id, rows)`` from one scan of the month, ordered for the renderer."""
+    qs = (
+        Transaction.objects.filter(date__gte=start, date__lt=end)
+        .order_by('user_id', 'category', 'date', 'id')
+        .values_list('user_id', 'date', 'category', 'type', 'amount')
+        .iterator(chunk_size=DB_CHUNK_SIZE)
+    )
+    for user_id, group in groupby(qs, key=lambda r: r[0]):
+        yield user_id, [r[1:] for r in group]
+
+
+def _photo_path(user):
+    if user.profile_photo and os.path.exists(user.profile_photo.path):
+        return user.profile_photo.path
+    return None
+
+
+def generate_month(year, month, workers=None, user_ids=None, force=False, log=logger.info):
+    """Render every approved user's report for ``year``/``month``. Returns counts by outcome.
+
+    ``resumed`` counts the reports an interrupted run had claimed but not finished;
+    they are also counted under the outcome they reach now.
+    """
+    from .pdf_reports import render_report_bytes
+    from .services import REPORT_TEMPLATE_VERSION
+
+    users_qs = User.objects.filter(status='approved').only('id', 'email', 'full_name', 'profile_photo', 'profile_photo_hash')
+    if user_ids:
+        users_qs = users_qs.filter(id__in=user_ids)
+    users = {u.id: u for u in users_qs}
+    jobs, resumed = _claim_jobs(year, month, list(users), force)
+    stats = {'rendered': 0, 'cached': 0, 'failed': 0, 'skipped': len(users) - len(jobs), 'resumed': len(resumed)}
+    if not jobs:
+        return stats
+    log(f"{len(jobs)} report(s) to build ({stats['resumed']} resumed), {stats['skipped']} already done")
+
+    start, end = _month_bounds(year, month)
+    summaries = _summaries(start, end)
+    versions = dict(
+        MonthlyDataVersion.objects.filter(year=year, month=month).values_list('user_id', 'version')
+    )
+    keys = {
+        uid: {
+            'user_id': uid, 'year': year, 'month': month,
+            'data_version': versions.get(uid, 0),
+            'template_version': REPORT_TEMPLATE_VERSION,
+            'photo_hash': photo_fingerprint(users[uid]),
+        }
+        for uid in jobs
+    }
+    cached = {
+        (e.user_id, e.data_version, e.photo_hash): e
+        for e in ReportCacheEntry.objects.filter(year=year, month=month, template_version=REPORT_TEMPLATE_VERSION)
+    }
+    empty = {'total_income': 0.0, 'total_expenses': 0.0, 'net': 0.0, 'transaction_count': 0}
+
+    def finish(report, entry=None, error=None):
+        if entry is not None:
+            report.file_path = content_storage_name(entry.content_hash)
+            report.summary_data = entry.summary_data
+            report.status, report.error = Report.STATUS_DONE, ''
+        else:
+            report.error = str(error)[:2000]
+            report.status = Report.STATUS_FAILED
+        report.finished_at = timezone.now()
+        report.save(update_fields=['file_path', 'summary_data', 'status', 'error', 'finished_at'])
+
+    def job_payload(uid, rows):
+        user, summary = users[uid], summaries.get(uid, empty)
+        return {
+            'user_name': user.full_name or user.email,
+            'year': year, 'month': month,
+            'total_income': summary['total_income'],
+            'total_expenses': summary['total_expenses'],
+            'rows': rows,
+            'photo_path': _photo_path(user),
+        }
+
+    def payloads():
+        """Yield render payloads for uncached jobs, reading the month's rows exactly once."""
+        pending = set(jobs)
+        for uid, rows in _rows_by_user(start, end):
+            if uid in pending:
+                pending.discard(uid)
+                yield uid, job_payload(uid, rows)
+        for uid in pending:
+            yield uid, job_payload(uid, [])
+
+    # Cache hits only need linking; everything else is rendered. Entries whose file is
+    # gone are dropped first, as get_or_render does, so store() records the new render.
+    for uid in list(jobs):
+        key = keys[uid]
+        entry = cached.get((uid, key['data_version'], key['photo_hash']))
+        if entry and default_storage.exists(content_storage_name(entry.content_hash)):
+            finish(jobs.pop(uid), entry)
+            stats['cached'] += 1
+        elif entry:
+            entry.delete()
+
+    max_in_flight = (workers or os.cpu_count() or 1) * 4
+    done_count = 0
+    # 'spawn' workers import only api.pdf_reports; forking would hand them copies of
+    # this process's open database connections and the in-progress cursor.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        in_flight = {}
+
+        def drain(block_until):
+            nonlocal done_count
+            while len(in_flight) > block_until:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    uid = in_flight.pop(future)
+                    try:
+                        entry = store(keys[uid], future.result(), summaries.get(uid, empty))
+                        finish(jobs[uid], entry)
+                        stats['rendered'] += 1
+                    except Exception as e:
+                        logger.exception('Batch report for user %s failed', uid)
+                        finish(jobs[uid], error=e)
+                        stats['failed'] += 1
+                    done_count += 1
+                    if done_count % 100 == 0:
+                        log(f"{done_count}/{len(jobs)} rendered")
+
+        for uid, payload in payloads():
+            if uid not in jobs:
+                continue
+            in_flight[pool.submit(render_report_bytes, payload)] = uid
+            drain(max_in_flight)
+        drain(0)
+    return stats
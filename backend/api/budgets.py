@@ -0,0 +1,184 @@
+"""Monthly budgets with consumption counters maintained by the ledger.
+
+A ``Budget`` covers either one user's expenses (``workspace_id`` empty) or a
+workspace's expenses (transactions tagged with that workspace, whoever entered
+them), optionally restricted to one category. Every ledger write adds the
+amounts to the matching ``BudgetUsage`` row with an ``F()`` update, so reading a
+budget's status is a single-row lookup instead of re-summing the month.
+
+When a write pushes spend past one of the budget's thresholds, a
+``BUDGET_THRESHOLD`` activity is logged exactly once per threshold and month:
+the ``alert_level`` column is raised with a conditional UPDATE and only the
+writer that wins it logs. Dropping back below (deleted expenses) lowers the
+level again so a later crossing alerts anew.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+
+from .models import ActivityLog, Budget, BudgetUsage, MonthlyRollup, Transaction, User
+
+MAX_THRESHOLD = 1000
+
+
+def _workspace_of(tx):
+    # Views pass ``workspace_id`` through from the request body, so unsaved instances may hold a string.
+    try:
+        return int(tx.workspace_id) if tx.workspace_id is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def applies(budget, tx):
+    if tx.type != 'EXPENSE' or (budget.category and budget.category != tx.category):
+        return False
+    if budget.workspace_id is None:
+        return tx.user_id == budget.user_id
+    return _workspace_of(tx) == budget.workspace_id
+
+
+def month_spent(budget, year, month):
+    """Recompute a budget's spend for one month (used once per month to seed its usage row)."""
+    if budget.workspace_id is None:
+        qs = MonthlyRollup.objects.filter(user_id=budget.user_id, year=year, month=month, type='EXPENSE')
+        column = 'total'
+    else:
+        first = date(year, month, 1)
+        qs = Transaction.objects.filter(
+            workspace_id=budget.workspace_id, type='EXPENSE',
+            date__gte=first, date__lte=first.replace(day=calendar.monthrange(year, month)[1]),
+        )
+        column = 'amount'
+    if budget.category:
+        qs = qs.filter(category=budget.category)
+    return qs.order_by().aggregate(s=Sum(column))['s'] or Decimal('0')
+
+
+def _seed_usage(budget, year, month):
+    """Create the usage row from the ledger; returns ``(row, created)``."""
+    try:
+        with transaction.atomic():
+            return BudgetUsage.objects.create(
+                budget_id=budget.id, year=year, month=month, spent=month_spent(budget, year, month),
+            ), True
+    except IntegrityError:
+        return BudgetUsage.objects.get(budget_id=budget.id, year=year, month=month), False
+
+
+def _level(budget, spent):
+    """Highest threshold (percent) that ``spent`` has reached, or 0."""
+    if budget.amount <= 0:
+        return 0
+    percent = Decimal(spent) * 100 / budget.amount
+    return max((t for t in budget.thresholds or [] if percent >= t), default=0)
+
+
+def _label(budget):
+    scope = f"workspace {budget.workspace_id}" if budget.workspace_id is not None else "personal"
+    return f"{budget.category or 'all categories'} ({scope})"
+
+
+def _raise_alert(budget, usage, level):
+    email, name = User.objects.filter(id=budget.user_id).values_list('email', 'full_name').first() or ('', '')
+    ActivityLog.objects.create(
+        user_id=budget.user_id,
+        user_email=email or '',
+        user_name=name or '',
+        action='BUDGET_THRESHOLD',
+        details=(
+            f"Budget {budget.id} {_label(budget)} reached {level}% for {usage.year}-{usage.month:02d}: "
+            f"spent {usage.spent} of {budget.amount}"
+        ),
+    )
+
+
+def check_thresholds(budget, usage):
+    """Log an alert if ``usage`` crossed a new threshold; lower ``alert_level`` if spend fell."""
+    level = _level(budget, usage.spent)
+    if level > usage.alert_level:
+        won = BudgetUsage.objects.filter(id=usage.id, alert_level__lt=level).update(alert_level=level)
+        if won:
+            usage.alert_level = level
+            _raise_alert(budget, usage, level)
+    elif level < usage.alert_level:
+        BudgetUsage.objects.filter(id=usage.id, alert_level__gt=level).update(alert_level=level)
+        usage.alert_level = level
+
+
+def apply_budget_deltas(transactions, sign):
+    """Add (sign=1) or subtract (sign=-1) expense transactions from the matching budgets."""
+    expenses = [t for t in transactions if t.type == 'EXPENSE']
+    if not expenses:
+        return
+    user_ids = {t.user_id for t in expenses}
+    workspace_ids = {_workspace_of(t) for t in expenses} - {None}
+    scope = Q(workspace_id__isnull=True, user_id__in=user_ids)
+    if workspace_ids:
+        scope |= Q(workspace_id__in=workspace_ids)
+    budgets = list(Budget.objects.filter(scope))
+    if not budgets:
+        return
+
+    deltas = defaultdict(Decimal)
+    for tx in expenses:
+        for budget in budgets:
+            if applies(budget, tx):
+                deltas[(budget.id, tx.date.year, tx.date.month)] += Decimal(str(tx.amount)) * sign
+    by_id = {b.id: b for b in budgets}
+    for (budget_id, year, month), delta in deltas.items():
+        budget = by_id[budget_id]
+        rows = BudgetUsage.objects.filter(budget_id=budget_id, year=year, month=month)
+        if not rows.update(spent=F('spent') + delta):
+            # First write of the month: seed from the ledger, which already includes this change.
+            # If another request seeded it first, count our change on top (as ``bump_data_versions`` does).
+            _, created = _seed_usage(budget, year, month)
+            if not created:
+                rows.update(spent=F('spent') + delta)
+        check_thresholds(budget, rows.get())
+
+
+def budget_status(budgets, year, month):
+    """Status dicts for ``budgets`` in one month: one query for the usage rows (plus a seed per missing month)."""
+    budgets = list(budgets)
+    usage = {
+        u.budget_id: u
+        for u in BudgetUsage.objects.filter(budget_id__in=[b.id for b in budgets], year=year, month=month)
+    }
+    result = []
+    for budget in budgets:
+        row = usage.get(budget.id) or _seed_usage(budget, year, month)[0]
+        spent = Decimal(row.spent)
+        result.append({
+            'id': budget.id,
+            'workspace_id': budget.workspace_id,
+            'category': budget.category,
+            'amount': float(budget.amount),
+            'thresholds': budget.thresholds,
+            'year': year,
+            'month': month,
+            'spent': float(spent),
+            'remaining': float(budget.amount - spent),
+            'percent_used': round(float(spent * 100 / budget.amount), 1) if budget.amount > 0 else None,
+            'alert_level': row.alert_level,
+            'over_budget': spent > budget.amount,
+        })
+    return result
+
+
+def clean_thresholds(value):
+    """Validate a thresholds list from the API; returns ``(thresholds, error)``."""
+    if value is None:
+        return None, None
+    if not isinstance(value, list) or not value:
+        return None, "thresholds must be a non-empty list of percentages"
+    try:
+        thresholds = sorted({int(t) for t in value})
+    except (TypeError, ValueError):
+        return None, "thresholds must be whole percentages"
+    if thresholds[0] < 1 or thresholds[-1] > MAX_THRESHOLD:
+        return None, f"thresholds must be between 1 and {MAX_THRESHOLD}"
+    return thresholds, None
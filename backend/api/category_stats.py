@@ -0,0 +1,189 @@
+"""Per-category spending statistics and outlier flags.
+
+Two layers:
+
+* ``CategoryStats`` keeps running moments (count, sum, sum of squares) per
+  scope, type and category. ``ledger`` adds or subtracts every written
+  transaction, so mean and standard deviation are always one row away and a new
+  expense can be checked against its category's norm at insert time
+  (``check_anomaly``) without rescanning history.
+* ``category_statistics`` computes the full picture (percentiles, median,
+  standard deviation, flagged outliers) for a user or workspace. Amounts come
+  from one query into NumPy arrays and every statistic is computed for all
+  categories at once. Results are cached under the scope's summed
+  ``CategoryStats.version``, which moves on every ledger write, so the cache
+  refreshes as soon as new transactions arrive and is reused until then.
+
+NumPy is imported inside the functions that need it (see ``manage.py import_profile``).
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
+
+from .models import CategoryStats, Transaction
+
+DEFAULT_SIGMA = 5.0
+# Fewer prior samples than this and a category has no meaningful norm yet.
+MIN_SAMPLES = 10
+MAX_OUTLIERS = 10
+PERCENTILES = (25, 50, 75, 90, 95)
+CACHE_SECONDS = 24 * 60 * 60
+
+
+def user_scope(user_id):
+    return f"u:{user_id}"
+
+
+def workspace_scope(workspace_id):
+    return f"w:{workspace_id}"
+
+
+def _scopes(tx):
+    scopes = [user_scope(tx.user_id)]
+    try:
+        if tx.workspace_id is not None:
+            scopes.append(workspace_scope(int(tx.workspace_id)))
+    except (TypeError, ValueError):
+        pass
+    return scopes
+
+
+def apply_stats_deltas(transactions, sign):
+    """Add (sign=1) or subtract (sign=-1) transactions from the running moments."""
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for t in transactions:
+        amount = float(t.amount)
+        for scope in _scopes(t):
+            d = deltas[(scope, t.type, t.category)]
+            d[0] += sign
+            d[1] += sign * amount
+            d[2] += sign * amount * amount
+    if not deltas:
+        return
+    CategoryStats.objects.bulk_create(
+        [CategoryStats(scope=s, type=t, category=c) for s, t, c in deltas],
+        batch_size=1000, ignore_conflicts=True,
+    )
+    q = connection.ops.quote_name
+    cols = {name: q(name) for name in ('count', 'total', 'total_sq', 'version')}
+    where = ' AND '.join(f"{q(c)} = %s" for c in ('scope', 'type', 'category'))
+    sql = (
+        f"UPDATE {q(CategoryStats._meta.db_table)} SET "
+        + ', '.join(f"{col} = {col} + %s" for col in cols.values())
+        + f" WHERE {where}"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(n, s, sq, 1, *key) for key, (n, s, sq) in deltas.items()])
+
+
+def _moments(count, total, total_sq):
+    """Mean and sample standard deviation from running sums (None when undefined)."""
+    if count < 2:
+        return (total / count if count else None), None
+    mean = total / count
+    variance = max(total_sq - count * mean * mean, 0.0) / (count - 1)
+    return mean, variance ** 0.5
+
+
+def check_anomaly(tx, sigma=DEFAULT_SIGMA):
+    """Compare a just-recorded transaction with its category's norm (one query).
+
+    The stored moments already include ``tx``, so it is taken back out to
+    compare against prior history only. Returns ``{'z', 'mean', 'std', ...}`` when
+    the amount is ``sigma`` or more standard deviations above the mean, else None.
+    """
+    row = CategoryStats.objects.filter(scope=user_scope(tx.user_id), type=tx.type, category=tx.category).first()
+    if row is None:
+        return None
+    amount = float(tx.amount)
+    count, total, total_sq = row.count - 1, row.total - amount, row.total_sq - amount * amount
+    if count < MIN_SAMPLES:
+        return None
+    mean, std = _moments(count, total, total_sq)
+    if not std:
+        return None
+    z = (amount - mean) / std
+    if z < sigma:
+        return None
+    return {'z': round(z, 2), 'mean': round(mean, 2), 'std': round(std, 2), 'samples': count, 'sigma': sigma}
+
+
+def scope_version(scope):
+    return CategoryStats.objects.filter(scope=scope).aggregate(v=Sum('version'))['v'] or 0
+
+
+def _compute(qs, sigma):
+    import numpy as np
+
+    rows = list(qs.values_list('id', 'category', 'amount', 'date'))
+    if not rows:
+        return []
+    ids, categories, amounts, dates = zip(*rows)
+    amounts = np.asarray(amounts, dtype=float)
+    names, group = np.unique(np.asarray(categories, dtype=object), return_inverse=True)
+    counts = np.bincount(group, minlength=len(names))
+    totals = np.bincount(group, weights=amounts, minlength=len(names))
+    means = totals / counts
+    deviations = amounts - means[group]
+    ddof = np.maximum(counts - 1, 1)
+    stds = np.sqrt(np.bincount(group, weights=deviations ** 2, minlength=len(names)) / ddof)
+    stds[counts < 2] = 0.0
+
+    # Percentiles for every category at once: sort by (category, amount), then
+    # interpolate inside each category's contiguous slice.
+    order = np.lexsort((amounts, group))
+    ordered = amounts[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    percentiles = {}
+    for p in (0, *PERCENTILES, 100):
+        position = starts + (counts - 1) * (p / 100)
+        lo, hi = np.floor(position).astype(int), np.ceil(position).astype(int)
+        percentiles[p] = ordered[lo] + (ordered[hi] - ordered[lo]) * (position - lo)
+
+    z = np.divide(deviations, stds[group], out=np.zeros_like(amounts), where=stds[group] > 0)
+    flagged = np.nonzero((z >= sigma) & (counts[group] >= MIN_SAMPLES))[0]
+    outliers = defaultdict(list)
+    for i in flagged[np.argsort(-z[flagged])]:
+        if len(outliers[group[i]]) < MAX_OUTLIERS:
+            outliers[group[i]].append({
+                'id': ids[i], 'amount': float(amounts[i]), 'date': dates[i].isoformat(), 'z': round(float(z[i]), 2),
+            })
+
+    result = []
+    for g in np.argsort(-totals):
+        result.append({
+            'category': names[g],
+            'count': int(counts[g]),
+            'total': round(float(totals[g]), 2),
+            'mean': round(float(means[g]), 2),
+            'std': round(float(stds[g]), 2),
+            'min': float(percentiles[0][g]),
+            **{f'p{p}': round(float(percentiles[p][g]), 2) for p in PERCENTILES},
+            'median': round(float(percentiles[50][g]), 2),
+            'max': float(percentiles[100][g]),
+            'outliers': outliers.get(g, []),
+        })
+    return result
+
+
+def category_statistics(scope, tx_type='EXPENSE', start=None, end=None, sigma=DEFAULT_SIGMA):
+    """Per-category statistics for a ``u:<id>``/``w:<id>`` scope, cached until the scope's data changes."""
+    key = f"catstats:{scope}:{scope_version(scope)}:{tx_type}:{start}:{end}:{sigma}"
+    result = cache.get(key)
+    if result is not None:
+        return result
+    prefix, scope_id = scope.split(':', 1)
+    qs = Transaction.objects.filter(type=tx_type).order_by()
+    qs = qs.filter(user_id=int(scope_id)) if prefix == 'u' else qs.filter(workspace_id=int(scope_id))
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    result = {
+        'scope': scope, 'type': tx_type, 'start': start.isoformat() if start else None,
+        'end': end.isoformat() if end else None, 'sigma': sigma, 'categories': _compute(qs, sigma),
+    }
+    cache.set(key, result, timeout=CACHE_SECONDS)
+    return result
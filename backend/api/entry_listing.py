@@ -0,0 +1,123 @@
+"""Cursor-paginated, filterable listing of a form's expense entries.
+
+Entries are returned newest first, ordered by ``(created_at, id)`` and served
+from the ``(form_id, created_at, id)`` index, so every page costs the same no
+matter how deep the client has scrolled. The cursor is the last row's sort key,
+not an offset, so inserts between page loads don't shift or repeat rows.
+
+Field filters use the form's typed projection when it has one and JSON paths
+otherwise (see ``form_analytics``):
+
+* ``f_<field_id>=value``: exact match (value coerced by the field's type)
+* ``f_<field_id>_min`` / ``f_<field_id>_max``: inclusive bounds on number and date fields
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime, time, timedelta
+
+from django.db.models import Case, Exists, FloatField, OuterRef, Q, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .form_analytics import NUMERIC_RE, EntryValue
+from .models import ExpenseEntry, ExpenseEntryValue
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class ListingError(ValueError):
+    """Bad listing parameters; the message is safe to show to the user."""
+
+
+def encode_cursor(entry):
+    raw = json.dumps([entry.created_at.isoformat(), entry.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, entry_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise ListingError("Invalid cursor")
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _parse_filters(form, params):
+    """``[(field, op, value)]`` from ``f_<id>``, ``f_<id>_min`` and ``f_<id>_max`` params."""
+    filters = []
+    for name, raw in params.items():
+        if not name.startswith('f_') or raw == '':
+            continue
+        key, op = name[2:], 'eq'
+        for suffix in ('_min', '_max'):
+            if key.endswith(suffix):
+                key, op = key[:-len(suffix)], suffix[1:]
+        field = form.field(key)
+        if field is None:
+            raise ListingError(f"Unknown field in filter {name}")
+        if op != 'eq' and field.field_type not in ('number', 'date'):
+            raise ListingError(f"{field.label} only supports exact filters")
+        try:
+            value = field.coerce(raw, field)
+        except ValueError as e:
+            raise ListingError(f"{field.label} {e}")
+        filters.append((field, op, value))
+    return filters
+
+
+def _projection_condition(field, op, value):
+    column = 'num_value' if field.field_type == 'number' else 'text_value'
+    lookup = {'eq': 'exact', 'min': 'gte', 'max': 'lte'}[op]
+    return Exists(ExpenseEntryValue.objects.filter(
+        entry_id=OuterRef('id'), field_id=field.id, **{f'{column}__{lookup}': value},
+    ))
+
+
+def _apply_json_filter(qs, field, op, value, alias):
+    lookup = {'eq': 'exact', 'min': 'gte', 'max': 'lte'}[op]
+    qs = qs.alias(**{alias: EntryValue(field.key)})
+    if field.field_type == 'number':
+        # The cast sits inside the CASE: as a separate WHERE term next to the regex check,
+        # the database may evaluate it first and fail on a non-numeric value.
+        numeric = Case(
+            When(**{f'{alias}__regex': NUMERIC_RE}, then=Cast(alias, FloatField())),
+            default=None, output_field=FloatField(),
+        )
+        return qs.alias(**{f'{alias}_n': numeric}).filter(**{f'{alias}_n__{lookup}': value})
+    # Dates are stored as ISO strings, so text comparison orders them correctly.
+    return qs.filter(**{f'{alias}__{lookup}': str(value)})
+
+
+def list_entries(form, params):
+    """Return ``(entries, next_cursor)`` for a ``CompiledForm`` and request query params."""
+    try:
+        limit = min(max(int(params.get('limit') or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ListingError("limit must be an integer")
+    qs = ExpenseEntry.objects.filter(form_id=form.id)
+    try:
+        # Bounds as datetimes (not created_at__date) so the (form_id, created_at) index applies.
+        if params.get('date_from'):
+            qs = qs.filter(created_at__gte=_day_start(date.fromisoformat(params['date_from'])))
+        if params.get('date_to'):
+            qs = qs.filter(created_at__lt=_day_start(date.fromisoformat(params['date_to']) + timedelta(days=1)))
+    except ValueError:
+        raise ListingError("date_from and date_to must be YYYY-MM-DD dates")
+    for i, (field, op, value) in enumerate(_parse_filters(form, params)):
+        if form.projected:
+            qs = qs.filter(_projection_condition(field, op, value))
+        else:
+            qs = _apply_json_filter(qs, field, op, value, f'_f{i}')
+    if params.get('cursor'):
+        created_at, entry_id = decode_cursor(params['cursor'])
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=entry_id))
+    page = list(qs.order_by('-created_at', '-id')[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor
@@ -0,0 +1,250 @@
+"""Cash-flow forecasts from a user's monthly history.
+
+The whole history is one query over ``MonthlyRollup`` turned into a
+``(series, months)`` NumPy matrix, one row per (type, category). Both models
+run on every series at once:
+
+* seasonal naive: next month looks like the same month last year (the last
+  observed month when a series has less than a year of history);
+* simple exponential smoothing, with the smoothing factor picked per series by
+  a vectorized grid search over one-step-ahead errors.
+
+Bands are normal-approximation intervals from each model's in-sample errors;
+totals assume categories are independent. Months are forecast from the last
+complete month, so the current month is the first forecast step and is used
+for the month-end projection.
+
+NumPy is imported inside ``compute_forecast`` so it stays out of boot time
+(see ``manage.py import_profile``). Results are cached until the user's ledger
+data version changes.
+"""
+import calendar
+from datetime import date
+
+from django.core.cache import cache
+
+from .ledger import user_data_version
+from .models import MonthlyRollup
+
+HISTORY_MONTHS = 36
+DEFAULT_HORIZON = 3
+MAX_HORIZON = 12
+CONFIDENCE = 0.8
+Z_SCORE = 1.2816  # two-sided 80%
+ALPHAS = (0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)
+CACHE_SECONDS = 24 * 60 * 60
+
+
+def _month_index(year, month):
+    return year * 12 + month - 1
+
+
+def _label(index):
+    return f"{index // 12}-{index % 12 + 1:02d}"
+
+
+def _month_bounds(index):
+    """First and last ``date`` of month ``index``."""
+    year, month = index // 12, index % 12 + 1
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _load(user_id):
+    """``[(month_index, type, category, total)]`` for every non-empty rollup row of the user."""
+    rows = (
+        MonthlyRollup.objects.filter(user_id=user_id)
+        .exclude(count=0)
+        .values_list('year', 'month', 'type', 'category', 'total')
+    )
+    return [(_month_index(y, m), t, c, float(total)) for y, m, t, c, total in rows]
+
+
+def _smoothing(np, Y, first):
+    """Vectorized SES over all series and all ``ALPHAS``.
+
+    Returns per-series ``(level, alpha, sigma)``: the final smoothed level with the
+    best factor, the factor itself and the RMS of its one-step errors. Months
+    before a series' first non-zero value are ignored.
+    """
+    S, T = Y.shape
+    alphas = np.asarray(ALPHAS)[None, :]
+    level = np.zeros((S, len(ALPHAS)))
+    sse = np.zeros((S, len(ALPHAS)))
+    n = np.zeros(S)
+    for t in range(T):
+        starts = first == t
+        level[starts] = Y[starts, t, None]
+        active = (first < t)[:, None]
+        err = np.where(active, Y[:, t, None] - level, 0.0)
+        sse += err * err
+        n += active[:, 0]
+        level += alphas * err
+    best = sse.argmin(axis=1)
+    rows = np.arange(S)
+    sigma = np.sqrt(sse[rows, best] / np.maximum(n, 1))
+    # Too little history for an error estimate: fall back to the level itself.
+    sigma = np.where(n >= 2, sigma, np.abs(level[rows, best]))
+    return level[rows, best], np.asarray(ALPHAS)[best], sigma
+
+
+def _seasonal_naive(np, Y, first, horizon):
+    """Per-series forecasts ``(S, horizon)`` and the RMS of year-over-year differences."""
+    S, T = Y.shape
+    if T >= 12:
+        cols = T - 12 + (np.arange(horizon) % 12)
+        seasonal = Y[:, cols]
+        diffs = Y[:, 12:] - Y[:, :-12]
+        valid = np.arange(12, T)[None, :] >= (first[:, None] + 12)
+        count = valid.sum(axis=1)
+        sigma = np.sqrt(np.where(valid, diffs * diffs, 0.0).sum(axis=1) / np.maximum(count, 1))
+    else:
+        seasonal, count, sigma = np.zeros((S, horizon)), np.zeros(S, dtype=int), np.zeros(S)
+    has_year = (T - first) >= 12
+    last = np.repeat(Y[:, -1:], horizon, axis=1)
+    forecast = np.where(has_year[:, None], seasonal, last)
+    return forecast, sigma, has_year & (count >= 1)
+
+
+def compute_forecast(user_id, today=None, horizon=DEFAULT_HORIZON):
+    """Forecast ``user_id``'s monthly income and expenses; uncached (see ``get_forecast``)."""
+    import numpy as np
+
+    today = today or date.today()
+    current = _month_index(today.year, today.month)
+    quarter_start = _month_index(today.year, (today.month - 1) // 3 * 3 + 1) + 3
+    # Forecast far enough ahead to cover the next calendar quarter as well as the horizon.
+    steps = max(horizon, quarter_start + 3 - current)
+
+    rows = _load(user_id)
+    series = sorted({(t, c) for _, t, c, _ in rows})
+    key_of = {key: i for i, key in enumerate(series)}
+    past = [r for r in rows if r[0] < current]
+    oldest = max(min((r[0] for r in past), default=current - 1), current - HISTORY_MONTHS)
+    T = current - oldest
+
+    Y = np.zeros((len(series), T))
+    balance_before = 0.0
+    to_date = np.zeros(len(series))
+    for index, tx_type, category, total in rows:
+        sign = 1.0 if tx_type == 'INCOME' else -1.0
+        if index < current:
+            balance_before += sign * total
+            if index >= oldest:
+                Y[key_of[(tx_type, category)], index - oldest] += total
+        elif index == current:
+            to_date[key_of[(tx_type, category)]] += total
+
+    # Drop series with no activity in the last year (and nothing this month).
+    recent = Y[:, -12:].sum(axis=1) + to_date > 0
+    Y, to_date = Y[recent], to_date[recent]
+    series = [s for s, keep in zip(series, recent) if keep]
+    is_income = np.array([t == 'INCOME' for t, _ in series], dtype=bool)
+    nonzero = Y > 0
+    first = np.where(nonzero.any(axis=1), nonzero.argmax(axis=1), T)
+
+    h = np.arange(1, steps + 1)[None, :]
+    if len(series):
+        level, alpha, sigma = _smoothing(np, Y, first)
+        ses = np.repeat(level[:, None], steps, axis=1)
+        ses_sigma = sigma[:, None] * np.sqrt(1 + (h - 1) * (alpha[:, None] ** 2))
+        seasonal, s_sigma, s_ok = _seasonal_naive(np, Y, first, steps)
+        seasonal_sigma = np.where(
+            s_ok[:, None], s_sigma[:, None] * np.sqrt((h - 1) // 12 + 1), ses_sigma,
+        )
+    else:
+        ses = ses_sigma = seasonal = seasonal_sigma = np.zeros((len(series), steps))
+    ses, seasonal = np.maximum(ses, 0.0), np.maximum(seasonal, 0.0)
+
+    def band(value, sig):
+        return {
+            'value': round(float(value), 2),
+            'low': round(float(max(value - Z_SCORE * sig, 0.0)), 2),
+            'high': round(float(value + Z_SCORE * sig), 2),
+        }
+
+    def totals(mask, step_slice):
+        """Summed forecasts (and independent-error bands) for the series in ``mask``."""
+        return {
+            'seasonal_naive': band(
+                seasonal[mask][:, step_slice].sum(), np.sqrt((seasonal_sigma[mask][:, step_slice] ** 2).sum()),
+            ),
+            'smoothing': band(ses[mask][:, step_slice].sum(), np.sqrt((ses_sigma[mask][:, step_slice] ** 2).sum())),
+        }
+
+    months = [
+        {
+            'month': _label(current + i),
+            'income': totals(is_income, slice(i, i + 1)),
+            'expenses': totals(~is_income, slice(i, i + 1)),
+        }
+        for i in range(horizon)
+    ]
+
+    # Month end: what is already booked this month is a floor for each series.
+    this_month = np.maximum(ses[:, 0], to_date)
+    this_low = np.maximum(ses[:, 0] - Z_SCORE * ses_sigma[:, 0], to_date)
+    this_high = np.maximum(ses[:, 0] + Z_SCORE * ses_sigma[:, 0], to_date)
+    income_to_date, expenses_to_date = float(to_date[is_income].sum()), float(to_date[~is_income].sum())
+    month_end = {
+        'month': _label(current),
+        'income_to_date': round(income_to_date, 2),
+        'expenses_to_date': round(expenses_to_date, 2),
+        'projected_income': round(float(this_month[is_income].sum()), 2),
+        'projected_expenses': round(float(this_month[~is_income].sum()), 2),
+        'balance_to_date': round(balance_before + income_to_date - expenses_to_date, 2),
+        'projected_balance': round(
+            balance_before + float(this_month[is_income].sum()) - float(this_month[~is_income].sum()), 2,
+        ),
+        'projected_balance_low': round(
+            balance_before + float(this_low[is_income].sum()) - float(this_high[~is_income].sum()), 2,
+        ),
+        'projected_balance_high': round(
+            balance_before + float(this_high[is_income].sum()) - float(this_low[~is_income].sum()), 2,
+        ),
+    }
+
+    q_slice = slice(quarter_start - current, quarter_start - current + 3)
+    next_quarter = {
+        'start': _month_bounds(quarter_start)[0].isoformat(),
+        'end': _month_bounds(quarter_start + 2)[1].isoformat(),
+        'income': totals(is_income, q_slice),
+        'expenses': totals(~is_income, q_slice),
+    }
+
+    categories = []
+    for i, (tx_type, category) in enumerate(series):
+        categories.append({
+            'type': tx_type,
+            'category': category,
+            'forecast': [
+                {
+                    'month': _label(current + s),
+                    'seasonal_naive': band(seasonal[i, s], seasonal_sigma[i, s]),
+                    'smoothing': band(ses[i, s], ses_sigma[i, s]),
+                }
+                for s in range(horizon)
+            ],
+        })
+    categories.sort(key=lambda c: c['forecast'][0]['smoothing']['value'], reverse=True)
+
+    return {
+        'as_of': today.isoformat(),
+        'history_months': int(T),
+        'horizon': horizon,
+        'confidence': CONFIDENCE,
+        'month_end': month_end,
+        'next_quarter': next_quarter,
+        'months': months,
+        'categories': categories,
+    }
+
+
+def get_forecast(user_id, today=None, horizon=DEFAULT_HORIZON):
+    """``compute_forecast`` cached per (user data version, day, horizon)."""
+    today = today or date.today()
+    key = f"forecast:{user_id}:{user_data_version(user_id)}:{today.isoformat()}:{horizon}"
+    result = cache.get(key)
+    if result is None:
+        result = compute_forecast(user_id, today, horizon)
+        cache.set(key, result, timeout=CACHE_SECONDS)
+    return result
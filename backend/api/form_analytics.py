@@ -0,0 +1,175 @@
+"""Aggregations over dynamic expense-form entries, computed in the database.
+
+Two sources answer the same questions (count/sum/avg/min/max of a number field,
+optionally grouped by another field or by entry month):
+
+* JSON paths: values are read straight out of ``ExpenseEntry.data``. Django's
+  ``KT()``/``data__<key>`` lookups treat numeric keys (our field ids) as array
+  indexes, so ``EntryValue`` emits the object-key path itself.
+* Projection: forms with ``projected`` set mirror every entry into typed
+  ``ExpenseEntryValue`` rows, indexed by (form, field, created_at), so large
+  forms aggregate from an index instead of parsing JSON per row. Toggle it and
+  backfill with ``manage.py form_projection``.
+"""
+from django.db import NotSupportedError
+from django.db.models import Avg, Count, F, FloatField, Func, Max, Min, OuterRef, Subquery, Sum, TextField
+from django.db.models.functions import Cast, TruncMonth
+
+from .form_schema import bump_schema_version, get_compiled_form
+from .models import ExpenseEntry, ExpenseEntryValue, ExpenseForm
+
+GROUP_BY_MONTH = 'month'
+MAX_GROUPS = 200
+# Entries written before schema validation may hold non-numeric strings; skip them.
+NUMERIC_RE = r'^-?[0-9]+(\.[0-9]+)?([eE][-+]?[0-9]+)?$'
+
+
+class EntryValue(Func):
+    """``ExpenseEntry.data[<field_id>]`` as text (SQL NULL when the key is absent)."""
+    output_field = TextField()
+
+    def __init__(self, field_key, **extra):
+        super().__init__(F('data'), **extra)
+        self.field_key = str(field_key)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError("Form analytics over JSON needs SQLite, PostgreSQL or MySQL")
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f"json_extract({sql}, %s)", (*params, f'$."{self.field_key}"')
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f"JSON_UNQUOTE(JSON_EXTRACT({sql}, %s))", (*params, f'$."{self.field_key}"')
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f"({sql} ->> %s)", (*params, self.field_key)
+
+
+def _aggregates(value):
+    if value is None:
+        return {'count': Count('pk')}
+    return {'count': Count('pk'), 'sum': Sum(value), 'avg': Avg(value), 'min': Min(value), 'max': Max(value)}
+
+
+def _stats(row, with_metric):
+    out = {'count': row['count']}
+    if with_metric:
+        for key in ('sum', 'avg', 'min', 'max'):
+            out[key] = float(row[key]) if row[key] is not None else None
+    return out
+
+
+def _group_key(value):
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m')
+    return value
+
+
+def _json_source(form, metric, group_by):
+    qs = ExpenseEntry.objects.filter(form_id=form.id)
+    if metric is not None:
+        qs = qs.annotate(_m=EntryValue(metric.key)).filter(_m__regex=NUMERIC_RE)
+    if group_by == GROUP_BY_MONTH:
+        qs = qs.annotate(_g=TruncMonth('created_at'))
+    elif group_by is not None:
+        qs = qs.annotate(_g=EntryValue(group_by.key))
+    value = Cast('_m', FloatField()) if metric is not None else None
+    return qs, value
+
+
+def _projection_source(form, metric, group_by):
+    values = ExpenseEntryValue.objects.filter(form_id=form.id)
+    if metric is not None:
+        qs, entry_ref, value = values.filter(field_id=metric.id, num_value__isnull=False), 'entry_id', F('num_value')
+    else:
+        qs, entry_ref, value = ExpenseEntry.objects.filter(form_id=form.id), 'id', None
+    if group_by == GROUP_BY_MONTH:
+        qs = qs.annotate(_g=TruncMonth('created_at'))
+    elif group_by is not None:
+        qs = qs.annotate(_g=Subquery(
+            values.filter(entry_id=OuterRef(entry_ref), field_id=group_by.id).values('text_value')[:1]
+        ))
+    return qs, value
+
+
+def form_aggregate(form, metric=None, group_by=None, created_from=None, created_to=None):
+    """Aggregate ``form``'s entries (a ``CompiledForm``).
+
+    ``metric`` is a number ``CompiledField`` (None to only count entries);
+    ``group_by`` is a ``CompiledField``, ``GROUP_BY_MONTH`` or None. Dates bound
+    the entries' ``created_at`` (inclusive).
+    """
+    source = _projection_source if form.projected else _json_source
+    qs, value = source(form, metric, group_by)
+    if created_from:
+        qs = qs.filter(created_at__date__gte=created_from)
+    if created_to:
+        qs = qs.filter(created_at__date__lte=created_to)
+    aggregates = _aggregates(value)
+    result = {
+        'form_id': form.id,
+        'source': 'projection' if form.projected else 'json',
+        'metric': metric.id if metric is not None else None,
+        'group_by': group_by if group_by in (None, GROUP_BY_MONTH) else group_by.id,
+        'totals': _stats(qs.order_by().aggregate(**aggregates), metric is not None),
+    }
+    if group_by is not None:
+        order = '_g' if group_by == GROUP_BY_MONTH else ('-sum' if metric is not None else '-count')
+        rows = qs.order_by().values('_g').annotate(**aggregates).order_by(order)[:MAX_GROUPS]
+        result['groups'] = [{'key': _group_key(r['_g']), **_stats(r, metric is not None)} for r in rows]
+    return result
+
+
+def _value_rows(form, entry):
+    rows = []
+    for field in form.fields:
+        raw = entry.data.get(field.key) if isinstance(entry.data, dict) else None
+        if raw is None or raw == '':
+            continue
+        try:
+            value = field.coerce(raw, field)
+        except ValueError:
+            continue
+        row = ExpenseEntryValue(entry_id=entry.id, form_id=form.id, field_id=field.id, created_at=entry.created_at)
+        if field.field_type == 'number':
+            row.num_value = float(value)
+        else:
+            row.text_value = str(value)[:255]
+        rows.append(row)
+    return rows
+
+
+def project_entries(form, entries):
+    """Mirror newly created entries of a projected form into ``ExpenseEntryValue``."""
+    if not form.projected:
+        return
+    rows = [row for entry in entries for row in _value_rows(form, entry)]
+    ExpenseEntryValue.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+def unproject_entries(entry_ids):
+    ExpenseEntryValue.objects.filter(entry_id__in=list(entry_ids)).delete()
+
+
+def set_projection(form_id, enabled, batch_size=2000):
+    """Turn the projection on (and backfill it) or off (and drop it). Returns rows written."""
+    ExpenseForm.objects.filter(id=form_id).update(projected=enabled)
+    bump_schema_version(form_id)
+    ExpenseEntryValue.objects.filter(form_id=form_id).delete()
+    if not enabled:
+        return 0
+    form = get_compiled_form(form_id)
+    written = 0
+    batch = []
+    for entry in ExpenseEntry.objects.filter(form_id=form_id).order_by('id').iterator(chunk_size=batch_size):
+        batch.extend(_value_rows(form, entry))
+        if len(batch) >= batch_size:
+            ExpenseEntryValue.objects.bulk_create(batch, ignore_conflicts=True)
+            written, batch = written + len(batch), []
+    if batch:
+        ExpenseEntryValue.objects.bulk_create(batch, ignore_conflicts=True)
+        written += len(batch)
+    return written
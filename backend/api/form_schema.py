@@ -0,0 +1,235 @@
+"""Compiled expense-form schemas.
+
+A form and its fields are compiled once into a ``CompiledForm`` (serialized
+JSON plus per-field validators) and kept in a per-process cache keyed by
+``(form_id, schema_version)``. Any change to a form's fields bumps
+``ExpenseForm.schema_version``, so stale schemas are never used and no
+cross-process invalidation is needed.
+
+Listing a workspace's forms is one query for the forms (which carries their
+versions) plus, only for forms missing from the cache, one query for all of
+their fields.
+"""
+import math
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import F
+
+from .models import ExpenseField, ExpenseForm
+
+FIELD_TYPES = ('text', 'number', 'date', 'select')
+MAX_TEXT_LENGTH = 2000
+MAX_BULK_ENTRIES = 500
+CACHE_SIZE = 2048
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+class EntryInvalid(ValueError):
+    """Entry data does not match the form; ``errors`` maps field id to message."""
+
+    def __init__(self, errors, message=None):
+        self.errors = errors
+        super().__init__(message or next(iter(errors.values())))
+
+
+def _coerce_text(value, field):
+    if isinstance(value, (dict, list)):
+        raise ValueError("must be text")
+    value = str(value)
+    if len(value) > MAX_TEXT_LENGTH:
+        raise ValueError(f"must be at most {MAX_TEXT_LENGTH} characters")
+    return value
+
+
+def _coerce_number(value, field):
+    if isinstance(value, bool) or isinstance(value, (dict, list)):
+        raise ValueError("must be a number")
+    if isinstance(value, int):
+        return value
+    try:
+        number = Decimal(str(value).strip().replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError("must be a number")
+    if not number.is_finite():
+        raise ValueError("must be a number")
+    if number == number.to_integral_value() and abs(number) < 2 ** 53:
+        return int(number)
+    result = float(number)
+    if math.isinf(result):
+        raise ValueError("must be a number")
+    return result
+
+
+def _coerce_date(value, field):
+    try:
+        return date.fromisoformat(str(value).strip()[:10]).isoformat()
+    except ValueError:
+        raise ValueError("must be a date (YYYY-MM-DD)")
+
+
+def _coerce_select(value, field):
+    value = str(value)
+    if value not in field.option_set:
+        raise ValueError("must be one of the field's options")
+    return value
+
+
+_COERCERS = {
+    'text': _coerce_text,
+    'number': _coerce_number,
+    'date': _coerce_date,
+    'select': _coerce_select,
+}
+
+
+class CompiledField:
+    __slots__ = ('id', 'key', 'label', 'field_type', 'required', 'options', 'option_set', 'coerce')
+
+    def __init__(self, field):
+        self.id = field.id
+        self.key = str(field.id)
+        self.label = field.label
+        self.field_type = field.field_type if field.field_type in FIELD_TYPES else 'text'
+        self.required = field.required
+        self.options = [str(o) for o in (field.options or [])]
+        self.option_set = frozenset(self.options)
+        self.coerce = _COERCERS[self.field_type]
+
+    def to_json(self, form_id):
+        return {
+            "id": self.id, "form_id": form_id, "label": self.label, "field_type": self.field_type,
+            "required": self.required, "options": self.options,
+        }
+
+
+class CompiledForm:
+    __slots__ = ('id', 'workspace_id', 'version', 'name', 'projected', 'fields', 'json')
+
+    def __init__(self, form, fields):
+        self.id = form.id
+        self.workspace_id = form.workspace_id
+        self.version = form.schema_version
+        self.name = form.name
+        self.projected = form.projected
+        self.fields = tuple(CompiledField(f) for f in fields)
+        self.json = {
+            "id": form.id, "name": form.name, "description": form.description or "",
+            "workspace_id": form.workspace_id, "created_at": form.created_at.isoformat(),
+            "fields": [f.to_json(form.id) for f in self.fields],
+        }
+
+    def field(self, field_id):
+        for field in self.fields:
+            if field.key == str(field_id):
+                return field
+        return None
+
+    def clean(self, data):
+        """Validate ``{field_id: value}`` and return it with values coerced by field type.
+
+        Empty values of optional fields are dropped. Raises ``EntryInvalid``.
+        """
+        if not isinstance(data, dict):
+            raise EntryInvalid({"data": "must be an object"})
+        errors = {}
+        cleaned = {}
+        for field in self.fields:
+            value = data.get(field.key, data.get(field.id))
+            if value is None or (isinstance(value, str) and not value.strip()):
+                if field.required:
+                    errors[field.key] = f"{field.label} is required"
+                continue
+            try:
+                cleaned[field.key] = field.coerce(value, field)
+            except ValueError as e:
+                errors[field.key] = f"{field.label} {e}"
+        known = {f.key for f in self.fields}
+        for key in data:
+            if str(key) not in known:
+                errors[str(key)] = "unknown field"
+        if errors:
+            raise EntryInvalid(errors)
+        return cleaned
+
+
+def clean_entries(form, items):
+    """``form.clean`` every item of a batch; raises ``EntryInvalid`` keyed by item index."""
+    if not isinstance(items, list):
+        raise EntryInvalid({"entries": "must be a list"})
+    cleaned, errors = [], {}
+    for index, data in enumerate(items):
+        try:
+            cleaned.append(form.clean(data))
+        except EntryInvalid as e:
+            errors[str(index)] = e.errors
+    if errors:
+        index, field_errors = next(iter(errors.items()))
+        raise EntryInvalid(errors, f"Entry {index}: {next(iter(field_errors.values()))}")
+    return cleaned
+
+
+def _remember(compiled):
+    with _lock:
+        _cache[(compiled.id, compiled.version)] = compiled
+        _cache.move_to_end((compiled.id, compiled.version))
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _cached(form):
+    with _lock:
+        return _cache.get((form.id, form.schema_version))
+
+
+def compile_forms(forms):
+    """``CompiledForm`` for each ``ExpenseForm`` in ``forms``, in order, fetching fields for cache misses in one query."""
+    forms = list(forms)
+    compiled = {f.id: _cached(f) for f in forms}
+    missing = [f for f in forms if compiled[f.id] is None]
+    if missing:
+        by_form = defaultdict(list)
+        for field in ExpenseField.objects.filter(form_id__in=[f.id for f in missing]).order_by('id'):
+            by_form[field.form_id].append(field)
+        for form in missing:
+            compiled[form.id] = CompiledForm(form, by_form[form.id])
+            _remember(compiled[form.id])
+    return [compiled[f.id] for f in forms]
+
+
+def get_compiled_form(form_id):
+    """The compiled schema for ``form_id`` or None; costs one query when cached."""
+    form = ExpenseForm.objects.filter(id=form_id).first()
+    if not form:
+        return None
+    return compile_forms([form])[0]
+
+
+def workspace_forms(workspace_id):
+    return compile_forms(ExpenseForm.objects.filter(workspace_id=workspace_id).order_by('name'))
+
+
+def bump_schema_version(form_id):
+    """Call after adding, changing or removing any of the form's fields (or toggling ``projected``)."""
+    ExpenseForm.objects.filter(id=form_id).update(schema_version=F('schema_version') + 1)
+
+
+def validate_field_definitions(fields):
+    """Check field definitions posted when creating a form; returns an error message or None."""
+    if not isinstance(fields, list):
+        return "fields must be a list"
+    for field in fields:
+        if not isinstance(field, dict):
+            return "each field must be an object"
+        field_type = field.get("field_type") or "text"
+        if field_type not in FIELD_TYPES:
+            return f"field_type must be one of {', '.join(FIELD_TYPES)}"
+        if field_type == 'select':
+            options = field.get("options")
+            if not isinstance(options, list) or not [o for o in options if str(o).strip()]:
+                return "select fields need a non-empty options list"
+    return None
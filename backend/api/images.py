@@ -0,0 +1,119 @@
+"""Profile photo processing.
+
+Uploads are validated from the image header before any pixels are decoded, then
+normalized (EXIF orientation applied, metadata dropped, center-cropped to a
+fixed square) and stored as a WebP for the UI and a JPEG for PDF reports. Both
+variants are named after the sha256 of the JPEG, so re-uploading the same photo
+costs nothing and unchanged photos keep their report cache entries.
+
+Pillow is imported on first use so web workers don't pay for it at boot.
+"""
+import hashlib
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+PHOTO_DIR = 'profile_photos'
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+
+class ImageRejected(ValueError):
+    """The upload is not an acceptable image; the message is safe to show to the user."""
+
+
+def variant_name(photo_hash, ext):
+    return f"{PHOTO_DIR}/{photo_hash[:2]}/{photo_hash}.{ext}"
+
+
+def _encode(img, fmt, **options):
+    out = BytesIO()
+    img.save(out, fmt, **options)
+    return out.getvalue()
+
+
+def make_thumbnails(fileobj, size=None):
+    """Decode ``fileobj`` and return ``(photo_hash, jpeg_bytes, webp_bytes)``.
+
+    Raises ``ImageRejected`` for unsupported formats and oversized dimensions.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    size = size or settings.PROFILE_THUMBNAIL_SIZE
+    try:
+        img = Image.open(fileobj)
+    except Image.DecompressionBombError:
+        # Pillow refuses headers claiming more than twice its own pixel limit before we get to check ours.
+        raise ImageRejected("Photo dimensions are too large")
+    except (UnidentifiedImageError, OSError):
+        raise ImageRejected("File is not a supported image")
+    if img.format not in ALLOWED_FORMATS:
+        raise ImageRejected("Photo must be a JPEG, PNG, WebP or GIF image")
+    # Image.open only parsed the header, so this check happens before any decoding.
+    width, height = img.size
+    if width * height > settings.PROFILE_PHOTO_MAX_PIXELS:
+        raise ImageRejected("Photo dimensions are too large")
+    if img.format == 'JPEG':
+        # Let the JPEG decoder downscale by a power of two while decoding.
+        img.draft('RGB', (size * 2, size * 2))
+    try:
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+        else:
+            img = img.convert('RGB')
+        img = ImageOps.fit(img, (size, size), method=Image.Resampling.LANCZOS)
+    except (OSError, Image.DecompressionBombError):
+        raise ImageRejected("Photo could not be decoded")
+    # Re-encoding from pixels drops EXIF (GPS, camera serials), ICC and text chunks.
+    jpeg = _encode(img, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    webp = _encode(img, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return hashlib.sha256(jpeg).hexdigest(), jpeg, webp
+
+
+def _save(name, data):
+    if not default_storage.exists(name):
+        saved = default_storage.save(name, ContentFile(data))
+        if saved != name:
+            default_storage.delete(saved)
+
+
+def save_thumbnails(photo_hash, jpeg, webp):
+    """Store both variants; returns ``(jpeg_name, webp_name)``."""
+    names = variant_name(photo_hash, 'jpg'), variant_name(photo_hash, 'webp')
+    _save(names[0], jpeg)
+    _save(names[1], webp)
+    return names
+
+
+def release_photo(user_model, photo_hash):
+    """Delete a photo's stored variants unless another user still uses them."""
+    if not photo_hash or user_model.objects.filter(profile_photo_hash=photo_hash).exists():
+        return
+    for ext in ('jpg', 'webp'):
+        default_storage.delete(variant_name(photo_hash, ext))
+
+
+def set_profile_photo(user, fileobj):
+    """Process an upload (or any readable image file) and make it ``user``'s photo."""
+    photo_hash, jpeg, webp = make_thumbnails(fileobj)
+    if photo_hash == user.profile_photo_hash:
+        return user
+    old_hash, old_name = user.profile_photo_hash, user.profile_photo.name if user.profile_photo else ''
+    jpeg_name, webp_name = save_thumbnails(photo_hash, jpeg, webp)
+    user.profile_photo.name = jpeg_name
+    user.profile_thumbnail.name = webp_name
+    user.profile_photo_hash = photo_hash
+    user.save(update_fields=['profile_photo', 'profile_thumbnail', 'profile_photo_hash'])
+    if old_hash:
+        release_photo(type(user), old_hash)
+    elif old_name:
+        # Unprocessed upload from before thumbnails existed.
+        default_storage.delete(old_name)
+    return user
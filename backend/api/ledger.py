@@ -0,0 +1,150 @@
+"""Bookkeeping that must run whenever transactions are written or deleted.
+
+Every code path that inserts or removes ``Transaction`` rows (single-row views,
+bulk jobs, purges) reports the change here, so derived state stays consistent
+without each caller knowing what depends on the ledger.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Sum
+
+from .budgets import apply_budget_deltas
+from .category_stats import apply_stats_deltas
+from .models import MonthlyDataVersion, MonthlyRollup
+
+
+# Above this many keys, rollups and versions are written with a few set-based statements.
+BULK_KEYS = 50
+
+
+def _chunks(items, size):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _months(transactions):
+    """Distinct ``(user_id, year, month)`` keys touched by ``transactions``."""
+    return {(t.user_id, t.date.year, t.date.month) for t in transactions}
+
+
+def _bump_data_versions_bulk(keys):
+    """Insert missing rows at version 0, then one UPDATE per month and chunk of users."""
+    MonthlyDataVersion.objects.bulk_create(
+        [MonthlyDataVersion(user_id=u, year=y, month=m, version=0) for u, y, m in keys],
+        batch_size=1000, ignore_conflicts=True,
+    )
+    by_month = defaultdict(list)
+    for user_id, year, month in keys:
+        by_month[(year, month)].append(user_id)
+    for (year, month), user_ids in by_month.items():
+        for chunk in _chunks(user_ids, 500):
+            MonthlyDataVersion.objects.filter(year=year, month=month, user_id__in=chunk).update(
+                version=F('version') + 1,
+            )
+
+
+def bump_data_versions(keys):
+    keys = list(keys)
+    if len(keys) > BULK_KEYS:
+        _bump_data_versions_bulk(keys)
+        return
+    for user_id, year, month in keys:
+        updated = MonthlyDataVersion.objects.filter(user_id=user_id, year=year, month=month).update(
+            version=F('version') + 1,
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                MonthlyDataVersion.objects.create(user_id=user_id, year=year, month=month, version=1)
+        except IntegrityError:
+            # Another request created the row first; count our change on top of it.
+            MonthlyDataVersion.objects.filter(user_id=user_id, year=year, month=month).update(
+                version=F('version') + 1,
+            )
+
+
+def data_version(user_id, year, month):
+    return MonthlyDataVersion.objects.filter(
+        user_id=user_id, year=year, month=month,
+    ).values_list('version', flat=True).first() or 0
+
+
+def user_data_version(user_id):
+    """A number that grows whenever any of the user's transactions change (sum of their month versions)."""
+    return MonthlyDataVersion.objects.filter(user_id=user_id).aggregate(v=Sum('version'))['v'] or 0
+
+
+def apply_rollup_deltas(transactions, sign):
+    """Add (sign=1) or subtract (sign=-1) transactions from the monthly rollups."""
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for t in transactions:
+        key = (t.user_id, t.date.year, t.date.month, t.type, t.category)
+        deltas[key][0] += Decimal(str(t.amount)) * sign
+        deltas[key][1] += sign
+    if len(deltas) > BULK_KEYS:
+        _apply_rollup_deltas_bulk(deltas)
+        return
+    for (user_id, year, month, tx_type, category), (amount, count) in deltas.items():
+        lookup = dict(user_id=user_id, year=year, month=month, type=tx_type, category=category)
+        updated = MonthlyRollup.objects.filter(**lookup).update(
+            total=F('total') + amount, count=F('count') + count,
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                MonthlyRollup.objects.create(total=amount, count=count, **lookup)
+        except IntegrityError:
+            MonthlyRollup.objects.filter(**lookup).update(total=F('total') + amount, count=F('count') + count)
+
+
+def _apply_rollup_deltas_bulk(deltas):
+    """Insert missing rollup rows empty, then add every delta with one prepared UPDATE run per key.
+
+    ``executemany`` keeps the per-key cost at the driver level; building the
+    same statement through the ORM costs far more in Python than in the database.
+    """
+    MonthlyRollup.objects.bulk_create(
+        [
+            MonthlyRollup(user_id=u, year=y, month=m, type=t, category=c, total=0, count=0)
+            for u, y, m, t, c in deltas
+        ],
+        batch_size=1000, ignore_conflicts=True,
+    )
+    q = connection.ops.quote_name
+    total, count = q('total'), q('count')
+    where = ' AND '.join(f"{q(c)} = %s" for c in ('user_id', 'year', 'month', 'type', 'category'))
+    sql = (
+        f"UPDATE {q(MonthlyRollup._meta.db_table)} SET {total} = {total} + %s, {count} = {count} + %s WHERE {where}"
+    )
+    params = [(amount, count, *key) for key, (amount, count) in deltas.items()]
+    with connection.cursor() as cursor:
+        for chunk in _chunks(params, 1000):
+            cursor.executemany(sql, chunk)
+
+
+def _changed(transactions, sign):
+    from .report_cache import invalidate_months
+
+    keys = _months(transactions)
+    if not keys:
+        return
+    apply_rollup_deltas(transactions, sign)
+    apply_budget_deltas(transactions, sign)
+    apply_stats_deltas(transactions, sign)
+    bump_data_versions(keys)
+    invalidate_months(keys)
+
+
+def record_created(transactions):
+    """Call after inserting transactions (single ``create`` or ``bulk_create``)."""
+    _changed(list(transactions), 1)
+
+
+def record_deleted(transactions):
+    """Call after deleting transactions; pass the instances as they were before deletion."""
+    _changed(list(transactions), -1)
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.form_analytics import set_projection
+from api.models import ExpenseForm
+
+
+class Command(BaseCommand):
+    help = "Enable (and backfill) or disable the typed analytics projection of an expense form's entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('form_id', type=int)
+        parser.add_argument('--disable', action='store_true', help='Drop the projection and go back to JSON paths.')
+
+    def handle(self, *args, **options):
+        if not ExpenseForm.objects.filter(id=options['form_id']).exists():
+            raise CommandError(f"Form {options['form_id']} does not exist")
+        started = time.monotonic()
+        written = set_projection(options['form_id'], enabled=not options['disable'])
+        state = 'disabled' if options['disable'] else f'enabled, {written} value row(s) written'
+        self.stdout.write(self.style.SUCCESS(f"Projection {state} in {time.monotonic() - started:.1f}s."))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.batch_reports import generate_month
+
+
+class Command(BaseCommand):
+    help = "Build every approved user's monthly PDF report in parallel. Safe to re-run: finished reports are skipped and interrupted ones resumed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, required=True)
+        parser.add_argument('--month', type=int, required=True)
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: CPU count).')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Limit to these user ids (repeatable).')
+        parser.add_argument('--force', action='store_true', help='Rebuild reports that are already done.')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['month'] <= 12:
+            raise CommandError('--month must be between 1 and 12')
+        started = time.monotonic()
+        stats = generate_month(
+            options['year'], options['month'],
+            workers=options['workers'],
+            user_ids=options['user_ids'],
+            force=options['force'],
+            log=self.stdout.write,
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {elapsed:.1f}s: {stats['rendered']} rendered, {stats['cached']} from cache, "
+            f"{stats['skipped']} already done, {stats['failed']} failed ({stats['resumed']} resumed from an interrupted run)."
+        ))
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# What a web worker imports while booting: settings, apps, the WSGI handler
+# (which instantiates every middleware) and the URLconf (which imports every view).
+BOOT_SCRIPT = """
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+import {urlconf}
+{extra}
+"""
+
+
+def parse_importtime(stderr):
+    """Parse ``python -X importtime`` output into ``[(module, self_us, cumulative_us)]``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Profile per-module import cost of a cold worker boot (python -X importtime)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Number of modules to list.')
+        parser.add_argument('--import', dest='extra', action='append', default=[],
+                            help='Extra module to import after boot (repeatable), e.g. api.pdf_reports.')
+
+    def handle(self, *args, **options):
+        script = BOOT_SCRIPT.format(
+            urlconf=settings.ROOT_URLCONF,
+            extra='\n'.join(f'import {name}' for name in options['extra']),
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'))
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if proc.returncode != 0:
+            self.stderr.write(proc.stderr[-2000:])
+            return
+        rows = parse_importtime(proc.stderr)
+        total_us = sum(self_us for _, self_us, _ in rows)
+
+        self.stdout.write(f"Total import time: {total_us / 1000:.1f} ms across {len(rows)} modules\n")
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:options['top']]:
+            self.stdout.write(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+        by_package = defaultdict(int)
+        for name, self_us, _ in rows:
+            by_package[name.split('.')[0]] += self_us
+        self.stdout.write("\nSelf time by top-level package:")
+        for package, self_us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:15]:
+            self.stdout.write(f"{self_us / 1000:>14.1f} ms  {package}")
+
+        for heavy in ('reportlab', 'openpyxl', 'PIL', 'numpy'):
+            loaded = heavy in by_package
+            self.stdout.write(f"{heavy}: {'imported at boot' if loaded else 'not imported at boot'}")
@@ -0,0 +1,21 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.recurring import BATCH_SIZE, materialize_due
+
+
+class Command(BaseCommand):
+    help = "Create the transactions of every due recurring rule (safe to rerun; run daily from a scheduler)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Materialize as of this day (YYYY-MM-DD, default today).')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rules per batch / database transaction.')
+
+    def handle(self, *args, **options):
+        try:
+            today = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError("--date must be YYYY-MM-DD")
+        rules, created = materialize_due(today, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {rules} due rule(s), created {created} transaction(s)."))
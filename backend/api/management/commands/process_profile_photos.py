@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.images import ImageRejected, set_profile_photo
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = "Convert profile photos uploaded before thumbnails existed into the stored WebP/JPEG variants."
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        users = User.objects.filter(profile_photo_hash='').exclude(profile_photo='').exclude(profile_photo__isnull=True)
+        for user in users.iterator():
+            try:
+                with user.profile_photo.open('rb') as f:
+                    set_profile_photo(user, f)
+                done += 1
+            except (ImageRejected, OSError) as e:
+                self.stderr.write(f"User {user.id}: {e}")
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} photo(s), {failed} failed."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.workspace_purge import CHUNK_SIZE, PAUSE_SECONDS, run_worker
+
+
+class Command(BaseCommand):
+    help = "Delete the data of soft-deleted workspaces (PurgeJob rows) in throttled chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty instead of polling.')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=PAUSE_SECONDS, help='Seconds to sleep between chunks.')
+
+    def handle(self, *args, **options):
+        processed = run_worker(
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} purge job(s)."))
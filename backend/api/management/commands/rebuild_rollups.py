@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.range_reports import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the monthly rollups used by range reports from the transactions table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids', help='Limit to these user ids (repeatable).')
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups(user_ids=options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rollup row(s)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.user_directory import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recount users per role, status and locked state into the admin directory counters."
+
+    def handle(self, *args, **options):
+        count = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} counter row(s)."))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from api.workspace_purge import (
+    CHUNK_SIZE, PAUSE_SECONDS, delete_in_chunks, detach_in_chunks, enqueue_purge, orphan_querysets, orphan_transactions,
+    unpurged_workspaces,
+)
+
+
+class Command(BaseCommand):
+    help = "Clean up rows left behind by deleted workspaces and forms, and queue purges that never ran."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=PAUSE_SECONDS, help='Seconds to sleep between chunks.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        for name, qs in orphan_querysets():
+            if dry_run:
+                self.stdout.write(f"{name}: {qs.count()} orphan(s)")
+                continue
+            deleted = sum(delete_in_chunks(qs, options['chunk_size'], options['pause']))
+            self.stdout.write(f"{name}: deleted {deleted}")
+        if dry_run:
+            self.stdout.write(f"transactions: {orphan_transactions().count()} to detach from missing workspaces")
+        else:
+            detached = sum(detach_in_chunks(orphan_transactions(), options['chunk_size'], options['pause']))
+            self.stdout.write(f"transactions: detached {detached} from missing workspaces")
+        pending = list(unpurged_workspaces().values_list('id', flat=True))
+        if dry_run:
+            self.stdout.write(f"deleted workspaces without a purge job: {len(pending)}")
+            return
+        for workspace_id in pending:
+            enqueue_purge(workspace_id)
+        self.stdout.write(self.style.SUCCESS(f"Queued {len(pending)} purge job(s)."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.report_jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = "Render queued PDF reports (Report rows with status=queued)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty instead of polling.')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Stop after processing this many jobs.')
+
+    def handle(self, *args, **options):
+        processed = run_worker(
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+            max_jobs=options['max_jobs'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} report job(s)."))
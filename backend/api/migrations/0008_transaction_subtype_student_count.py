@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_transaction_delete_expense_delete_income_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='student_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='subtype',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user_id', 'type', 'subtype', 'date'], name='transaction_user_id_11776f_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def _to_int(value):
+    try:
+        return max(int(value or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def backfill_income_columns(apps, schema_editor):
+    """Copy subtype/student_count out of metadata in id-ordered batches."""
+    Transaction = apps.get_model('api', 'Transaction')
+    qs = Transaction.objects.filter(type='INCOME').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(qs.filter(id__gt=last_id).only('id', 'metadata')[:BATCH_SIZE])
+        if not batch:
+            break
+        changed = []
+        for tx in batch:
+            meta = tx.metadata or {}
+            subtype = str(meta.get('subtype') or '')[:100]
+            student_count = _to_int(meta.get('student_count'))
+            if subtype or student_count:
+                tx.subtype = subtype
+                tx.student_count = student_count
+                changed.append(tx)
+        if changed:
+            Transaction.objects.bulk_update(changed, ['subtype', 'student_count'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_transaction_subtype_student_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_income_columns, migrations.RunPython.noop),
+    ]
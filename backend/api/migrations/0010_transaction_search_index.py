@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from api.search import ensure_search_index
+    ensure_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from api.search import drop_search_index
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_backfill_transaction_subtype_student_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+
+def mark_existing_reports_done(apps, schema_editor):
+    # Rows written before reports became jobs already have a rendered file.
+    Report = apps.get_model('api', 'Report')
+    Report.objects.exclude(file_path='').update(status='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_transaction_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='file_path',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['status', 'created_at'], name='reports_status_19e159_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['user_id', 'year', 'month'], name='reports_user_id_aae5a1_idx'),
+        ),
+        migrations.RunPython(mark_existing_reports_done, migrations.RunPython.noop),
+    ]
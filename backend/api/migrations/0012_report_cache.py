@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_report_job_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField()),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('data_version', models.IntegerField()),
+                ('template_version', models.IntegerField()),
+                ('photo_hash', models.CharField(blank=True, max_length=64)),
+                ('content_hash', models.CharField(db_index=True, max_length=64)),
+                ('size', models.IntegerField(default=0)),
+                ('summary_data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'report_cache_entries',
+                'unique_together': {('user_id', 'year', 'month', 'data_version', 'template_version', 'photo_hash')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyDataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField()),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('version', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'monthly_data_versions',
+                'unique_together': {('user_id', 'year', 'month')},
+            },
+        ),
+    ]
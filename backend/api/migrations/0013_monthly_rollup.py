@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_report_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField()),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('type', models.CharField(max_length=10)),
+                ('category', models.CharField(max_length=255)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'monthly_rollups',
+                'unique_together': {('user_id', 'year', 'month', 'type', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+BATCH_SIZE = 1000
+
+
+def backfill_rollups(apps, schema_editor):
+    Transaction = apps.get_model('api', 'Transaction')
+    MonthlyRollup = apps.get_model('api', 'MonthlyRollup')
+    grouped = (
+        Transaction.objects.order_by()
+        .annotate(y=ExtractYear('date'), m=ExtractMonth('date'))
+        .values('user_id', 'y', 'm', 'type', 'category')
+        .annotate(total=Sum('amount'), n=Count('id'))
+    )
+    batch = []
+    for row in grouped.iterator():
+        batch.append(MonthlyRollup(
+            user_id=row['user_id'], year=row['y'], month=row['m'], type=row['type'],
+            category=row['category'], total=row['total'] or 0, count=row['n'],
+        ))
+        if len(batch) >= BATCH_SIZE:
+            MonthlyRollup.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        MonthlyRollup.objects.bulk_create(batch)
+
+
+def clear_rollups(apps, schema_editor):
+    apps.get_model('api', 'MonthlyRollup').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_monthly_rollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, clear_rollups),
+    ]
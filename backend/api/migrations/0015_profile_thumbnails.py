@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_backfill_monthly_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_photo_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_photos/'),
+        ),
+    ]
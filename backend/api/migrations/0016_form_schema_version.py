@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_profile_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expenseform',
+            name='schema_version',
+            field=models.IntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_form_schema_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expenseform',
+            name='projected',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='ExpenseEntryValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_id', models.IntegerField()),
+                ('form_id', models.IntegerField()),
+                ('field_id', models.IntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('num_value', models.FloatField(blank=True, null=True)),
+                ('text_value', models.CharField(blank=True, max_length=255, null=True)),
+            ],
+            options={
+                'db_table': 'expense_entry_values',
+                'indexes': [models.Index(fields=['form_id', 'field_id', 'created_at'], name='entry_values_form_field_idx')],
+                'unique_together': {('entry_id', 'field_id')},
+            },
+        ),
+    ]
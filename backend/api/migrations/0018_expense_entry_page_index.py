@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_expense_entry_values'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expenseentry',
+            index=models.Index(fields=['form_id', 'created_at', 'id'], name='expense_entries_page_idx'),
+        ),
+    ]
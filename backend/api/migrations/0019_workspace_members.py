@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_expense_entry_page_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='acl_version',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.CreateModel(
+            name='WorkspaceMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('workspace_id', models.IntegerField()),
+                ('user_id', models.IntegerField(db_index=True)),
+                ('role', models.CharField(choices=[('owner', 'Owner'), ('editor', 'Editor'), ('viewer', 'Viewer')], default='viewer', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'workspace_members',
+                'ordering': ['created_at'],
+                'unique_together': {('workspace_id', 'user_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def add_owner_members(apps, schema_editor):
+    Workspace = apps.get_model('api', 'Workspace')
+    WorkspaceMember = apps.get_model('api', 'WorkspaceMember')
+    batch = []
+    for workspace_id, owner_id in Workspace.objects.values_list('id', 'owner_id').iterator():
+        batch.append(WorkspaceMember(workspace_id=workspace_id, user_id=owner_id, role='owner'))
+        if len(batch) >= BATCH_SIZE:
+            WorkspaceMember.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        WorkspaceMember.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def remove_members(apps, schema_editor):
+    apps.get_model('api', 'WorkspaceMember').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_workspace_members'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_owner_members, remove_members),
+    ]
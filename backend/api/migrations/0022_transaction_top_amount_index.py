@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_workspace_purge'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user_id', 'type', 'amount'], name='transactions_top_amount_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:11
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_transaction_top_amount_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField(db_index=True)),
+                ('workspace_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('category', models.CharField(blank=True, max_length=255)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('thresholds', models.JSONField(default=api.models.default_budget_thresholds)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'budgets',
+            },
+        ),
+        migrations.CreateModel(
+            name='BudgetUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('budget_id', models.IntegerField()),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('spent', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('alert_level', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'budget_usage',
+                'unique_together': {('budget_id', 'year', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_budgets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField(db_index=True)),
+                ('workspace_id', models.IntegerField(blank=True, null=True)),
+                ('type', models.CharField(choices=[('INCOME', 'Income'), ('EXPENSE', 'Expense')], max_length=10)),
+                ('category', models.CharField(max_length=255)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('description', models.TextField(blank=True)),
+                ('subtype', models.CharField(blank=True, default='', max_length=100)),
+                ('frequency', models.CharField(choices=[('monthly', 'Monthly'), ('weekly', 'Weekly')], default='monthly', max_length=10)),
+                ('interval', models.IntegerField(default=1)),
+                ('day_of_month', models.IntegerField(blank=True, null=True)),
+                ('weekday', models.IntegerField(blank=True, null=True)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('next_run', models.DateField(db_index=True)),
+                ('active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'recurring_rules',
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
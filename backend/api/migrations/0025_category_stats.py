@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_recurring_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=32)),
+                ('type', models.CharField(max_length=10)),
+                ('category', models.CharField(max_length=255)),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('total_sq', models.FloatField(default=0)),
+                ('version', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'category_stats',
+                'unique_together': {('scope', 'type', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations
+from django.db.models import Count, FloatField, Sum
+from django.db.models.functions import Cast
+
+BATCH_SIZE = 1000
+
+
+def backfill_category_stats(apps, schema_editor):
+    Transaction = apps.get_model('api', 'Transaction')
+    CategoryStats = apps.get_model('api', 'CategoryStats')
+    amount = Cast('amount', FloatField())
+    aggregates = dict(n=Count('id'), total=Sum(amount), total_sq=Sum(amount * amount))
+    sources = [
+        ('u', 'user_id', Transaction.objects.order_by()),
+        ('w', 'workspace_id', Transaction.objects.order_by().filter(workspace_id__isnull=False)),
+    ]
+    batch = []
+    for prefix, column, qs in sources:
+        for row in qs.values(column, 'type', 'category').annotate(**aggregates).iterator():
+            batch.append(CategoryStats(
+                scope=f"{prefix}:{row[column]}", type=row['type'], category=row['category'],
+                count=row['n'], total=row['total'] or 0, total_sq=row['total_sq'] or 0, version=1,
+            ))
+            if len(batch) >= BATCH_SIZE:
+                CategoryStats.objects.bulk_create(batch)
+                batch = []
+    if batch:
+        CategoryStats.objects.bulk_create(batch)
+
+
+def clear_category_stats(apps, schema_editor):
+    apps.get_model('api', 'CategoryStats').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_category_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_category_stats, clear_category_stats),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:31
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_backfill_category_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('is_locked', models.BooleanField(default=False)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'user_counters',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='api_user_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('full_name'), name='api_user_name_lower_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='usercounter',
+            unique_together={('role', 'status', 'is_locked')},
+        ),
+    ]
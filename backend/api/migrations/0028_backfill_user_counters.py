@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_user_counters(apps, schema_editor):
+    User = apps.get_model('api', 'User')
+    UserCounter = apps.get_model('api', 'UserCounter')
+    rows = User.objects.order_by().values('role', 'status', 'is_locked').annotate(n=Count('id'))
+    UserCounter.objects.bulk_create([
+        UserCounter(role=r['role'], status=r['status'], is_locked=r['is_locked'], count=r['n']) for r in rows
+    ])
+
+
+def clear_user_counters(apps, schema_editor):
+    apps.get_model('api', 'UserCounter').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_user_directory'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_counters, clear_user_counters),
+    ]
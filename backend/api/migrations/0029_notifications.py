@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_backfill_user_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField(unique=True)),
+                ('unread', models.IntegerField(default=0)),
+                ('last_id', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'notification_counters',
+            },
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField()),
+                ('kind', models.CharField(max_length=20)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField(blank=True)),
+                ('activity_id', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'notifications',
+                'indexes': [models.Index(fields=['user_id', 'id'], name='notifications_user_id_idx'), models.Index(condition=models.Q(('read_at__isnull', True)), fields=['user_id', 'id'], name='notifications_unread_idx')],
+            },
+        ),
+    ]
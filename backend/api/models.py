@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.db.models.functions import Lower
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **kwargs):
@@ -30,11 +31,19 @@ class User(AbstractUser):
     role = models.CharField(max_length=20, default='user')  # super_admin, admin, user
     status = models.CharField(max_length=20, default='pending')
     token_version = models.IntegerField(default=1)
+    acl_version = models.IntegerField(default=1)  # bumped when the user's workspace memberships change
     is_locked = models.BooleanField(default=False)
-    profile_photo = models.ImageField(upload_to='profile_photos/', null=True, blank=True)
+    profile_photo = models.ImageField(upload_to='profile_photos/', null=True, blank=True)  # JPEG variant, used in reports
+    profile_thumbnail = models.ImageField(upload_to='profile_photos/', null=True, blank=True)  # WebP variant, used by the UI
+    profile_photo_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
 
     class Meta:
         db_table = 'api_user'
+        indexes = [
+            # Admin directory prefix search and sort (see ``user_directory``).
+            models.Index(Lower('email'), name='api_user_email_lower_idx'),
+            models.Index(Lower('full_name'), name='api_user_name_lower_idx'),
+        ]
 
     def __str__(self):
         return self.email
@@ -142,16 +151,74 @@ class Workspace(models.Model):
     slug = models.SlugField(max_length=255, unique=True)
     owner_id = models.IntegerField(db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)  # set on delete; rows purged by PurgeJob
 
     class Meta:
         db_table = 'workspaces'
         ordering = ['name']
 
 
+class PurgeJob(models.Model):
+    """Background removal of a soft-deleted workspace and everything that references it (see ``workspace_purge``)."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    workspace_id = models.IntegerField(db_index=True)
+    requested_by = models.IntegerField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress = models.JSONField(default=dict, blank=True)  # {step: rows deleted}
+    deleted_count = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # heartbeat: refreshed after every chunk
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'purge_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='purge_jobs_status_idx'),
+        ]
+
+
+class WorkspaceMember(models.Model):
+    """A user's role in a workspace. The creator is the first ``owner``; see ``workspace_acl``."""
+    ROLE_OWNER = 'owner'
+    ROLE_EDITOR = 'editor'
+    ROLE_VIEWER = 'viewer'
+    ROLE_CHOICES = (
+        (ROLE_OWNER, 'Owner'),
+        (ROLE_EDITOR, 'Editor'),
+        (ROLE_VIEWER, 'Viewer'),
+    )
+
+    workspace_id = models.IntegerField()
+    user_id = models.IntegerField(db_index=True)
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=ROLE_VIEWER)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'workspace_members'
+        unique_together = [('workspace_id', 'user_id')]
+        ordering = ['created_at']
+
+
 class ExpenseForm(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     workspace_id = models.IntegerField(db_index=True)
+    schema_version = models.IntegerField(default=1)  # bumped whenever the form's fields change
+    projected = models.BooleanField(default=False)  # entries mirrored into ExpenseEntryValue for analytics
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -181,6 +248,26 @@ class ExpenseEntry(models.Model):
     class Meta:
         db_table = 'expense_entries'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['form_id', 'created_at', 'id'], name='expense_entries_page_idx'),
+        ]
+
+
+class ExpenseEntryValue(models.Model):
+    """Typed, per-field copy of ExpenseEntry.data for forms with ``projected`` set (see ``form_analytics``)."""
+    entry_id = models.IntegerField()
+    form_id = models.IntegerField()
+    field_id = models.IntegerField()
+    created_at = models.DateTimeField()  # copied from the entry so date filters need no join
+    num_value = models.FloatField(null=True, blank=True)
+    text_value = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta:
+        db_table = 'expense_entry_values'
+        unique_together = [('entry_id', 'field_id')]
+        indexes = [
+            models.Index(fields=['form_id', 'field_id', 'created_at'], name='entry_values_form_field_idx'),
+        ]
 
 
 class Transaction(models.Model):
@@ -197,8 +284,13 @@ class Transaction(models.Model):
     amount = models.DecimalField(max_digits=14, decimal_places=2)
     description = models.TextField(blank=True)  # Was comment
     date = models.DateField(db_index=True)
-    # Flexible field for things like student_count, subtype, etc.
+    # Income-only attributes promoted out of metadata so they can be indexed
+    subtype = models.CharField(max_length=100, blank=True, default='')
+    student_count = models.IntegerField(default=0)
+    # Flexible field for any other per-transaction extras
     metadata = models.JSONField(default=dict, blank=True)
+    # Set for generated rows (e.g. "rule:<id>:<date>" from recurring rules) so reruns never duplicate them
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, unique=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     class Meta:
@@ -207,19 +299,218 @@ class Transaction(models.Model):
         indexes = [
             models.Index(fields=['user_id', 'date']),
             models.Index(fields=['user_id', 'type']),
+            models.Index(fields=['user_id', 'type', 'subtype', 'date']),
+            # Top-N by amount (assistant "biggest expense" questions)
+            models.Index(fields=['user_id', 'type', 'amount'], name='transactions_top_amount_idx'),
         ]
 
 
 
 class Report(models.Model):
-    """History of generated financial reports."""
+    """History of generated financial reports. Each row is also a render job for the report worker."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
     user_id = models.IntegerField(db_index=True)
     year = models.IntegerField()
     month = models.IntegerField()
-    file_path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, default=STATUS_QUEUED, choices=STATUS_CHOICES)
+    file_path = models.CharField(max_length=500, blank=True, default='')  # storage name, set once rendered
     summary_data = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = 'reports'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['user_id', 'year', 'month']),
+        ]
+
+
+class MonthlyDataVersion(models.Model):
+    """Monotonic change counter per (user, month); bumped whenever that month's transactions change."""
+    user_id = models.IntegerField()
+    year = models.IntegerField()
+    month = models.IntegerField()
+    version = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'monthly_data_versions'
+        unique_together = [('user_id', 'year', 'month')]
+
+
+class ReportCacheEntry(models.Model):
+    """A rendered monthly PDF, keyed by everything that can change its bytes."""
+    user_id = models.IntegerField()
+    year = models.IntegerField()
+    month = models.IntegerField()
+    data_version = models.IntegerField()
+    template_version = models.IntegerField()
+    photo_hash = models.CharField(max_length=64, blank=True)
+    content_hash = models.CharField(max_length=64, db_index=True)  # sha256 of the PDF; also its storage name
+    size = models.IntegerField(default=0)
+    summary_data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'report_cache_entries'
+        unique_together = [('user_id', 'year', 'month', 'data_version', 'template_version', 'photo_hash')]
+
+
+class MonthlyRollup(models.Model):
+    """Pre-aggregated transaction totals per (user, month, type, category), maintained by ``ledger``."""
+    user_id = models.IntegerField()
+    year = models.IntegerField()
+    month = models.IntegerField()
+    type = models.CharField(max_length=10)
+    category = models.CharField(max_length=255)
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'monthly_rollups'
+        unique_together = [('user_id', 'year', 'month', 'type', 'category')]
+
+
+def default_budget_thresholds():
+    return [50, 80, 100]
+
+
+class Budget(models.Model):
+    """Monthly spending limit for a user (all their expenses) or a workspace, optionally for one category."""
+    user_id = models.IntegerField(db_index=True)  # owner; for workspace budgets, who created it
+    workspace_id = models.IntegerField(null=True, blank=True, db_index=True)
+    category = models.CharField(max_length=255, blank=True)  # '' = every category
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    thresholds = models.JSONField(default=default_budget_thresholds)  # percentages that raise an alert
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'budgets'
+
+
+class BudgetUsage(models.Model):
+    """Spend against a budget for one month, kept current by ``ledger``."""
+    budget_id = models.IntegerField()
+    year = models.IntegerField()
+    month = models.IntegerField()
+    spent = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    alert_level = models.IntegerField(default=0)  # highest threshold already alerted this month
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'budget_usage'
+        unique_together = [('budget_id', 'year', 'month')]
+
+
+class RecurringRule(models.Model):
+    """A transaction that repeats monthly (on a day of the month) or weekly (on a weekday)."""
+    FREQ_MONTHLY = 'monthly'
+    FREQ_WEEKLY = 'weekly'
+    FREQUENCY_CHOICES = (
+        (FREQ_MONTHLY, 'Monthly'),
+        (FREQ_WEEKLY, 'Weekly'),
+    )
+
+    user_id = models.IntegerField(db_index=True)
+    workspace_id = models.IntegerField(null=True, blank=True)
+    type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
+    category = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+    description = models.TextField(blank=True)
+    subtype = models.CharField(max_length=100, blank=True, default='')
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default=FREQ_MONTHLY)
+    interval = models.IntegerField(default=1)  # every N months / weeks
+    day_of_month = models.IntegerField(null=True, blank=True)  # 1-31, clamped to short months
+    weekday = models.IntegerField(null=True, blank=True)  # 0 = Monday
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_run = models.DateField(db_index=True)  # next occurrence not yet materialized
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'recurring_rules'
+
+
+class CategoryStats(models.Model):
+    """Running amount moments per scope, type and category, maintained by ``ledger``.
+
+    ``scope`` is ``u:<user_id>`` (all of a user's transactions) or
+    ``w:<workspace_id>`` (transactions tagged with a workspace). ``version`` grows
+    on every change, so a scope's summed versions key caches of derived statistics.
+    """
+    scope = models.CharField(max_length=32)
+    type = models.CharField(max_length=10)
+    category = models.CharField(max_length=255)
+    count = models.IntegerField(default=0)
+    total = models.FloatField(default=0)
+    total_sq = models.FloatField(default=0)
+    version = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'category_stats'
+        unique_together = [('scope', 'type', 'category')]
+
+
+class UserCounter(models.Model):
+    """Number of users per (role, status, locked) combination, kept current by ``user_directory``.
+
+    There are only a handful of combinations, so any per-status, per-role or
+    total count is a sum over a few rows instead of a ``COUNT(*)`` over users.
+    """
+    role = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    is_locked = models.BooleanField(default=False)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'user_counters'
+        unique_together = [('role', 'status', 'is_locked')]
+
+
+class Notification(models.Model):
+    """A user-facing notice derived from the audit log, an alert or a background job (see ``notifications``)."""
+    user_id = models.IntegerField()
+    kind = models.CharField(max_length=20)  # budget, anomaly, security, account, report
+    title = models.CharField(max_length=255)
+    message = models.TextField(blank=True)
+    activity_id = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'notifications'
+        indexes = [
+            models.Index(fields=['user_id', 'id'], name='notifications_user_id_idx'),
+            models.Index(
+                fields=['user_id', 'id'], name='notifications_unread_idx', condition=models.Q(read_at__isnull=True),
+            ),
+        ]
+
+
+class NotificationCounter(models.Model):
+    """Per-user unread count and newest notification id, maintained on write.
+
+    ``last_id`` is an upper bound hint: polls compare it with their cursor before
+    touching the notifications table.
+    """
+    user_id = models.IntegerField(unique=True)
+    unread = models.IntegerField(default=0)
+    last_id = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'notification_counters'
@@ -0,0 +1,171 @@
+"""Per-user notification feed with unread counters maintained on write.
+
+Notifications are written in two ways:
+
+* ``activity_logged`` (``post_save`` on ``ActivityLog``) turns audit entries
+  and alerts about a user into notices for that user, e.g. budget thresholds,
+  expense anomalies and security events.
+* ``notify`` is called directly for events that concern someone other than the
+  actor, e.g. an admin approving accounts or the report worker finishing.
+
+Every write also bumps the user's ``NotificationCounter`` with an ``F()`` update.
+"How many unread?" and "anything new since my cursor?" are therefore one-row
+reads. Clients keep the ``cursor`` (highest id seen) from each response and ask for
+``since=<cursor>``. ``wait_for_new`` lets them long-poll on the counter row
+instead of re-listing.
+"""
+import asyncio
+import math
+
+from asgiref.sync import sync_to_async
+from django.db.models import F, Max
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Notification, NotificationCounter
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 100
+MAX_WAIT_SECONDS = 25
+WAIT_POLL_SECONDS = 1
+# Cursors are notification ids (a BigAutoField).
+MAX_CURSOR = 2 ** 63 - 1
+
+# ActivityLog action -> (kind, title) for entries that should reach the logged user. Only actions that
+# ``AuditLoggingMiddleware`` never writes belong here (it logs e.g. every password change POST as PASSWORD_CHANGED).
+ACTIVITY_NOTICES = {
+    'BUDGET_THRESHOLD': ('budget', 'Budget threshold reached'),
+    'EXPENSE_ANOMALY': ('anomaly', 'Unusual expense recorded'),
+    'LOGIN_FAILED': ('security', 'Failed sign-in to your account'),
+}
+# Admin actions on accounts (see ``user_directory.BULK_ACTIONS``) -> (kind, title) for the affected user.
+ACCOUNT_NOTICES = {
+    'USER_APPROVE': ('account', 'Your account was approved'),
+    'USER_REJECT': ('account', 'Your account request was rejected'),
+    'USER_LOCK': ('account', 'Your account was locked'),
+    'USER_UNLOCK': ('account', 'Your account was unlocked'),
+}
+
+
+def notify(user_ids, kind, title, message='', activity_id=None):
+    """Create one notification per user and bump their counters. Returns the created rows."""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return []
+    created = Notification.objects.bulk_create([
+        Notification(user_id=user_id, kind=kind, title=title, message=message[:2000], activity_id=activity_id)
+        for user_id in user_ids
+    ])
+    # bulk_create returns ids on SQLite and PostgreSQL; fall back to a lookup elsewhere.
+    newest = max((n.id for n in created if n.id), default=None)
+    if newest is None:
+        newest = Notification.objects.aggregate(m=Max('id'))['m'] or 0
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in user_ids], ignore_conflicts=True,
+    )
+    NotificationCounter.objects.filter(user_id__in=user_ids).update(
+        unread=F('unread') + 1, last_id=Greatest(F('last_id'), newest),
+    )
+    return created
+
+
+def notify_account_action(action, user_ids, message=''):
+    if action in ACCOUNT_NOTICES:
+        notify(user_ids, *ACCOUNT_NOTICES[action], message=message)
+
+
+def activity_logged(sender, instance, created, **kwargs):
+    if not created or not instance.user_id or instance.action not in ACTIVITY_NOTICES:
+        return
+    kind, title = ACTIVITY_NOTICES[instance.action]
+    notify([instance.user_id], kind, title, instance.details or '', activity_id=instance.id)
+
+
+def parse_feed_params(params):
+    """``(since, limit, wait, unread_only)`` from ``?since=&limit=&wait=&unread=``; raises ValueError."""
+    try:
+        since = int(params["since"]) if params.get("since") else None
+        if since is not None and not 0 <= since <= MAX_CURSOR:
+            raise ValueError
+        limit = min(max(int(params.get("limit") or DEFAULT_LIMIT), 1), MAX_LIMIT)
+        wait = float(params.get("wait") or 0)
+        if not math.isfinite(wait):
+            raise ValueError
+        wait = min(max(wait, 0), MAX_WAIT_SECONDS)
+    except ValueError:
+        raise ValueError("since must be a cursor from a previous response, limit an integer and wait a number of seconds")
+    return since, limit, wait, params.get("unread") in ("1", "true")
+
+
+def counter(user_id):
+    """``(unread, last_id)`` for a user, without touching the notifications table."""
+    row = NotificationCounter.objects.filter(user_id=user_id).values_list('unread', 'last_id').first()
+    return row or (0, 0)
+
+
+def feed(user_id, since=None, limit=DEFAULT_LIMIT, unread_only=False):
+    """Newest notifications, or with ``since`` only those after that cursor (oldest first).
+
+    Returns ``{'items', 'cursor', 'has_more', 'unread'}``; pass ``cursor`` back as ``since``.
+    """
+    unread, last_id = counter(user_id)
+    qs = Notification.objects.filter(user_id=user_id)
+    if unread_only:
+        qs = qs.filter(read_at__isnull=True)
+    if since is not None:
+        if last_id <= since:
+            return {'items': [], 'cursor': since, 'has_more': False, 'unread': unread}
+        rows = list(qs.filter(id__gt=since).order_by('id')[:limit + 1])
+        items = rows[:limit]
+        cursor = items[-1].id if items else since
+    else:
+        rows = list(qs.order_by('-id')[:limit + 1])
+        items = rows[:limit]
+        cursor = max(last_id, items[0].id if items else 0)
+    return {
+        'items': [notification_to_json(n) for n in items],
+        'cursor': cursor,
+        'has_more': len(rows) > limit,
+        'unread': unread,
+    }
+
+
+async def wait_for_new(user_id, since, timeout):
+    """Sleep until the user's counter shows a notification after ``since`` or ``timeout`` passes."""
+    read_counter = sync_to_async(counter)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        _, last_id = await read_counter(user_id)
+        remaining = deadline - loop.time()
+        if last_id > since or remaining <= 0:
+            return
+        await asyncio.sleep(min(WAIT_POLL_SECONDS, remaining))
+
+
+def mark_read(user_id, ids=None, up_to=None):
+    """Mark the given ids, everything up to ``up_to``, or (neither given) everything as read.
+
+    Only rows that were unread are counted off, so repeated or concurrent calls
+    never push the counter below the true number. Returns the new unread count.
+    """
+    qs = Notification.objects.filter(user_id=user_id, read_at__isnull=True)
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+    if up_to is not None:
+        qs = qs.filter(id__lte=up_to)
+    changed = qs.update(read_at=timezone.now())
+    if changed:
+        NotificationCounter.objects.filter(user_id=user_id).update(unread=Greatest(F('unread') - changed, 0))
+    return counter(user_id)[0]
+
+
+def notification_to_json(notification):
+    return {
+        "id": notification.id,
+        "kind": notification.kind,
+        "title": notification.title,
+        "message": notification.message,
+        "created_at": notification.created_at.isoformat(),
+        "read": notification.read_at is not None,
+    }
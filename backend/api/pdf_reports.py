@@ -0,0 +1,320 @@
+"""ReportLab rendering for monthly financial reports.
+
+Only imported on demand (see ``services.generate_monthly_report_pdf``). Styles,
+table styles and page geometry are built once at import time and shared by
+every render; only the per-document frames and flowables are created per call.
+"""
+import os
+from io import BytesIO
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import (
+    BaseDocTemplate, Frame, Image, NextPageTemplate, PageTemplate, Paragraph, Spacer, Table, TableStyle,
+)
+
+PAGE_SIZE = A4
+MARGIN_LEFT = MARGIN_RIGHT = MARGIN_TOP = 72
+MARGIN_BOTTOM = 36
+FRAME_WIDTH = PAGE_SIZE[0] - MARGIN_LEFT - MARGIN_RIGHT
+FRAME_HEIGHT = PAGE_SIZE[1] - MARGIN_TOP - MARGIN_BOTTOM
+
+DETAIL_COLUMNS = ["Date", "Category", "Type", "Amount"]
+DETAIL_COL_WIDTHS = [1.2*inch, 2.4*inch, 1*inch, 1.4*inch]
+DETAIL_ROW_HEIGHT = 16
+# Rows per Table flowable. Small tables keep ReportLab's split/layout work per page
+# constant, so render time grows linearly with the number of transactions.
+DETAIL_CHUNK_ROWS = 100
+
+HEADER_BG = colors.HexColor("#f8fafc")
+HEADER_FG = colors.HexColor("#64748b")
+SUBTOTAL_BG = colors.HexColor("#eef2ff")
+
+STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle(
+    'TitleStyle',
+    parent=STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor("#374b91"),
+    alignment=1,
+    spaceAfter=30
+)
+HEADING_STYLE = ParagraphStyle(
+    'HeadingStyle',
+    parent=STYLES['Heading2'],
+    fontSize=14,
+    textColor=colors.HexColor("#2dd4bf"),
+    spaceBefore=12,
+    spaceAfter=12
+)
+BODY_STYLE = STYLES["Normal"]
+FOOTER_STYLE = STYLES["Italic"]
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#374b91")),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+])
+
+_DETAIL_BASE = [
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('INNERGRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ('BOX', (0, 0), (-1, -1), 0.25, colors.grey),
+]
+_DETAIL_HEADER = [
+    ('BACKGROUND', (0, 0), (-1, 0), HEADER_BG),
+    ('TEXTCOLOR', (0, 0), (-1, 0), HEADER_FG),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+]
+_DETAIL_SUBTOTAL = [
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, -1), (-1, -1), SUBTOTAL_BG),
+]
+# (has_header, ends_with_subtotal) -> compiled style
+DETAIL_TABLE_STYLES = {
+    (header, subtotal): TableStyle(
+        _DETAIL_BASE + (_DETAIL_HEADER if header else []) + (_DETAIL_SUBTOTAL if subtotal else [])
+    )
+    for header in (False, True)
+    for subtotal in (False, True)
+}
+
+
+class _StreamingStory(list):
+    """List facade over a flowable generator.
+
+    ``doc.build`` only ever looks at the head of the story, so flowables are pulled
+    from the generator as they are consumed instead of being materialized up front.
+    """
+
+    def __init__(self, source, lookahead=4):
+        super().__init__()
+        self._source = iter(source)
+        self._lookahead = lookahead
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._lookahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def _detail_table(rows, header):
+    data = ([DETAIL_COLUMNS] if header else []) + rows
+    table = Table(data, colWidths=DETAIL_COL_WIDTHS, rowHeights=DETAIL_ROW_HEIGHT)
+    # Subtotal rows are the only ones with an empty date cell.
+    table.setStyle(DETAIL_TABLE_STYLES[(header, bool(rows) and rows[-1][0] == "")])
+    return table
+
+
+def _detail_flowables(transactions):
+    """Detail tables for ``(date, category, type, amount)`` rows ordered by category.
+
+    Emits a subtotal row after each category and never holds more than one chunk
+    of rows in memory.
+    """
+    first = True
+    chunk = []
+    current = None
+    subtotal = 0
+    count = 0
+    for tx_date, category, tx_type, amount in transactions:
+        if category != current:
+            if current is not None:
+                chunk.append(["", f"Subtotal: {current}", f"{count} items", f"${subtotal:,.2f}"])
+            current, subtotal, count = category, 0, 0
+        subtotal += amount
+        count += 1
+        chunk.append([
+            tx_date.strftime("%Y-%m-%d"),
+            category[:40],
+            "Income" if tx_type == 'INCOME' else "Expense",
+            f"${amount:,.2f}",
+        ])
+        if len(chunk) >= DETAIL_CHUNK_ROWS:
+            yield _detail_table(chunk, header=first)
+            first, chunk = False, []
+    if current is None:
+        yield _detail_table([["No records", "-", "-", "-"]], header=True)
+        return
+    chunk.append(["", f"Subtotal: {current}", f"{count} items", f"${subtotal:,.2f}"])
+    yield _detail_table(chunk, header=first)
+
+
+def _draw_page_chrome(canvas, doc):
+    """Repeat the detail column header on continuation pages and number every page."""
+    canvas.saveState()
+    if doc.page > 1:
+        x = MARGIN_LEFT
+        y = PAGE_SIZE[1] - MARGIN_TOP - DETAIL_ROW_HEIGHT
+        canvas.setFillColor(HEADER_BG)
+        canvas.rect(x, y, sum(DETAIL_COL_WIDTHS), DETAIL_ROW_HEIGHT, stroke=0, fill=1)
+        canvas.setFillColor(HEADER_FG)
+        canvas.setFont('Helvetica-Bold', 9)
+        for label, width in zip(DETAIL_COLUMNS, DETAIL_COL_WIDTHS):
+            canvas.drawString(x + 6, y + 4, label)
+            x += width
+    canvas.setFont('Helvetica', 8)
+    canvas.setFillColor(colors.grey)
+    canvas.drawRightString(PAGE_SIZE[0] - MARGIN_RIGHT, 20, f"Page {doc.page}")
+    canvas.restoreState()
+
+
+def _page_templates():
+    # Frames carry per-build layout state, so they are cheap to make and never shared.
+    return [
+        PageTemplate(id='first', onPage=_draw_page_chrome, frames=[
+            Frame(MARGIN_LEFT, MARGIN_BOTTOM, FRAME_WIDTH, FRAME_HEIGHT, id='first'),
+        ]),
+        PageTemplate(id='later', onPage=_draw_page_chrome, frames=[
+            Frame(MARGIN_LEFT, MARGIN_BOTTOM, FRAME_WIDTH, FRAME_HEIGHT - DETAIL_ROW_HEIGHT, id='later'),
+        ]),
+    ]
+
+
+def _summary_table(total_income, total_expenses):
+    savings_rate = (total_income - total_expenses) / total_income * 100 if total_income > 0 else 0
+    table = Table([
+        ["Metric", "Value"],
+        ["Total Income", f"${total_income:,.2f}"],
+        ["Total Expenses", f"${total_expenses:,.2f}"],
+        ["Net Savings", f"${(total_income - total_expenses):,.2f}"],
+        ["Savings Rate", f"{savings_rate:.1f}%"]
+    ], colWidths=[2*inch, 2*inch])
+    table.setStyle(SUMMARY_TABLE_STYLE)
+    return table
+
+
+def generate_monthly_report_pdf(user_name, year, month, total_income, total_expenses, transactions, profile_photo_path=None, target=None):
+    """Generates a professional financial report in PDF format.
+
+    ``transactions`` is any iterable of ``(date, category, type, amount)`` tuples
+    ordered by category (e.g. a ``values_list(...).iterator()``); every row is
+    included, paginated with repeating headers and per-category subtotals.
+    Renders into ``target`` (a path or binary file object) or a new BytesIO.
+    """
+    buffer = target if target is not None else BytesIO()
+    # invariant=1 drops the creation timestamp so identical data renders identical bytes
+    doc = BaseDocTemplate(
+        buffer, pagesize=PAGE_SIZE, invariant=1,
+        leftMargin=MARGIN_LEFT, rightMargin=MARGIN_RIGHT, topMargin=MARGIN_TOP, bottomMargin=MARGIN_BOTTOM,
+    )
+    doc.addPageTemplates(_page_templates())
+
+    def story():
+        yield NextPageTemplate('later')
+        yield Paragraph("FinTrack Monthly Report", TITLE_STYLE)
+
+        month_name = datetime(year, month, 1).strftime("%B")
+        info_text = f"<b>Client:</b> {escape(user_name)}<br/><b>Reporting Period:</b> {month_name} {year}<br/><b>Status:</b> Official"
+        yield Paragraph(info_text, BODY_STYLE)
+
+        if profile_photo_path and os.path.exists(profile_photo_path):
+            try:
+                img = Image(profile_photo_path, width=1*inch, height=1*inch)
+                img.hAlign = 'RIGHT'
+                yield img
+            except Exception:
+                pass
+
+        yield Spacer(1, 20)
+        yield _summary_table(total_income, total_expenses)
+        yield Spacer(1, 30)
+
+        yield Paragraph("Detailed Transactions", HEADING_STYLE)
+        yield from _detail_flowables(transactions)
+
+        yield Spacer(1, 30)
+        yield Paragraph("Generated by FinTrack System. All rights reserved.", FOOTER_STYLE)
+
+    doc.build(_StreamingStory(story()))
+    if target is None:
+        buffer.seek(0)
+    return buffer
+
+
+def generate_range_report_pdf(user_name, report, target=None):
+    """Render a ``range_reports.range_report`` result: summary, per-period and per-category tables."""
+    buffer = target if target is not None else BytesIO()
+    doc = BaseDocTemplate(
+        buffer, pagesize=PAGE_SIZE, invariant=1,
+        leftMargin=MARGIN_LEFT, rightMargin=MARGIN_RIGHT, topMargin=MARGIN_TOP, bottomMargin=MARGIN_BOTTOM,
+    )
+    doc.addPageTemplates([PageTemplate(id='range', frames=[
+        Frame(MARGIN_LEFT, MARGIN_BOTTOM, FRAME_WIDTH, FRAME_HEIGHT, id='range'),
+    ])])
+    totals = report['totals']
+
+    period_rows = [["Period", "Income", "Expenses", "Net"]] + [
+        [b['period'], f"${b['income']:,.2f}", f"${b['expenses']:,.2f}", f"${b['net']:,.2f}"]
+        for b in report['buckets']
+    ]
+    period_table = Table(period_rows, colWidths=[1.6*inch, 1.5*inch, 1.5*inch, 1.4*inch], repeatRows=1)
+    period_table.setStyle(DETAIL_TABLE_STYLES[(True, False)])
+
+    category_rows = [["Category", "Type", "Count", "Amount"]] + [
+        [c['category'][:40], "Income" if c['type'] == 'INCOME' else "Expense", str(c['count']), f"${c['total']:,.2f}"]
+        for c in report['categories']
+    ]
+    if len(category_rows) == 1:
+        category_rows.append(["No records", "-", "-", "-"])
+    category_table = Table(category_rows, colWidths=[2.4*inch, 1.2*inch, 1*inch, 1.4*inch], repeatRows=1)
+    category_table.setStyle(DETAIL_TABLE_STYLES[(True, False)])
+
+    info_text = (
+        f"<b>Client:</b> {escape(user_name)}<br/>"
+        f"<b>Reporting Period:</b> {report['start']} to {report['end']}<br/><b>Status:</b> Official"
+    )
+    doc.build([
+        Paragraph("FinTrack Financial Report", TITLE_STYLE),
+        Paragraph(info_text, BODY_STYLE),
+        Spacer(1, 20),
+        _summary_table(totals['income'], totals['expenses']),
+        Spacer(1, 30),
+        Paragraph(f"By {report['bucket']}", HEADING_STYLE),
+        period_table,
+        Spacer(1, 20),
+        Paragraph("By category", HEADING_STYLE),
+        category_table,
+        Spacer(1, 30),
+        Paragraph("Generated by FinTrack System. All rights reserved.", FOOTER_STYLE),
+    ])
+    if target is None:
+        buffer.seek(0)
+    return buffer
+
+
+def render_report_bytes(job):
+    """Process-pool entry point: render one report from plain data and return the PDF bytes.
+
+    Takes and returns only picklable values and touches no database, so it can run
+    in a worker process without Django being set up there.
+    """
+    return generate_monthly_report_pdf(
+        user_name=job['user_name'],
+        year=job['year'], month=job['month'],
+        total_income=job['total_income'],
+        total_expenses=job['total_expenses'],
+        transactions=job['rows'],
+        profile_photo_path=job.get('photo_path'),
+    ).getvalue()
@@ -1,5 +1,6 @@
 import logging
 from functools import wraps
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
 from .auth_utils import decode_token
 from .models import User
@@ -45,6 +46,19 @@ def require_auth(view_func):
         return view_func(request, *args, **kwargs)
     return _wrapped_view
 
+def require_auth_async(view_func):
+    """``require_auth`` for ``async def`` views (the sync decorator would hide the coroutine from Django)."""
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        user = await sync_to_async(get_user_from_request)(request)
+        if not user:
+            return JsonResponse({"detail": "Authentication required"}, status=401)
+        if not user.is_active:
+             return JsonResponse({"detail": "User account is inactive"}, status=403)
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+    return _wrapped_view
+
 def require_admin(view_func):
     """Decorator to enforce Admin role."""
     @wraps(view_func)
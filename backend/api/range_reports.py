@@ -0,0 +1,196 @@
+"""Financial totals over arbitrary date ranges.
+
+Whole months are read from ``MonthlyRollup`` (one row per user, month, type and
+category), so their cost does not depend on how many transactions they hold.
+Only the partial months at either edge of the range are aggregated from raw
+``Transaction`` rows. A five-year range therefore costs about the same as one month.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import MonthlyRollup, Transaction
+
+BUCKETS = ('month', 'quarter', 'year', 'total')
+
+
+def _month_index(year, month):
+    return year * 12 + month - 1
+
+
+def _month_start(index):
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_end(index):
+    year, month = index // 12, index % 12 + 1
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _raw_rows(user_id, start, end):
+    """``(year, month, type, category, total, count)`` summed from transactions in [start, end]."""
+    rows = (
+        Transaction.objects.filter(user_id=user_id, date__gte=start, date__lte=end)
+        .order_by()
+        .annotate(y=ExtractYear('date'), m=ExtractMonth('date'))
+        .values('y', 'm', 'type', 'category')
+        .annotate(total=Sum('amount'), n=Count('id'))
+    )
+    return [(r['y'], r['m'], r['type'], r['category'], r['total'] or Decimal('0'), r['n']) for r in rows]
+
+
+def _rollup_rows(user_id, first_index, last_index):
+    """Same shape as ``_raw_rows`` for the whole months ``first_index..last_index``."""
+    rows = (
+        MonthlyRollup.objects.filter(user_id=user_id)
+        .annotate(idx=F('year') * 12 + F('month') - 1)
+        .filter(idx__gte=first_index, idx__lte=last_index)
+        .exclude(count=0)
+        .values_list('year', 'month', 'type', 'category', 'total', 'count')
+    )
+    return list(rows)
+
+
+def _rows(user_id, start, end):
+    first, last = _month_index(start.year, start.month), _month_index(end.year, end.month)
+    full_first = first if start.day == 1 else first + 1
+    full_last = last if end == _month_end(last) else last - 1
+    if full_first > full_last:
+        # No whole month inside the range: at most two partial months, read directly.
+        return _raw_rows(user_id, start, end)
+    rows = _rollup_rows(user_id, full_first, full_last)
+    if full_first != first:
+        rows += _raw_rows(user_id, start, _month_end(first))
+    if full_last != last:
+        rows += _raw_rows(user_id, _month_start(last), end)
+    return rows
+
+
+def rebuild_rollups(user_ids=None, batch_size=1000):
+    """Recompute ``MonthlyRollup`` from the ledger (all users, or only ``user_ids``). Returns the row count.
+
+    Only needed when transactions were written without going through ``ledger``
+    (raw SQL, the Django admin, a restored backup).
+    """
+    source = Transaction.objects.order_by()
+    target = MonthlyRollup.objects.all()
+    if user_ids:
+        source, target = source.filter(user_id__in=user_ids), target.filter(user_id__in=user_ids)
+    grouped = (
+        source.annotate(y=ExtractYear('date'), m=ExtractMonth('date'))
+        .values('user_id', 'y', 'm', 'type', 'category')
+        .annotate(total=Sum('amount'), n=Count('id'))
+    )
+    with transaction.atomic():
+        target.delete()
+        rows = [
+            MonthlyRollup(user_id=r['user_id'], year=r['y'], month=r['m'], type=r['type'],
+                          category=r['category'], total=r['total'] or 0, count=r['n'])
+            for r in grouped.iterator()
+        ]
+        MonthlyRollup.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def _bucket_of(bucket, year, month):
+    """Label and first/last month index of the bucket containing ``year``/``month``."""
+    index = _month_index(year, month)
+    if bucket == 'month':
+        return f"{year}-{month:02d}", index, index
+    if bucket == 'quarter':
+        q = (month - 1) // 3
+        first = _month_index(year, q * 3 + 1)
+        return f"{year}-Q{q + 1}", first, first + 2
+    if bucket == 'year':
+        return str(year), _month_index(year, 1), _month_index(year, 12)
+    return 'total', None, None
+
+
+def _empty_totals():
+    return {'income': Decimal('0'), 'expenses': Decimal('0'), 'count': 0}
+
+
+def _as_json(totals):
+    income, expenses = float(totals['income']), float(totals['expenses'])
+    return {'income': income, 'expenses': expenses, 'net': income - expenses, 'transaction_count': totals['count']}
+
+
+def range_report(user_id, start, end, bucket='month'):
+    """Income/expense totals for ``user_id`` over the inclusive range [start, end].
+
+    Returns overall ``totals``, one entry per ``bucket`` period (every period in
+    the range is listed, zero-filled, clipped to the range) and per-category totals
+    ordered by amount.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+    if end < start:
+        raise ValueError("end must not be before start")
+
+    periods = {}
+    index = _month_index(start.year, start.month)
+    last = _month_index(end.year, end.month)
+    while index <= last:
+        label, first_month, last_month = _bucket_of(bucket, index // 12, index % 12 + 1)
+        if label not in periods:
+            periods[label] = {
+                'period': label,
+                'start': start if first_month is None else max(start, _month_start(first_month)),
+                'end': end if last_month is None else min(end, _month_end(last_month)),
+                **_empty_totals(),
+            }
+        index += 1
+
+    totals = _empty_totals()
+    categories = defaultdict(lambda: {'total': Decimal('0'), 'count': 0})
+    for year, month, tx_type, category, amount, count in _rows(user_id, start, end):
+        key = 'income' if tx_type == 'INCOME' else 'expenses'
+        period = periods[_bucket_of(bucket, year, month)[0]]
+        for target in (period, totals):
+            target[key] += amount
+            target['count'] += count
+        cat = categories[(tx_type, category)]
+        cat['total'] += amount
+        cat['count'] += count
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'bucket': bucket,
+        'totals': _as_json(totals),
+        'buckets': [
+            {'period': p['period'], 'start': p['start'].isoformat(), 'end': p['end'].isoformat(), **_as_json(p)}
+            for p in periods.values()
+        ],
+        'categories': [
+            {'type': tx_type, 'category': category, 'total': float(c['total']), 'count': c['count']}
+            for (tx_type, category), c in sorted(categories.items(), key=lambda kv: kv[1]['total'], reverse=True)
+            if c['count']
+        ],
+    }
+
+
+def parse_range(params, today=None):
+    """``(start, end, bucket)`` from query params; defaults to year-to-date by month.
+
+    Raises ``ValueError`` with a user-facing message on bad input.
+    """
+    today = today or date.today()
+    try:
+        start = date.fromisoformat(params['start']) if params.get('start') else date(today.year, 1, 1)
+        end = date.fromisoformat(params['end']) if params.get('end') else today
+    except ValueError:
+        raise ValueError("start and end must be YYYY-MM-DD dates")
+    bucket = params.get('bucket') or 'month'
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+    if end < start:
+        raise ValueError("end must not be before start")
+    if end - start > timedelta(days=366 * 50):
+        raise ValueError("range is too long")
+    return start, end, bucket
@@ -0,0 +1,256 @@
+"""Recurring transactions (salaries, rent, subscriptions).
+
+A ``RecurringRule`` stores its next unmaterialized occurrence in ``next_run``.
+``materialize_due`` walks every due rule in primary-key batches; for each batch
+it builds all occurrences up to today, drops those whose idempotency key
+(``rule:<id>:<date>``) already exists, then in one database transaction
+``bulk_create``s the transactions, reports them to ``ledger`` and advances the
+rules' ``next_run``. A crash or a rerun therefore never
+duplicates an occurrence, and each batch costs a handful of queries no matter
+how many users it touches.
+"""
+import calendar
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+
+from .ledger import record_created
+from .models import RecurringRule, Transaction, WorkspaceMember
+from .workspace_acl import EDIT, ROLE_RANK
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+# Occurrences materialized per rule and run; a rule further behind catches up on the next run.
+MAX_CATCH_UP = 24
+KEY_CHUNK = 500
+# Schedules must stay clear of date.max: the next occurrence after the last allowed date still has to exist.
+MIN_DATE, MAX_DATE = date(1900, 1, 1), date(9998, 12, 31)
+
+
+def _add_months(day, months, day_of_month):
+    index = day.year * 12 + day.month - 1 + months
+    year, month = index // 12, index % 12 + 1
+    return date(year, month, min(day_of_month, calendar.monthrange(year, month)[1]))
+
+
+def first_occurrence(rule):
+    """First occurrence on or after ``rule.start_date``."""
+    start = rule.start_date
+    if rule.frequency == RecurringRule.FREQ_WEEKLY:
+        return start + timedelta(days=(rule.weekday - start.weekday()) % 7)
+    candidate = _add_months(start, 0, rule.day_of_month)
+    return candidate if candidate >= start else _add_months(start, 1, rule.day_of_month)
+
+
+def next_occurrence(rule, current):
+    if rule.frequency == RecurringRule.FREQ_WEEKLY:
+        return current + timedelta(weeks=rule.interval)
+    return _add_months(current, rule.interval, rule.day_of_month)
+
+
+def idempotency_key(rule, day):
+    return f"rule:{rule.id}:{day.isoformat()}"
+
+
+def _occurrences(rule, today):
+    """Due dates for ``rule`` up to ``today``; advances ``rule.next_run`` and ``rule.active`` in memory."""
+    days = []
+    while rule.active and rule.next_run <= today and len(days) < MAX_CATCH_UP:
+        if rule.end_date and rule.next_run > rule.end_date:
+            rule.active = False
+            break
+        days.append(rule.next_run)
+        rule.next_run = next_occurrence(rule, rule.next_run)
+    if rule.end_date and rule.next_run > rule.end_date:
+        rule.active = False
+    return days
+
+
+def _editors(rules):
+    """``(workspace_id, user_id)`` pairs of ``rules`` whose owner may still write to the workspace."""
+    pairs = {(r.workspace_id, r.user_id) for r in rules if r.workspace_id is not None}
+    if not pairs:
+        return set()
+    members = WorkspaceMember.objects.filter(
+        workspace_id__in={w for w, _ in pairs}, user_id__in={u for _, u in pairs},
+        role__in=[role for role, rank in ROLE_RANK.items() if rank >= ROLE_RANK[EDIT]],
+    ).values_list('workspace_id', 'user_id')
+    return pairs & set(members)
+
+
+def _build(rule, day, editors):
+    return Transaction(
+        user_id=rule.user_id,
+        workspace_id=rule.workspace_id if (rule.workspace_id, rule.user_id) in editors else None,
+        type=rule.type,
+        category=rule.category,
+        amount=rule.amount,
+        description=rule.description,
+        subtype=rule.subtype,
+        date=day,
+        idempotency_key=idempotency_key(rule, day),
+    )
+
+
+def _existing_keys(keys):
+    existing = set()
+    for i in range(0, len(keys), KEY_CHUNK):
+        existing.update(
+            Transaction.objects.filter(idempotency_key__in=keys[i:i + KEY_CHUNK]).values_list('idempotency_key', flat=True)
+        )
+    return existing
+
+
+def materialize_rules(rules, today):
+    """Materialize due occurrences of ``rules`` (a loaded batch). Returns the number of transactions created."""
+    editors = _editors(rules)
+    planned = []
+    for rule in rules:
+        planned.extend(_build(rule, day, editors) for day in _occurrences(rule, today))
+    existing = _existing_keys([t.idempotency_key for t in planned])
+    new = [t for t in planned if t.idempotency_key not in existing]
+    # Rules in a batch share few distinct schedules, so one UPDATE per (next_run, active) beats bulk_update's CASE.
+    advanced = defaultdict(list)
+    for rule in rules:
+        advanced[(rule.next_run, rule.active)].append(rule.id)
+    with transaction.atomic():
+        Transaction.objects.bulk_create(new, batch_size=BATCH_SIZE)
+        record_created(new)
+        for (next_run, active), ids in advanced.items():
+            RecurringRule.objects.filter(id__in=ids).update(next_run=next_run, active=active)
+    return len(new)
+
+
+def materialize_due(today=None, batch_size=BATCH_SIZE):
+    """Materialize every due occurrence of every active rule. Returns ``(rules, transactions)`` counts."""
+    today = today or date.today()
+    last_id = 0
+    rules_seen = created = 0
+    while True:
+        due = RecurringRule.objects.filter(active=True, next_run__lte=today, id__gt=last_id).order_by('id')
+        rules = list(due[:batch_size])
+        if not rules:
+            return rules_seen, created
+        try:
+            created += materialize_rules(rules, today)
+        except IntegrityError:
+            # Another run inserted some of these keys concurrently; reload the batch and try again.
+            logger.warning('Recurring batch after rule %s hit existing keys; retrying', last_id)
+            created += materialize_rules(list(due.filter(id__lte=rules[-1].id)), today)
+        rules_seen += len(rules)
+        last_id = rules[-1].id
+
+
+def clean_rule(data, rule=None):
+    """Validate API input into model field values; returns ``(fields, error)``.
+
+    ``rule`` is the existing rule on update (only the given keys change).
+    """
+    fields = {}
+
+    def current(name, default=None):
+        return getattr(rule, name) if rule else default
+
+    def as_date(value):
+        if isinstance(value, str):
+            return date.fromisoformat(value)
+        if not isinstance(value, date):
+            raise TypeError(value)
+        return value
+
+    if 'type' in data or rule is None:
+        tx_type = str(data.get('type') or '').upper()
+        if tx_type not in dict(Transaction.TYPE_CHOICES):
+            return None, "type must be INCOME or EXPENSE"
+        fields['type'] = tx_type
+    if 'amount' in data or rule is None:
+        try:
+            amount = Decimal(str(data.get('amount')))
+        except (InvalidOperation, TypeError):
+            return None, "Invalid amount"
+        if not amount.is_finite() or amount <= 0:
+            return None, "Amount must be positive"
+        fields['amount'] = amount.quantize(Decimal('0.01'))
+    if 'category' in data or rule is None:
+        category = str(data.get('category') or '').strip()
+        if not category:
+            return None, "category required"
+        fields['category'] = category[:255]
+    for name in ('description', 'subtype'):
+        if name in data:
+            fields[name] = str(data[name] or '')
+    if 'active' in data:
+        fields['active'] = bool(data['active'])
+
+    frequency = data.get('frequency', current('frequency', RecurringRule.FREQ_MONTHLY))
+    if not isinstance(frequency, str) or frequency not in dict(RecurringRule.FREQUENCY_CHOICES):
+        return None, "frequency must be monthly or weekly"
+    try:
+        interval = int(data.get('interval', current('interval', 1)))
+        start_date = as_date(data.get('start_date', current('start_date')) or date.today())
+        end_date = data.get('end_date', current('end_date'))
+        end_date = as_date(end_date) if end_date else None
+    except (TypeError, ValueError):
+        return None, "interval must be an integer and dates YYYY-MM-DD"
+    if not 1 <= interval <= 52:
+        return None, "interval must be between 1 and 52"
+    if not all(MIN_DATE <= d <= MAX_DATE for d in (start_date, end_date) if d):
+        return None, f"dates must be between {MIN_DATE.isoformat()} and {MAX_DATE.isoformat()}"
+    if end_date and end_date < start_date:
+        return None, "end_date must not be before start_date"
+    day_of_month, weekday = current('day_of_month'), current('weekday')
+    try:
+        if frequency == RecurringRule.FREQ_MONTHLY:
+            day_of_month = int(data.get('day_of_month', day_of_month or start_date.day))
+            if not 1 <= day_of_month <= 31:
+                return None, "day_of_month must be between 1 and 31"
+            weekday = None
+        else:
+            weekday = int(data.get('weekday', start_date.weekday() if weekday is None else weekday))
+            if not 0 <= weekday <= 6:
+                return None, "weekday must be between 0 (Monday) and 6 (Sunday)"
+            day_of_month = None
+    except (TypeError, ValueError):
+        return None, "day_of_month and weekday must be integers"
+    fields.update(
+        frequency=frequency, interval=interval, start_date=start_date, end_date=end_date,
+        day_of_month=day_of_month, weekday=weekday,
+    )
+    return fields, None
+
+
+def schedule_changed(rule, not_before=None):
+    """Recompute ``next_run`` from the schedule, skipping occurrences before ``not_before``.
+
+    Pass the old ``next_run`` on edits so past occurrences are not emitted again,
+    or today when resuming a paused rule so the pause is not backfilled.
+    """
+    next_run = first_occurrence(rule)
+    if not_before is not None:
+        while next_run < not_before:
+            next_run = next_occurrence(rule, next_run)
+    rule.next_run = next_run
+
+
+def rule_to_json(rule):
+    return {
+        "id": rule.id,
+        "workspace_id": rule.workspace_id,
+        "type": rule.type,
+        "category": rule.category,
+        "amount": float(rule.amount),
+        "description": rule.description,
+        "subtype": rule.subtype,
+        "frequency": rule.frequency,
+        "interval": rule.interval,
+        "day_of_month": rule.day_of_month,
+        "weekday": rule.weekday,
+        "start_date": rule.start_date.isoformat(),
+        "end_date": rule.end_date.isoformat() if rule.end_date else None,
+        "next_run": rule.next_run.isoformat(),
+        "active": rule.active,
+    }
@@ -0,0 +1,119 @@
+"""Content-addressed cache of rendered monthly PDFs.
+
+A cache entry is keyed by (user, year, month, data version, template version,
+photo hash); any change to the month's transactions bumps the data version (see
+``ledger``), so stale PDFs are never served. The PDF bytes are stored once per
+sha256, so identical renders share one file.
+"""
+import hashlib
+import logging
+import os
+from collections import defaultdict
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .ledger import data_version
+from .models import Report, ReportCacheEntry
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_DIR = 'report_cache'
+
+
+def content_storage_name(content_hash):
+    return f"{REPORT_CACHE_DIR}/{content_hash[:2]}/{content_hash}.pdf"
+
+
+def photo_fingerprint(user):
+    """Cheap identity of the profile photo embedded in the report ('' if none)."""
+    if not user.profile_photo:
+        return ''
+    if user.profile_photo_hash:
+        return user.profile_photo_hash
+    try:
+        st = os.stat(user.profile_photo.path)
+    except (OSError, ValueError, NotImplementedError):
+        return ''
+    raw = f"{user.profile_photo.name}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def cache_key(user, year, month):
+    from .services import REPORT_TEMPLATE_VERSION
+
+    return {
+        'user_id': user.id,
+        'year': year,
+        'month': month,
+        'data_version': data_version(user.id, year, month),
+        'template_version': REPORT_TEMPLATE_VERSION,
+        'photo_hash': photo_fingerprint(user),
+    }
+
+
+def store(key, pdf_bytes, summary):
+    """Save rendered bytes (once per content hash) and record the cache entry."""
+    content_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    name = content_storage_name(content_hash)
+    if not default_storage.exists(name):
+        saved = default_storage.save(name, ContentFile(pdf_bytes))
+        if saved != name:
+            # Lost a race with an identical render; keep the canonical copy only.
+            default_storage.delete(saved)
+    try:
+        with transaction.atomic():
+            return ReportCacheEntry.objects.create(
+                content_hash=content_hash, size=len(pdf_bytes), summary_data=summary, **key,
+            )
+    except IntegrityError:
+        return ReportCacheEntry.objects.get(**key)
+
+
+def get_or_render(user, year, month):
+    """Return the cache entry for this report, rendering and storing it on a miss."""
+    from .report_jobs import render_monthly_report
+
+    key = cache_key(user, year, month)
+    entry = ReportCacheEntry.objects.filter(**key).first()
+    if entry and default_storage.exists(content_storage_name(entry.content_hash)):
+        return entry
+    if entry:
+        entry.delete()
+    buffer, summary = render_monthly_report(user, year, month)
+    return store(key, buffer.getvalue(), summary)
+
+
+def _release_files(content_hashes):
+    """Delete stored PDFs that no cache entry or report job still points at."""
+    for content_hash in content_hashes:
+        name = content_storage_name(content_hash)
+        if ReportCacheEntry.objects.filter(content_hash=content_hash).exists():
+            continue
+        if Report.objects.filter(file_path=name).exists():
+            continue
+        try:
+            default_storage.delete(name)
+        except Exception:
+            logger.exception('Could not delete cached report %s', name)
+
+
+def invalidate_months(keys):
+    """Drop cache entries for the given ``(user_id, year, month)`` keys."""
+    by_month = defaultdict(set)
+    for user_id, year, month in keys:
+        by_month[(year, month)].add(user_id)
+    if not by_month:
+        return
+    # One clause per month rather than per key keeps the WHERE shallow for bulk writes.
+    cond = Q()
+    for (year, month), user_ids in by_month.items():
+        cond |= Q(year=year, month=month, user_id__in=user_ids)
+    stale = ReportCacheEntry.objects.filter(cond)
+    hashes = set(stale.values_list('content_hash', flat=True))
+    if not hashes:
+        return
+    stale.delete()
+    _release_files(hashes)
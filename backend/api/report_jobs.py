@@ -0,0 +1,157 @@
+"""Queued PDF report generation.
+
+Report rows double as jobs: the API inserts a ``queued`` row and returns its id,
+and ``manage.py run_report_worker`` claims rows, renders the PDF (through the
+report cache) and records the file path and summary on the same row.
+"""
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Report, Transaction, User
+from .notifications import notify
+
+logger = logging.getLogger(__name__)
+
+STALE_JOB_MINUTES = 30
+MAX_ATTEMPTS = 3
+
+
+def month_summary(user_id, year, month):
+    """Income/expense totals for one month, summed in the database."""
+    agg = Transaction.objects.filter(user_id=user_id, date__year=year, date__month=month).aggregate(
+        total_income=Sum('amount', filter=Q(type='INCOME')),
+        total_expenses=Sum('amount', filter=Q(type='EXPENSE')),
+        transaction_count=Count('id'),
+    )
+    total_income = float(agg['total_income'] or 0)
+    total_expenses = float(agg['total_expenses'] or 0)
+    return {
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'net': total_income - total_expenses,
+        'transaction_count': agg['transaction_count'],
+    }
+
+
+def render_monthly_report(user, year, month):
+    """Render one user's monthly PDF. Returns ``(buffer, summary)``."""
+    from .services import generate_monthly_report_pdf
+
+    summary = month_summary(user.id, year, month)
+    transactions = (
+        Transaction.objects.filter(user_id=user.id, date__year=year, date__month=month)
+        .order_by('category', 'date', 'id')
+        .values_list('date', 'category', 'type', 'amount')
+        .iterator(chunk_size=2000)
+    )
+    photo_path = user.profile_photo.path if user.profile_photo and os.path.exists(user.profile_photo.path) else None
+    buffer = generate_monthly_report_pdf(
+        user_name=user.full_name or user.email,
+        year=year, month=month,
+        total_income=summary['total_income'],
+        total_expenses=summary['total_expenses'],
+        transactions=transactions,
+        profile_photo_path=photo_path,
+    )
+    return buffer, summary
+
+
+def enqueue_monthly_report(user_id, year, month):
+    """Queue a report, reusing a job for the same month that has not finished yet."""
+    pending = Report.objects.filter(
+        user_id=user_id, year=year, month=month,
+        status__in=(Report.STATUS_QUEUED, Report.STATUS_RUNNING),
+    ).first()
+    if pending:
+        return pending
+    return Report.objects.create(user_id=user_id, year=year, month=month, status=Report.STATUS_QUEUED)
+
+
+def requeue_stale_jobs(minutes=STALE_JOB_MINUTES):
+    """Put back jobs whose worker died mid-render."""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return Report.objects.filter(status=Report.STATUS_RUNNING, started_at__lt=cutoff).update(
+        status=Report.STATUS_QUEUED, started_at=None,
+    )
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job to ``running``.
+
+    The conditional UPDATE is the lock: if another worker claimed the row first,
+    zero rows change and we try the next candidate.
+    """
+    while True:
+        job_id = (
+            Report.objects.filter(status=Report.STATUS_QUEUED)
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        claimed = Report.objects.filter(id=job_id, status=Report.STATUS_QUEUED).update(
+            status=Report.STATUS_RUNNING, started_at=timezone.now(), attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Report.objects.get(id=job_id)
+
+
+def run_job(report):
+    from .report_cache import content_storage_name, get_or_render
+
+    try:
+        user = User.objects.get(id=report.user_id)
+        entry = get_or_render(user, report.year, report.month)
+        report.file_path = content_storage_name(entry.content_hash)
+        report.summary_data = entry.summary_data
+        report.status = Report.STATUS_DONE
+        report.error = ''
+    except Exception as e:
+        logger.exception('Report %s failed', report.id)
+        report.error = str(e)[:2000]
+        report.status = Report.STATUS_QUEUED if report.attempts < MAX_ATTEMPTS else Report.STATUS_FAILED
+    report.finished_at = timezone.now()
+    report.save(update_fields=['file_path', 'summary_data', 'status', 'error', 'finished_at'])
+    period = f"{report.year}-{report.month:02d}"
+    if report.status == Report.STATUS_DONE:
+        notify([report.user_id], 'report', f"Your {period} report is ready", f"Report {report.id}")
+    elif report.status == Report.STATUS_FAILED:
+        notify([report.user_id], 'report', f"Your {period} report could not be generated", f"Report {report.id}")
+    return report
+
+
+def run_worker(poll_interval=2.0, once=False, max_jobs=None):
+    """Process jobs until interrupted (or until the queue is empty with ``once``)."""
+    requeue_stale_jobs()
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+        logger.info('Report %s -> %s', job.id, job.status)
+    return processed
+
+
+def report_to_json(report):
+    return {
+        "id": report.id,
+        "year": report.year,
+        "month": report.month,
+        "status": report.status,
+        "summary": report.summary_data or {},
+        "error": report.error or "",
+        "created_at": report.created_at.isoformat() if report.created_at else None,
+        "finished_at": report.finished_at.isoformat() if report.finished_at else None,
+        "download_url": f"/api/reports/jobs/{report.id}/download" if report.status == Report.STATUS_DONE else None,
+    }
@@ -0,0 +1,174 @@
+"""Full-text search over Transaction.description and category.
+
+SQLite uses a contentless FTS5 table kept in sync by triggers; Postgres uses a
+generated ``tsvector`` column with a GIN index. Both are created outside the
+Django model (see migration 0010) so the ORM never has to know about them.
+"""
+import logging
+import re
+
+from django.db import connection
+
+from .models import Transaction
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'transactions_fts'
+_SQLITE_TRIGGERS = ('transactions_fts_ai', 'transactions_fts_ad', 'transactions_fts_au')
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERMS = 8
+# Every page re-ranks all matches up to its offset; past this, refine the query instead.
+MAX_PAGE = 1000
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        owner, category, description,
+        content='', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, owner, category, description)
+        VALUES (new.id, 'u' || new.user_id, new.category, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, owner, category, description)
+        VALUES ('delete', old.id, 'u' || old.user_id, old.category, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_au
+        AFTER UPDATE OF user_id, category, description ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, owner, category, description)
+        VALUES ('delete', old.id, 'u' || old.user_id, old.category, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, owner, category, description)
+        VALUES (new.id, 'u' || new.user_id, new.category, new.description);
+    END""",
+]
+
+_POSTGRES_DDL = [
+    """ALTER TABLE transactions ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(category, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS transactions_search_gin ON transactions USING GIN (search_vector)",
+]
+
+
+def _sqlite_index_is_complete(cursor):
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE (type = 'table' AND name = %s) OR (type = 'trigger' AND name IN (%s, %s, %s))",
+        [FTS_TABLE, *_SQLITE_TRIGGERS],
+    )
+    return len(cursor.fetchall()) == 1 + len(_SQLITE_TRIGGERS)
+
+
+def ensure_search_index(conn=None):
+    """Create (or repair) the full-text index for the current database vendor.
+
+    Idempotent. On SQLite, Django rebuilds a table whenever a migration alters
+    it, which silently drops its triggers, so this also runs after every
+    ``migrate`` and repopulates the index if any trigger had gone missing.
+    """
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            if _sqlite_index_is_complete(cursor):
+                return
+            for sql in _SQLITE_DDL:
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, owner, category, description) "
+                "SELECT id, 'u' || user_id, category, description FROM transactions"
+            )
+            logger.info("Rebuilt SQLite FTS5 transaction index")
+        elif conn.vendor == 'postgresql':
+            for sql in _POSTGRES_DDL:
+                cursor.execute(sql)
+
+
+def drop_search_index(conn=None):
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            for name in _SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        elif conn.vendor == 'postgresql':
+            cursor.execute("DROP INDEX IF EXISTS transactions_search_gin")
+            cursor.execute("ALTER TABLE transactions DROP COLUMN IF EXISTS search_vector")
+
+
+def _terms(query):
+    return _TOKEN_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def _search_ids_sqlite(user_id, terms, tx_type, limit, offset):
+    # Every term is quoted, so user input can never inject FTS5 syntax.
+    text_match = ' '.join(f'"{t}"*' for t in terms)
+    match = f'owner:"u{int(user_id)}" AND {{category description}}: ({text_match})'
+    sql = (
+        f"SELECT f.rowid, bm25({FTS_TABLE}, 0.0, 2.0, 1.0) AS rank "
+        f"FROM {FTS_TABLE} f JOIN transactions t ON t.id = f.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s"
+    )
+    params = [match]
+    if tx_type:
+        sql += " AND t.type = %s"
+        params.append(tx_type)
+    sql += " ORDER BY rank, f.rowid DESC LIMIT %s OFFSET %s"
+    params += [limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        # bm25() is "lower is better"; flip it so callers always see higher = better.
+        return [(row[0], -row[1]) for row in cursor.fetchall()]
+
+
+def _search_ids_postgres(user_id, terms, tx_type, limit, offset):
+    tsquery = ' & '.join(f"{t}:*" for t in terms)
+    sql = (
+        "SELECT t.id, ts_rank(t.search_vector, q) AS rank "
+        "FROM transactions t, to_tsquery('simple', %s) q "
+        "WHERE t.user_id = %s AND t.search_vector @@ q"
+    )
+    params = [tsquery, user_id]
+    if tx_type:
+        sql += " AND t.type = %s"
+        params.append(tx_type)
+    sql += " ORDER BY rank DESC, t.id DESC LIMIT %s OFFSET %s"
+    params += [limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
+
+
+def _search_ids_fallback(user_id, terms, tx_type, limit, offset):
+    from django.db.models import Q
+    qs = Transaction.objects.filter(user_id=user_id)
+    if tx_type:
+        qs = qs.filter(type=tx_type)
+    for term in terms:
+        qs = qs.filter(Q(description__icontains=term) | Q(category__icontains=term))
+    ids = qs.order_by('-date', '-id').values_list('id', flat=True)[offset:offset + limit]
+    return [(i, 0.0) for i in ids]
+
+
+def search_transactions(user_id, query, tx_type=None, page=1, page_size=20):
+    """Return ``(results, has_more)`` where results are ``(Transaction, rank)`` pairs.
+
+    Results are ranked best-first. One extra row is fetched instead of running a
+    ``COUNT(*)``, so the cost of a page does not grow with the number of matches.
+    """
+    terms = _terms(query)
+    if not terms:
+        return [], False
+    offset = (page - 1) * page_size
+    if connection.vendor == 'sqlite':
+        search = _search_ids_sqlite
+    elif connection.vendor == 'postgresql':
+        search = _search_ids_postgres
+    else:
+        search = _search_ids_fallback
+    hits = search(user_id, terms, tx_type, page_size + 1, offset)
+    has_more = len(hits) > page_size
+    hits = hits[:page_size]
+    by_id = Transaction.objects.in_bulk([i for i, _ in hits])
+    return [(by_id[i], rank) for i, rank in hits if i in by_id], has_more
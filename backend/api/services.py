@@ -1,21 +1,12 @@
 """Activity logging, email alerts, and PDF reporting services."""
 import threading
 import logging
-import os
-from io import BytesIO
-from datetime import datetime, timedelta
+from datetime import timedelta
 from django.conf import settings
 from django.core.mail import send_mail
 from django.utils import timezone
 from .models import ActivityLog, AdminSettings
 
-# ReportLab imports
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.units import inch
-
 logger = logging.getLogger(__name__)
 
 def get_client_ip(request):
@@ -85,101 +76,21 @@ def count_recent_failed_logins(ip, minutes=15):
 
 # --- PDF Reporting Service ---
 
-def generate_monthly_report_pdf(user_name, year, month, total_income, total_expenses, transactions, profile_photo_path=None):
-    """Generates a professional financial report in PDF format."""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
-    
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'TitleStyle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor("#374b91"),
-        alignment=1,
-        spaceAfter=30
-    )
-    
-    heading_style = ParagraphStyle(
-        'HeadingStyle',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor("#2dd4bf"),
-        spaceBefore=12,
-        spaceAfter=12
-    )
-
-    elements = []
-    elements.append(Paragraph("FinTrack Monthly Report", title_style))
-    
-    month_name = datetime(year, month, 1).strftime("%B")
-    info_text = f"<b>Client:</b> {user_name}<br/><b>Reporting Period:</b> {month_name} {year}<br/><b>Status:</b> Official"
-    elements.append(Paragraph(info_text, styles["Normal"]))
-    
-    if profile_photo_path and os.path.exists(profile_photo_path):
-        try:
-            img = Image(profile_photo_path, width=1*inch, height=1*inch)
-            img.hAlign = 'RIGHT'
-            elements.append(img)
-        except:
-            pass
-            
-    elements.append(Spacer(1, 20))
+# Bump whenever the PDF layout changes so cached reports are re-rendered.
+REPORT_TEMPLATE_VERSION = 2
 
-    summary_data = [
-        ["Metric", "Value"],
-        ["Total Income", f"${total_income:,.2f}"],
-        ["Total Expenses", f"${total_expenses:,.2f}"],
-        ["Net Savings", f"${(total_income - total_expenses):,.2f}"],
-        ["Savings Rate", f"{((total_income - total_expenses) / total_income * 100 if total_income > 0 else 0):.1f}%"]
-    ]
-    
-    summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#374b91")),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.whitesmoke),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-    ]))
-    elements.append(summary_table)
-    elements.append(Spacer(1, 30))
 
-    elements.append(Paragraph("Detailed Transactions", heading_style))
-    
-    txn_data = [["Date", "Category", "Type", "Amount"]]
-    for tx in transactions[:50]:  # Increased limit
-        is_income = (tx.type == 'INCOME')
-        txn_data.append([
-            tx.date.strftime("%Y-%m-%d"),
-            tx.category,
-            "Income" if is_income else "Expense",
-            f"${tx.amount:,.2f}"
-        ])
-        
-    if not transactions:
-        txn_data.append(["No records", "-", "-", "-"])
+def generate_monthly_report_pdf(*args, **kwargs):
+    """Render a monthly report; see ``api.pdf_reports.generate_monthly_report_pdf``.
 
-    txn_table = Table(txn_data, colWidths=[1.2*inch, 2*inch, 1*inch, 1.2*inch])
-    txn_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#f8fafc")),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor("#64748b")),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('INNERGRID', (0, 0), (-1, -1), 0.25, colors.grey),
-        ('BOX', (0, 0), (-1, -1), 0.25, colors.grey),
-    ]))
-    elements.append(txn_table)
+    ReportLab is heavy to import, so it is only loaded the first time a report is
+    actually rendered rather than when the web worker or a management command boots.
+    """
+    from .pdf_reports import generate_monthly_report_pdf as _generate
+    return _generate(*args, **kwargs)
 
-    elements.append(Spacer(1, 50))
-    footer_text = "Generated by FinTrack System. All rights reserved."
-    elements.append(Paragraph(footer_text, styles["Italic"]))
 
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+def generate_range_report_pdf(*args, **kwargs):
+    """Render a date-range report; see ``api.pdf_reports.generate_range_report_pdf``."""
+    from .pdf_reports import generate_range_report_pdf as _generate
+    return _generate(*args, **kwargs)
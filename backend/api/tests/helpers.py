@@ -0,0 +1,43 @@
+"""Shared fixtures for the API tests."""
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+
+from api import form_schema, workspace_acl
+from api.auth_utils import create_access_token
+from api.models import User, Workspace
+from api.workspace_acl import add_member
+
+
+class ApiTestCase(TestCase):
+    """TestCase with per-process caches reset, since row ids are reused between tests."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        with workspace_acl._lock:
+            workspace_acl._cache.clear()
+        with form_schema._lock:
+            form_schema._cache.clear()
+
+    def make_user(self, email, role='user', status='approved'):
+        return User.objects.create(email=email, full_name=email.split('@')[0], role=role, status=status)
+
+    def client_for(self, user):
+        token = create_access_token({
+            "sub": user.email, "role": user.role, "status": user.status, "version": user.token_version,
+        })
+        return Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def make_workspace(self, owner, **members):
+        """A workspace owned by ``owner``; ``members`` maps role names to lists of users."""
+        ws = Workspace.objects.create(name="Team", slug=f"team-{Workspace.objects.count() + 1}", owner_id=owner.id)
+        add_member(ws.id, owner.id, 'owner')
+        for role, users in members.items():
+            for user in users:
+                add_member(ws.id, user.id, role)
+        return ws
+
+    def send(self, client, method, path, data=None):
+        return getattr(client, method)(path, data=json.dumps(data), content_type='application/json')
@@ -0,0 +1,85 @@
+"""Admin activity stream (Server-Sent Events)."""
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient
+
+from api.activity_stream import broadcaster
+from api.models import ActivityLog
+
+from .helpers import ApiTestCase
+
+# Short timings so a whole stream (replay, live events, heartbeats, close) fits in a test.
+FAST = {'POLL_SECONDS': 0.02, 'HEARTBEAT_SECONDS': 0.1, 'STREAM_SECONDS': 0.6}
+
+
+def _log(action):
+    return ActivityLog.objects.create(user_email='someone@example.com', action=action)
+
+
+class ActivityStreamTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.make_user('admin@example.com', role='admin')
+        self.token = self.client_for(self.admin).defaults['HTTP_AUTHORIZATION'].split()[1]
+        for name, value in FAST.items():
+            patcher = mock.patch(f'api.activity_stream.{name}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def read(self, response, on_frame=None):
+        """Parse every frame until the server closes the stream; ``on_frame`` may write more rows."""
+        frames = []
+        async for chunk in response.streaming_content:
+            frame = chunk.decode() if isinstance(chunk, bytes) else chunk
+            frames.append(frame)
+            if on_frame:
+                await on_frame(frame)
+        # Let the broadcaster notice its last subscriber left before the test loop closes.
+        if broadcaster._task:
+            await broadcaster._task
+        return frames
+
+    def events(self, frames):
+        """Event payloads, minus the audit middleware's own entry for opening the stream."""
+        events = [json.loads(f.split('data: ', 1)[1]) for f in frames if f.startswith('id: ')]
+        return [e for e in events if e['action'] != 'VIEW_ADMIN']
+
+    def test_stream_needs_asgi(self):
+        admin = self.client_for(self.admin)
+        with self.assertLogs('django.request', 'ERROR'):
+            self.assertEqual(admin.get('/api/admin/activity-stream').status_code, 503)
+
+    async def test_reconnect_replays_after_last_event_id_then_follows_live_rows(self):
+        first, second, third = [await sync_to_async(_log)(f'OLD_{i}') for i in range(3)]
+        live = []
+
+        async def add_live_row(frame):
+            if not live and frame.startswith(f'id: {third.id}\n'):
+                live.append(await sync_to_async(_log)('LIVE'))
+
+        response = await AsyncClient().get(
+            '/api/admin/activity-stream', headers={'Authorization': f'Bearer {self.token}', 'Last-Event-ID': str(first.id)},
+        )
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'text/event-stream'))
+        frames = await self.read(response, add_live_row)
+        self.assertTrue(frames[0].startswith('retry: '))
+        self.assertEqual([e['id'] for e in self.events(frames)], [second.id, third.id, live[0].id])
+        self.assertEqual(self.events(frames)[-1]['action'], 'LIVE')
+
+    async def test_fresh_connection_starts_at_the_newest_row_and_sends_heartbeats(self):
+        await sync_to_async(_log)('BEFORE')
+        response = await AsyncClient().get(f'/api/admin/activity-stream?token={self.token}')
+        frames = await self.read(response)
+        self.assertEqual(self.events(frames), [])
+        self.assertIn(': ping\n\n', frames)
+
+    async def test_only_admins_with_a_valid_cursor_may_connect(self):
+        user = await sync_to_async(self.make_user)('user@example.com')
+        token = self.client_for(user).defaults['HTTP_AUTHORIZATION'].split()[1]
+        response = await AsyncClient().get(f'/api/admin/activity-stream?token={token}')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual((await AsyncClient().get('/api/admin/activity-stream')).status_code, 401)
+        response = await AsyncClient().get(f'/api/admin/activity-stream?token={self.token}&after=abc')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,18 @@
+"""Assistant queries: date parsing and planning."""
+from .helpers import ApiTestCase
+
+
+class AssistantQueryTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('user@example.com')
+        self.client = self.client_for(self.user)
+
+    def test_unrepresentable_dates_are_answered(self):
+        for query in ('spending q1 0000', 'spending in march 0000', 'spending 0001-01-05 vs',
+                      'spending 9999-12-31 vs', 'spending q4 9999'):
+            response = self.send(self.client, 'post', '/api/assistant/query', {'query': query})
+            self.assertEqual(response.status_code, 200, query)
+            self.assertIn("couldn't understand the date", response.json()['response'])
+        response = self.send(self.client, 'post', '/api/assistant/query', {'query': 'spending march 2026 vs april 2026'})
+        self.assertEqual(len(response.json()['plan']['ranges']), 2)
@@ -0,0 +1,79 @@
+"""Month-end batch report generation."""
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from django.utils import timezone
+
+from api.batch_reports import _claim_jobs, generate_month
+from api.models import Report, ReportCacheEntry
+from api.report_cache import content_storage_name
+
+from .helpers import ApiTestCase
+
+
+def _inline_pool(max_workers=None, mp_context=None):
+    return ThreadPoolExecutor(max_workers=1)
+
+
+def _fake_pdf(payload):
+    return f"%PDF-1.4 {payload['user_name']}".encode()
+
+
+class BatchReportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.users = [self.make_user(f'batch{i}@example.com') for i in range(2)]
+
+    def generate(self, **kwargs):
+        with mock.patch('api.batch_reports.ProcessPoolExecutor', _inline_pool), \
+                mock.patch('api.pdf_reports.render_report_bytes', side_effect=_fake_pdf) as render:
+            stats = generate_month(2026, 3, user_ids=[u.id for u in self.users], log=lambda *args: None, **kwargs)
+        return stats, render.call_count
+
+    def test_force_claims_one_row_per_user_and_month(self):
+        user = self.users[0]
+        history = [Report.objects.create(user_id=user.id, year=2026, month=3, status=status)
+                   for status in (Report.STATUS_DONE, Report.STATUS_FAILED, Report.STATUS_DONE)]
+        jobs, resumed = _claim_jobs(2026, 3, [u.id for u in self.users], force=True)
+        self.assertEqual(resumed, set())
+        self.assertEqual(set(jobs), {u.id for u in self.users})
+        self.assertEqual(jobs[user.id].id, history[-1].id)
+        self.assertEqual(Report.objects.filter(status=Report.STATUS_RUNNING).count(), 2)
+        for report in history[:-1]:
+            old_status = report.status
+            report.refresh_from_db()
+            self.assertEqual(report.status, old_status)
+
+    def test_rerun_skips_done_reports_unless_forced(self):
+        stats, renders = self.generate()
+        self.assertEqual((stats['rendered'], renders), (2, 2))
+        self.assertEqual(self.generate()[0]['skipped'], 2)
+        stats, renders = self.generate(force=True)
+        self.assertEqual((stats['cached'], renders), (2, 0))
+        self.assertFalse(Report.objects.exclude(status=Report.STATUS_DONE).exists())
+
+    def test_cache_entry_without_file_is_rendered_again(self):
+        self.generate()
+        entry = ReportCacheEntry.objects.filter(user_id=self.users[0].id).get()
+        default_storage.delete(content_storage_name(entry.content_hash))
+        stats, renders = self.generate(force=True)
+        self.assertEqual((stats['rendered'], stats['cached'], renders), (1, 1, 1))
+        entry = ReportCacheEntry.objects.filter(user_id=self.users[0].id).get()
+        self.assertTrue(default_storage.exists(content_storage_name(entry.content_hash)))
+
+    def test_rerun_resumes_reports_an_interrupted_run_left_running(self):
+        self.generate()
+        # A run killed mid-render leaves its claimed rows running, however recently it started.
+        Report.objects.filter(user_id=self.users[0].id).update(status=Report.STATUS_RUNNING, started_at=timezone.now())
+        stats, renders = self.generate()
+        self.assertEqual((stats['resumed'], stats['skipped'], stats['cached'], renders), (1, 1, 1, 0))
+        self.assertFalse(Report.objects.exclude(status=Report.STATUS_DONE).exists())
@@ -0,0 +1,65 @@
+"""Budget usage kept by the ledger, and who may push spend into a workspace budget."""
+from datetime import date
+from decimal import Decimal
+
+from api.budgets import month_spent
+from api.models import ActivityLog, Budget, BudgetUsage, CategoryStats, Transaction
+
+from .helpers import ApiTestCase
+
+
+class BudgetTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = self.make_user('owner@example.com')
+        self.editor = self.make_user('editor@example.com')
+        self.viewer = self.make_user('viewer@example.com')
+        self.outsider = self.make_user('outsider@example.com')
+        self.ws = self.make_workspace(self.owner, editor=[self.editor], viewer=[self.viewer])
+        self.client = self.client_for(self.owner)
+
+    def add_expense(self, amount, day, category='FOOD', client=None, **extra):
+        response = self.send(client or self.client, 'post', '/api/expenses/', {
+            'amount': amount, 'date': day, 'category': category, **extra,
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def test_usage_tracks_spend_and_alerts_once_per_threshold(self):
+        budget = Budget.objects.create(user_id=self.owner.id, category='FOOD', amount=Decimal('100'), thresholds=[50, 100])
+        self.add_expense(30, '2026-05-03')
+        self.add_expense(30, '2026-05-04')
+        self.add_expense(5, '2026-05-05')
+        self.add_expense(500, '2026-05-05', category='RENT')
+        usage = BudgetUsage.objects.get(budget_id=budget.id, year=2026, month=5)
+        self.assertEqual(usage.spent, month_spent(budget, 2026, 5))
+        self.assertEqual(usage.spent, Decimal('65'))
+        self.assertEqual(usage.alert_level, 50)
+        self.assertEqual(ActivityLog.objects.filter(action='BUDGET_THRESHOLD').count(), 1)
+
+        last = self.add_expense(40, '2026-05-06')
+        self.assertEqual(ActivityLog.objects.filter(action='BUDGET_THRESHOLD').count(), 2)
+        self.client.delete(f'/api/expenses/{last}/')
+        usage.refresh_from_db()
+        self.assertEqual(usage.spent, month_spent(budget, 2026, 5))
+        self.assertEqual(usage.alert_level, 50)
+
+    def test_workspace_budget_counts_members_expenses(self):
+        budget = Budget.objects.create(user_id=self.owner.id, workspace_id=self.ws.id, amount=Decimal('1000'))
+        self.add_expense(40, '2026-06-01', workspace_id=self.ws.id)
+        self.add_expense(60, '2026-06-02', client=self.client_for(self.editor), workspace_id=self.ws.id)
+        usage = BudgetUsage.objects.get(budget_id=budget.id, year=2026, month=6)
+        self.assertEqual(usage.spent, Decimal('100'))
+        self.assertEqual(usage.spent, month_spent(budget, 2026, 6))
+
+    def test_transactions_cannot_be_tagged_with_a_foreign_workspace(self):
+        budget = Budget.objects.create(user_id=self.owner.id, workspace_id=self.ws.id, amount=Decimal('100'))
+        for user, path in ((self.outsider, '/api/expenses/'), (self.outsider, '/api/income/'),
+                           (self.viewer, '/api/expenses/')):
+            response = self.send(self.client_for(user), 'post', path, {
+                'amount': 99, 'category': 'FOOD', 'date': date.today().isoformat(), 'workspace_id': self.ws.id,
+            })
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(BudgetUsage.objects.filter(budget_id=budget.id, spent__gt=0).exists())
+        self.assertFalse(CategoryStats.objects.filter(scope=f'w:{self.ws.id}').exists())
@@ -0,0 +1,72 @@
+"""Running category moments, insert-time anomaly flags and the statistics endpoint."""
+from datetime import date
+from decimal import Decimal
+
+from api.category_stats import user_scope, workspace_scope
+from api.ledger import record_created, record_deleted
+from api.models import CategoryStats, Transaction
+
+from .helpers import ApiTestCase
+
+
+class CategoryStatsTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('owner@example.com')
+        self.client = self.client_for(self.user)
+
+    def add_expense(self, amount, day, category='FOOD', client=None, **extra):
+        response = self.send(client or self.client, 'post', '/api/expenses/', {
+            'amount': amount, 'date': day, 'category': category, **extra,
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def assertStatsMatch(self, scope, **filters):
+        rows = CategoryStats.objects.filter(scope=scope)
+        self.assertTrue(rows.exists())
+        for row in rows:
+            amounts = [float(a) for a in Transaction.objects.filter(
+                type=row.type, category=row.category, **filters,
+            ).values_list('amount', flat=True)]
+            self.assertEqual(row.count, len(amounts))
+            self.assertAlmostEqual(row.total, sum(amounts), places=6)
+            self.assertAlmostEqual(row.total_sq, sum(a * a for a in amounts), places=4)
+
+    def test_moments_follow_single_and_bulk_writes(self):
+        first = self.add_expense(10, '2026-03-02')['id']
+        self.add_expense(25.5, '2026-03-15')
+        self.add_expense(7, '2026-04-01', category='RENT')
+        self.client.delete(f'/api/expenses/{first}/')
+        self.assertStatsMatch(user_scope(self.user.id), user_id=self.user.id)
+
+        Transaction.objects.bulk_create([
+            Transaction(user_id=self.user.id, type='EXPENSE', category=f'C{i % 7}',
+                        amount=Decimal(i) + Decimal('0.5'), date=date(2026, 5, 1 + i % 28))
+            for i in range(60)
+        ])
+        created = list(Transaction.objects.filter(category__startswith='C'))
+        record_created(created)
+        Transaction.objects.filter(id__in=[t.id for t in created[::3]]).delete()
+        record_deleted(created[::3])
+        self.assertStatsMatch(user_scope(self.user.id), user_id=self.user.id)
+
+    def test_workspace_moments_count_every_members_expenses(self):
+        editor = self.make_user('editor@example.com')
+        ws = self.make_workspace(self.user, editor=[editor])
+        self.add_expense(40, '2026-06-01', workspace_id=ws.id)
+        self.add_expense(60, '2026-06-02', client=self.client_for(editor), workspace_id=ws.id)
+        self.assertStatsMatch(workspace_scope(ws.id), workspace_id=ws.id)
+
+    def test_outlier_is_flagged_at_insert_and_in_statistics(self):
+        for i in range(12):
+            self.assertNotIn('anomaly', self.add_expense(20 + i % 3, f'2026-02-{i + 1:02d}'))
+        spike = self.add_expense(500, '2026-02-20')
+        self.assertGreaterEqual(spike['anomaly']['z'], 5)
+
+        response = self.client.get('/api/reports/category-stats?sigma=3')
+        self.assertEqual(response.status_code, 200)
+        food = response.json()['categories'][0]
+        self.assertEqual((food['category'], food['count'], food['max']), ('FOOD', 13, 500.0))
+        self.assertEqual([o['id'] for o in food['outliers']], [spike['id']])
+        self.assertEqual(self.client.get('/api/reports/category-stats?type=bogus').status_code, 400)
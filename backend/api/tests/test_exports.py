@@ -0,0 +1,69 @@
+"""Streaming transaction exports."""
+import csv
+import gzip
+import io
+import json
+import zipfile
+from datetime import date
+from decimal import Decimal
+
+from api.exports import ROWS_PER_YIELD, export_queryset, iter_csv
+from api.models import Transaction
+
+from .helpers import ApiTestCase
+
+
+class ExportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('user@example.com')
+        self.client = self.client_for(self.user)
+        Transaction.objects.bulk_create([
+            Transaction(user_id=self.user.id, type='EXPENSE', category='FOOD', amount=Decimal('12.50'),
+                        date=date(2026, 3, 1), description='lunch, with "quotes"'),
+            Transaction(user_id=self.user.id, type='INCOME', category='SALARY', amount=Decimal('1000'),
+                        date=date(2026, 3, 31), subtype='tutoring', student_count=4),
+            Transaction(user_id=self.user.id, type='EXPENSE', category='RENT', amount=Decimal('700'),
+                        date=date(2026, 4, 1), description='April rent'),
+        ])
+
+    def export(self, query):
+        response = self.client.get(f'/api/transactions/export?{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_and_ndjson_honour_range_and_type(self):
+        _, body = self.export('format=csv&start=2026-03-01&end=2026-03-31')
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual([(r['category'], r['amount']) for r in rows], [('FOOD', '12.50'), ('SALARY', '1000.00')])
+        self.assertEqual(rows[0]['description'], 'lunch, with "quotes"')
+
+        response, body = self.export('format=ndjson&type=expense&gzip=1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        records = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+        self.assertEqual([(r['date'], r['amount']) for r in records], [('2026-03-01', '12.50'), ('2026-04-01', '700.00')])
+
+    def test_xlsx_is_a_valid_workbook_with_inline_strings(self):
+        from openpyxl import load_workbook
+
+        response, body = self.export('format=xlsx')
+        self.assertIn('.xlsx', response['Content-Disposition'])
+        archive = zipfile.ZipFile(io.BytesIO(body))
+        self.assertNotIn('xl/sharedStrings.xml', archive.namelist())
+        rows = list(load_workbook(io.BytesIO(body), read_only=True).active.iter_rows(values_only=True))
+        self.assertEqual(rows[0][:4], ('id', 'date', 'type', 'category'))
+        self.assertEqual([(r[3], r[6]) for r in rows[1:]], [('FOOD', 12.5), ('SALARY', 1000), ('RENT', 700)])
+
+    def test_rows_are_streamed_in_batches(self):
+        Transaction.objects.bulk_create([
+            Transaction(user_id=self.user.id, type='EXPENSE', category='BULK', amount=1, date=date(2026, 5, 1))
+            for _ in range(ROWS_PER_YIELD * 2)
+        ])
+        chunks = list(iter_csv(export_queryset(self.user.id)))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(sum(chunk.count(b'\n') for chunk in chunks), ROWS_PER_YIELD * 2 + 4)
+
+    def test_bad_parameters_are_rejected(self):
+        for query in ('format=pdf', 'start=2026-13-01', 'start=2026-05-01&end=2026-04-01', 'type=transfer'):
+            self.assertEqual(self.client.get(f'/api/transactions/export?{query}').status_code, 400, query)
@@ -0,0 +1,64 @@
+"""Cash-flow forecasts from monthly rollups."""
+from datetime import date
+from decimal import Decimal
+
+from api.forecasting import compute_forecast, get_forecast
+from api.ledger import record_created
+from api.models import Transaction
+
+from .helpers import ApiTestCase
+
+
+class ForecastTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('user@example.com')
+        self.client = self.client_for(self.user)
+
+    def book(self, rows):
+        """``rows`` of ``(type, category, amount, date)``, recorded through the ledger."""
+        Transaction.objects.bulk_create([
+            Transaction(user_id=self.user.id, type=t, category=c, amount=Decimal(a), date=d) for t, c, a, d in rows
+        ])
+        record_created(list(Transaction.objects.filter(user_id=self.user.id)))
+
+    def monthly(self, tx_type, category, amount, months, year=2024):
+        return [(tx_type, category, amount, date(year + m // 12, m % 12 + 1, 5)) for m in range(months)]
+
+    def test_steady_history_is_forecast_exactly(self):
+        self.book(self.monthly('EXPENSE', 'RENT', 1000, 29) + self.monthly('INCOME', 'SALARY', 3000, 29))
+        forecast = compute_forecast(self.user.id, today=date(2026, 5, 15), horizon=2)
+
+        self.assertEqual([m['month'] for m in forecast['months']], ['2026-05', '2026-06'])
+        for model in ('seasonal_naive', 'smoothing'):
+            self.assertEqual(forecast['months'][1]['expenses'][model], {'value': 1000.0, 'low': 1000.0, 'high': 1000.0})
+            self.assertEqual(forecast['next_quarter']['income'][model]['value'], 9000.0)
+        self.assertEqual((forecast['next_quarter']['start'], forecast['next_quarter']['end']), ('2026-07-01', '2026-09-30'))
+        month_end = forecast['month_end']
+        self.assertEqual((month_end['income_to_date'], month_end['projected_income']), (3000.0, 3000.0))
+        self.assertEqual(month_end['projected_balance'], 29 * 2000.0)
+
+    def test_seasonal_spikes_repeat_a_year_later(self):
+        rows = self.monthly('EXPENSE', 'FOOD', 200, 23)
+        rows += [('EXPENSE', 'GIFTS', 500, date(year, 12, 10)) for year in (2023, 2024)]
+        self.book(rows)
+        gifts = next(c for c in compute_forecast(self.user.id, today=date(2025, 11, 20), horizon=2)['categories']
+                     if c['category'] == 'GIFTS')
+        self.assertEqual([f['seasonal_naive']['value'] for f in gifts['forecast']], [0.0, 500.0])
+
+    def test_month_end_never_projects_below_what_is_booked(self):
+        self.book(self.monthly('EXPENSE', 'FOOD', 100, 12) + [('EXPENSE', 'FOOD', 900, date(2025, 1, 3))])
+        month_end = compute_forecast(self.user.id, today=date(2025, 1, 10))['month_end']
+        self.assertEqual((month_end['expenses_to_date'], month_end['projected_expenses']), (900.0, 900.0))
+        self.assertEqual(month_end['projected_balance_low'], month_end['projected_balance_high'])
+
+    def test_endpoint_validates_horizon_and_follows_new_data(self):
+        for horizon in ('0', '13', 'abc'):
+            self.assertEqual(self.client.get(f'/api/reports/forecast?horizon={horizon}').status_code, 400, horizon)
+        body = self.client.get('/api/reports/forecast?horizon=4').json()
+        self.assertEqual((len(body['months']), body['categories']), (4, []))
+
+        first = get_forecast(self.user.id)
+        self.send(self.client, 'post', '/api/expenses/', {'amount': 50, 'date': date.today().isoformat(), 'category': 'FOOD'})
+        self.assertNotEqual(get_forecast(self.user.id), first)
+        self.assertEqual(get_forecast(self.user.id)['month_end']['expenses_to_date'], 50.0)
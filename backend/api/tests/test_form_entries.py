@@ -0,0 +1,23 @@
+"""Expense form entries: creation, listing and validation."""
+from api.models import ExpenseForm
+
+from .helpers import ApiTestCase
+
+
+class FormEntryTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('user@example.com')
+        self.client = self.client_for(self.user)
+        self.workspace = self.make_workspace(self.user)
+        self.form = ExpenseForm.objects.create(name='Trip', workspace_id=self.workspace.id)
+
+    def test_writes_reject_non_integer_form_id(self):
+        for form_id in ('abc', [1], {'id': 1}):
+            response = self.send(self.client, 'post', '/api/expense-forms/entries', {'form_id': form_id, 'data': {}})
+            self.assertEqual(response.status_code, 400, form_id)
+            response = self.send(self.client, 'post', '/api/expense-forms/entries/bulk', {
+                'form_id': form_id, 'entries': [{}],
+            })
+            self.assertEqual(response.status_code, 400, form_id)
+        self.assertEqual(self.client.get('/api/expense-forms/entries?form_id=abc').status_code, 400)
@@ -0,0 +1,28 @@
+"""Profile photo decoding and thumbnails."""
+import struct
+import zlib
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from api.images import ImageRejected, make_thumbnails
+
+from .helpers import ApiTestCase
+
+
+def _png_header(width, height):
+    """A PNG that declares ``width`` x ``height`` pixels but carries no image data."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IEND', b'')
+
+
+class ProfilePhotoTests(ApiTestCase):
+    def test_decompression_bomb_is_rejected(self):
+        with self.assertRaises(ImageRejected):
+            make_thumbnails(BytesIO(_png_header(60000, 60000)))
+        client = self.client_for(self.make_user('user@example.com'))
+        upload = SimpleUploadedFile('bomb.png', _png_header(60000, 60000), content_type='image/png')
+        response = client.post('/api/profile/photo', {'photo': upload})
+        self.assertEqual(response.status_code, 400)
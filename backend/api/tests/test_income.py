@@ -0,0 +1,32 @@
+"""Income metadata (subtype, student_count) and the income statistics endpoint."""
+from .helpers import ApiTestCase
+
+
+class IncomeStatsTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('tutor@example.com')
+        self.client = self.client_for(self.user)
+
+    def add_income(self, amount, day, **extra):
+        response = self.send(self.client, 'post', '/api/income/', {'amount': amount, 'date': day, 'type': 'SALARY', **extra})
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_stats_group_by_subtype_and_month(self):
+        self.add_income(100, '2026-01-10', subtype='tutoring', student_count=3)
+        self.add_income(50, '2026-01-20', subtype='tutoring', student_count=2)
+        self.add_income(200, '2026-02-01', subtype='course', student_count=10)
+        self.add_income(999, '2025-02-01', subtype='course', student_count=1)
+
+        body = self.client.get('/api/income/stats?year=2026').json()
+        self.assertEqual(body['by_subtype'], [
+            {'subtype': 'course', 'total': 200.0, 'students': 10, 'count': 1},
+            {'subtype': 'tutoring', 'total': 150.0, 'students': 5, 'count': 2},
+        ])
+        self.assertEqual([(m['month'], m['students']) for m in body['by_month']], [(1, 5), (2, 10)])
+        body = self.client.get('/api/income/stats?year=2026&subtype=tutoring').json()
+        self.assertEqual([m['total'] for m in body['by_month']], [150.0])
+
+    def test_year_must_be_representable(self):
+        for year in ('0', '-5', '10000', '99999', 'abc'):
+            self.assertEqual(self.client.get(f'/api/income/stats?year={year}').status_code, 400, year)
@@ -0,0 +1,38 @@
+"""Notification feed parameters, long-polling and read markers."""
+from api.models import Notification
+from api.notifications import notify
+
+from .helpers import ApiTestCase
+
+
+class NotificationFeedTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('user@example.com')
+        self.client = self.client_for(self.user)
+
+    def test_feed_does_not_wait_under_wsgi(self):
+        notify([self.user.id], 'test', 'Hello')
+        response = self.client.get('/api/notifications/?since=0&wait=25')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.json()['items']), 1)
+
+    def test_feed_rejects_non_finite_wait(self):
+        for wait in ('nan', 'inf', '-inf', 'abc'):
+            response = self.client.get(f'/api/notifications/?since=0&wait={wait}')
+            self.assertEqual(response.status_code, 400, wait)
+
+    def test_feed_rejects_out_of_range_cursors(self):
+        for since in ('-1', '-99999999999999999999999', '99999999999999999999999', 'abc'):
+            response = self.client.get(f'/api/notifications/?since={since}')
+            self.assertEqual(response.status_code, 400, since)
+        self.assertEqual(self.client.get('/api/notifications/?since=0').status_code, 200)
+
+    def test_mark_read_requires_integer_ids(self):
+        notify([self.user.id], 'test', 'Hello')
+        for body in ({'ids': '12'}, {'ids': [True]}, {'ids': [1.5]}, {'ids': {'1': 1}}, {'up_to': '3'}, {'up_to': True}):
+            self.assertEqual(self.send(self.client, 'post', '/api/notifications/read', body).status_code, 400, body)
+        self.assertFalse(Notification.objects.filter(read_at__isnull=False).exists())
+        response = self.send(self.client, 'post', '/api/notifications/read', {'ids': [Notification.objects.get().id]})
+        self.assertEqual(response.json(), {'unread': 0})
@@ -0,0 +1,79 @@
+"""Monthly rollups kept by the ledger, and the range reports read from them."""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from api.ledger import BULK_KEYS, record_created, record_deleted
+from api.models import MonthlyRollup, Transaction
+from api.range_reports import range_report, rebuild_rollups
+
+from .helpers import ApiTestCase
+
+
+class RangeReportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('owner@example.com')
+        self.client = self.client_for(self.user)
+
+    def add_expense(self, amount, day, category='FOOD'):
+        response = self.send(self.client, 'post', '/api/expenses/', {'amount': amount, 'date': day, 'category': category})
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def rollups(self):
+        return {
+            (r.user_id, r.year, r.month, r.type, r.category): [r.total, r.count]
+            for r in MonthlyRollup.objects.exclude(count=0)
+        }
+
+    def assertRollupsMatch(self):
+        expected = defaultdict(lambda: [Decimal('0'), 0])
+        for t in Transaction.objects.all():
+            row = expected[(t.user_id, t.date.year, t.date.month, t.type, t.category)]
+            row[0] += t.amount
+            row[1] += 1
+        self.assertEqual(self.rollups(), dict(expected))
+
+    def test_single_writes_and_deletes_keep_rollups_in_step(self):
+        first = self.add_expense(10, '2026-03-02')
+        self.add_expense(25.5, '2026-03-15')
+        self.add_expense(7, '2026-04-01', category='RENT')
+        response = self.send(self.client, 'post', '/api/income/', {'amount': 100, 'date': '2026-03-01', 'type': 'SALARY'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.delete(f'/api/expenses/{first}/').status_code, 200)
+
+        self.assertRollupsMatch()
+        self.assertEqual(MonthlyRollup.objects.get(year=2026, month=3, type='EXPENSE').total, Decimal('25.50'))
+
+    def test_bulk_path_matches_recomputation(self):
+        rows = [
+            Transaction(user_id=self.user.id, type='EXPENSE', category=f'C{i % (BULK_KEYS + 5)}',
+                        amount=Decimal(i) + Decimal('0.25'), date=date(2026, 1 + i % 12, 1 + i % 28))
+            for i in range(BULK_KEYS * 3)
+        ]
+        Transaction.objects.bulk_create(rows)
+        created = list(Transaction.objects.all())
+        record_created(created)
+        self.assertRollupsMatch()
+
+        gone = created[::2]
+        Transaction.objects.filter(id__in=[t.id for t in gone]).delete()
+        record_deleted(gone)
+        self.assertRollupsMatch()
+
+        kept = self.rollups()
+        rebuild_rollups([self.user.id])
+        self.assertEqual(self.rollups(), kept)
+
+    def test_partial_months_at_the_edges_are_read_from_transactions(self):
+        for amount, day in ((1, '2026-01-31'), (2, '2026-02-01'), (4, '2026-02-28'), (8, '2026-03-10'), (16, '2026-03-20')):
+            self.add_expense(amount, day)
+        report = range_report(self.user.id, date(2026, 1, 15), date(2026, 3, 15), 'month')
+        self.assertEqual(report['totals']['expenses'], 15)
+        self.assertEqual([b['expenses'] for b in report['buckets']], [1, 6, 8])
+        self.assertEqual((report['buckets'][0]['start'], report['buckets'][-1]['end']), ('2026-01-15', '2026-03-15'))
+
+        response = self.client.get('/api/reports/range?start=2026-01-01&end=2026-12-31&bucket=quarter')
+        self.assertEqual([b['expenses'] for b in response.json()['buckets']], [31, 0, 0, 0])
+        self.assertEqual(self.client.get('/api/reports/range?start=2026-03-01&end=2026-01-01').status_code, 400)
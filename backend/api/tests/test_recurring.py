@@ -0,0 +1,51 @@
+"""Recurring rules: validation and materialization."""
+from datetime import date, timedelta
+
+from api.models import RecurringRule, Transaction
+from api.recurring import materialize_due
+from api.workspace_acl import remove_members
+
+from .helpers import ApiTestCase
+
+
+class RecurringRuleTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('user@example.com')
+        self.client = self.client_for(self.user)
+
+    def test_rules_stop_tagging_the_workspace_after_membership_ends(self):
+        owner = self.make_user('owner@example.com')
+        ws = self.make_workspace(owner, editor=[self.user])
+        start = date.today() - timedelta(days=1)
+        response = self.send(self.client, 'post', '/api/recurring/', {
+            'type': 'EXPENSE', 'amount': 10, 'category': 'RENT', 'frequency': 'weekly',
+            'start_date': start.isoformat(), 'weekday': start.weekday(), 'workspace_id': ws.id,
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Transaction.objects.get().workspace_id, ws.id)
+
+        remove_members(ws.id, [self.user.id])
+        rule = RecurringRule.objects.get()
+        materialize_due(rule.next_run)
+        latest = Transaction.objects.order_by('-date').first()
+        self.assertEqual(latest.date, rule.next_run)
+        self.assertIsNone(latest.workspace_id)
+
+    def test_rule_dates_are_bounded(self):
+        base = {'type': 'EXPENSE', 'amount': 5, 'category': 'RENT'}
+        for extra in ({'start_date': '9999-12-31', 'day_of_month': 1},
+                      {'start_date': '9999-12-31', 'frequency': 'weekly', 'weekday': 6},
+                      {'start_date': '2026-01-01', 'end_date': '9999-12-31'},
+                      {'start_date': '0001-01-01'}):
+            response = self.send(self.client, 'post', '/api/recurring/', {**base, **extra})
+            self.assertEqual(response.status_code, 400, extra)
+        self.assertFalse(RecurringRule.objects.exists())
+
+    def test_non_string_dates_and_frequency_are_rejected(self):
+        base = {'type': 'EXPENSE', 'amount': 5, 'category': 'RENT'}
+        for extra in ({'start_date': 20240101}, {'start_date': ['2026-01-01']}, {'end_date': 20261231},
+                      {'frequency': ['monthly']}, {'frequency': {'weekly': 1}}, {'frequency': 7}):
+            response = self.send(self.client, 'post', '/api/recurring/', {**base, **extra})
+            self.assertEqual(response.status_code, 400, extra)
+        self.assertFalse(RecurringRule.objects.exists())
@@ -0,0 +1,64 @@
+"""Monthly PDF downloads served from the content-versioned report cache."""
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.test import override_settings
+
+from api.models import ReportCacheEntry, Transaction
+
+from .helpers import ApiTestCase
+
+
+def _fake_render(user, year, month):
+    count = Transaction.objects.filter(user_id=user.id, date__year=year, date__month=month).count()
+    return BytesIO(f"%PDF-1.4 {user.id} {year}-{month} {count}".encode()), {'transaction_count': count}
+
+
+class ReportCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = self.make_user('user@example.com')
+        self.client = self.client_for(self.user)
+        render = mock.patch('api.report_jobs.render_monthly_report', side_effect=_fake_render)
+        self.render = render.start()
+        self.addCleanup(render.stop)
+
+    def add_expense(self, day):
+        response = self.send(self.client, 'post', '/api/expenses/', {'amount': 10, 'date': day, 'category': 'FOOD'})
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def download(self, **headers):
+        return self.client.get('/api/reports/monthly-pdf?year=2026&month=3', **headers)
+
+    def test_pdf_is_rendered_once_until_the_month_changes(self):
+        expense = self.add_expense('2026-03-05')
+        first = self.download()
+        self.assertEqual(b''.join(first.streaming_content), b'%PDF-1.4 ' + f'{self.user.id} 2026-3 1'.encode())
+        self.assertEqual(self.download(HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(self.render.call_count, 1)
+
+        self.add_expense('2026-04-01')  # another month leaves this report alone
+        self.assertEqual(self.download()['ETag'], first['ETag'])
+        self.client.delete(f'/api/expenses/{expense}/')
+        self.assertNotEqual(self.download()['ETag'], first['ETag'])
+        self.assertEqual((self.render.call_count, ReportCacheEntry.objects.count()), (2, 1))
+
+    def test_year_and_month_must_be_representable(self):
+        for query in ('year=0&month=1', 'year=10000&month=1', 'year=2026&month=13', 'year=abc'):
+            self.assertEqual(self.client.get(f'/api/reports/monthly-pdf?{query}').status_code, 400, query)
+        self.render.assert_not_called()
+
+    def test_delete_is_rolled_back_when_derived_state_fails(self):
+        expense = self.add_expense('2026-03-05')
+        with mock.patch('api.views.record_deleted', side_effect=RuntimeError('ledger down')), \
+                self.assertLogs('django.request', 'ERROR'), self.assertRaises(RuntimeError):
+            self.client.delete(f'/api/expenses/{expense}/')
+        self.assertTrue(Transaction.objects.filter(id=expense).exists())
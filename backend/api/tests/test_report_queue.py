@@ -0,0 +1,76 @@
+"""Report jobs: queueing, claiming and retries."""
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from api.models import Notification, Report
+from api.report_jobs import MAX_ATTEMPTS, claim_next_job, enqueue_monthly_report, requeue_stale_jobs, run_job, run_worker
+
+from .helpers import ApiTestCase
+
+
+class ReportQueueTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('reports@example.com')
+
+    def test_enqueue_reuses_pending_job(self):
+        first = enqueue_monthly_report(self.user.id, 2026, 3)
+        self.assertEqual(enqueue_monthly_report(self.user.id, 2026, 3).id, first.id)
+        first.status = Report.STATUS_DONE
+        first.save()
+        self.assertNotEqual(enqueue_monthly_report(self.user.id, 2026, 3).id, first.id)
+
+    def test_claim_takes_oldest_queued_job_once(self):
+        older = enqueue_monthly_report(self.user.id, 2026, 1)
+        newer = enqueue_monthly_report(self.user.id, 2026, 2)
+        claimed = claim_next_job()
+        self.assertEqual(claimed.id, older.id)
+        self.assertEqual((claimed.status, claimed.attempts), (Report.STATUS_RUNNING, 1))
+        self.assertEqual(claim_next_job().id, newer.id)
+        self.assertIsNone(claim_next_job())
+
+    def test_failures_are_retried_then_marked_failed(self):
+        job = enqueue_monthly_report(self.user.id, 2026, 4)
+        with mock.patch('api.report_cache.get_or_render', side_effect=RuntimeError('renderer down')), \
+                self.assertLogs('api.report_jobs', 'ERROR'):
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                claimed = claim_next_job()
+                self.assertEqual((claimed.id, claimed.attempts), (job.id, attempt))
+                run_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Report.STATUS_FAILED)
+        self.assertIn('renderer down', job.error)
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(Notification.objects.filter(user_id=self.user.id, kind='report').count(), 1)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = enqueue_monthly_report(self.user.id, 2026, 5)
+        claim_next_job()
+        Report.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(claim_next_job().id, job.id)
+
+    def test_worker_drains_queue(self):
+        enqueue_monthly_report(self.user.id, 2026, 6)
+        entry = mock.Mock(content_hash='ab' * 32, summary_data={'net': 0})
+        with mock.patch('api.report_cache.get_or_render', return_value=entry):
+            self.assertEqual(run_worker(once=True), 1)
+        self.assertEqual(Report.objects.get().status, Report.STATUS_DONE)
+
+    def test_history_pagination_is_validated(self):
+        client = self.client_for(self.user)
+        for query in ('page=abc', 'page_size=abc', 'page=1.5'):
+            self.assertEqual(client.get(f'/api/reports/jobs?{query}').status_code, 400, query)
+        response = client.get('/api/reports/jobs?page_size=0&page=-2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['page'], response.json()['page_size']), (1, 1))
+        self.assertEqual(client.get('/api/reports/jobs?page_size=5000').json()['page_size'], 100)
+
+    def test_jobs_are_only_queued_for_representable_months(self):
+        client = self.client_for(self.user)
+        for body in ({'year': 0, 'month': 1}, {'year': 10000, 'month': 1}, {'year': 2026, 'month': 13}, {'year': 'x'}):
+            self.assertEqual(self.send(client, 'post', '/api/reports/jobs', body).status_code, 400, body)
+        self.assertFalse(Report.objects.exists())
+        self.assertEqual(self.send(client, 'post', '/api/reports/jobs', {'year': 2026, 'month': 2}).status_code, 202)
@@ -0,0 +1,54 @@
+"""Full-text transaction search: ranking, index upkeep and paging."""
+from api.models import Transaction
+from api.search import MAX_PAGE
+
+from .helpers import ApiTestCase
+
+
+class TransactionSearchTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('user@example.com')
+        self.client = self.client_for(self.user)
+
+    def add_expense(self, category, comment, user=None):
+        response = self.send(self.client_for(user) if user else self.client, 'post', '/api/expenses/', {
+            'amount': 5, 'date': '2026-03-01', 'category': category, 'comment': comment,
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def search(self, query):
+        response = self.client.get(f'/api/transactions/search?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_category_matches_rank_above_description_matches(self):
+        in_description = self.add_expense('FOOD', 'coffee with the travel agent')
+        in_category = self.add_expense('TRAVEL', 'train to Berlin')
+        self.add_expense('RENT', 'March rent')
+        self.add_expense('TRAVEL', 'another user', user=self.make_user('other@example.com'))
+
+        results = self.search('q=travel')['results']
+        self.assertEqual([r['id'] for r in results], [in_category, in_description])
+        # Terms are prefixes and every term must match.
+        self.assertEqual([r['id'] for r in self.search('q=ber trav')['results']], [in_category])
+        self.assertEqual(self.search('q=travel&type=INCOME')['results'], [])
+
+    def test_index_follows_updates_and_deletes(self):
+        tx_id = self.add_expense('FOOD', 'pizza night')
+        Transaction.objects.filter(id=tx_id).update(description='sushi night')
+        self.assertEqual(self.search('q=pizza')['results'], [])
+        self.assertEqual([r['id'] for r in self.search('q=sushi')['results']], [tx_id])
+        self.assertEqual(self.client.delete(f'/api/expenses/{tx_id}/').status_code, 200)
+        self.assertEqual(self.search('q=sushi')['results'], [])
+
+    def test_pages_and_page_bounds(self):
+        ids = [self.add_expense('BOOKS', f'novel {i}') for i in range(3)]
+        first = self.search('q=novel&page_size=2')
+        second = self.search('q=novel&page_size=2&page=2')
+        self.assertTrue(first['has_more'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual(sorted(r['id'] for r in first['results'] + second['results']), ids)
+        for query in ('page=abc', f'page={MAX_PAGE + 1}', 'page=99999999999999999999999'):
+            self.assertEqual(self.client.get(f'/api/transactions/search?q=novel&{query}').status_code, 400, query)
@@ -0,0 +1,77 @@
+"""Admin user directory: search, counters and bulk actions."""
+from django.db.models import Count
+
+from api.models import User
+from api.user_directory import MAX_PAGE, rebuild_counters, user_counts
+
+from .helpers import ApiTestCase
+
+
+class UserDirectoryTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.client_for(self.make_user('admin@example.com', role='admin'))
+
+    def listing(self, query=''):
+        response = self.admin.get(f'/api/admin/users/?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def assertCountsMatch(self):
+        by_status = dict(User.objects.order_by().values_list('status').annotate(n=Count('id')))
+        counts = user_counts()
+        self.assertEqual(counts['by_status'], by_status)
+        self.assertEqual(counts['total'], User.objects.count())
+        self.assertEqual(counts['locked'], User.objects.filter(is_locked=True).count())
+
+    def test_search_is_a_case_insensitive_prefix_on_email_or_name(self):
+        alice = User.objects.create(email='Alice.Smith@example.com', full_name='Alice Smith', status='approved')
+        bob = User.objects.create(email='bob@example.com', full_name='Alina Brown', status='pending')
+        User.objects.create(email='carol@example.com', full_name='Carol Alford', status='approved')
+
+        body = self.listing('q=ALI&sort=-email')
+        self.assertEqual([u['id'] for u in body['users']], [bob.id, alice.id])
+        self.assertIsNone(body['total'])
+        self.assertEqual([u['id'] for u in self.listing('q=ali&status=pending')['users']], [bob.id])
+        self.assertEqual(self.listing('q=smith')['users'], [])
+
+        body = self.listing('status=pending&page_size=1')
+        self.assertEqual((body['total'], body['has_more']), (User.objects.filter(status='pending').count(), False))
+        self.assertEqual(self.admin.get('/api/admin/users/?sort=age').status_code, 400)
+
+    def test_counters_follow_saves_deletes_and_bulk_actions(self):
+        users = [self.make_user(f'u{i}@example.com', status='pending') for i in range(3)]
+        self.assertCountsMatch()
+        users[0].status = 'approved'
+        users[0].save()
+        users[1].delete()
+        self.send(self.admin, 'post', '/api/admin/users/bulk/lock/', {'user_ids': [users[0].id, users[2].id]})
+        self.send(self.admin, 'post', '/api/admin/users/bulk/reject/', {'user_ids': [users[2].id]})
+        self.assertCountsMatch()
+        self.assertEqual(self.listing()['counts'], user_counts())
+
+        before = user_counts()
+        rebuild_counters()
+        self.assertEqual(user_counts(), before)
+
+    def test_page_is_bounded(self):
+        for page in ('abc', MAX_PAGE + 1, '99999999999999999999999'):
+            self.assertEqual(self.admin.get(f'/api/admin/users/?page={page}').status_code, 400, page)
+        self.assertEqual(self.listing(f'page={MAX_PAGE}')['users'], [])
+
+
+class BulkUserActionTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.client_for(self.make_user('admin@example.com', role='admin'))
+
+    def test_user_ids_must_be_a_list_of_integers(self):
+        pending = self.make_user('pending@example.com', status='pending')
+        for user_ids in ('12', [True], [float(pending.id)], None, []):
+            response = self.send(self.admin, 'post', '/api/admin/users/bulk/approve/', {'user_ids': user_ids})
+            self.assertEqual(response.status_code, 400, user_ids)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'pending')
+        response = self.send(self.admin, 'post', '/api/admin/users/bulk/approve/', {'user_ids': [pending.id]})
+        self.assertEqual(response.json()['updated'], [pending.id])
+        self.assertEqual(User.objects.get(id=pending.id).status, 'approved')
@@ -0,0 +1,63 @@
+"""Workspace permission checks: outsiders and viewers must not read or write a workspace's data."""
+from api.models import ExpenseEntry, ExpenseForm
+
+from .helpers import ApiTestCase
+
+
+class WorkspaceAclTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = self.make_user('owner@example.com')
+        self.editor = self.make_user('editor@example.com')
+        self.viewer = self.make_user('viewer@example.com')
+        self.outsider = self.make_user('outsider@example.com')
+        self.ws = self.make_workspace(self.owner, editor=[self.editor], viewer=[self.viewer])
+        self.other_ws = self.make_workspace(self.outsider)
+        self.form = ExpenseForm.objects.create(name='Trip', workspace_id=self.ws.id)
+
+    def test_outsider_cannot_read_workspace_forms_or_entries(self):
+        client = self.client_for(self.outsider)
+        self.assertIn(client.get(f'/api/expense-forms/?workspace_id={self.ws.id}').status_code, (403, 404))
+        self.assertIn(client.get(f'/api/expense-forms/entries?form_id={self.form.id}').status_code, (403, 404))
+        self.assertIn(client.get(f'/api/budgets/?workspace_id={self.ws.id}').status_code, (403, 404))
+        self.assertEqual(client.get(f'/api/reports/category-stats?workspace_id={self.ws.id}').status_code, 404)
+
+    def test_entry_writes_are_checked_against_the_forms_workspace(self):
+        outsider = self.client_for(self.outsider)
+        # Naming a workspace the caller controls must not unlock someone else's form.
+        response = self.send(outsider, 'post', '/api/expense-forms/entries', {
+            'form_id': self.form.id, 'workspace_id': self.other_ws.id, 'data': {},
+        })
+        self.assertEqual(response.status_code, 400)
+        response = self.send(outsider, 'post', '/api/expense-forms/entries', {'form_id': self.form.id, 'data': {}})
+        self.assertEqual(response.status_code, 403)
+        response = self.send(outsider, 'post', '/api/expense-forms/entries/bulk', {
+            'form_id': self.form.id, 'workspace_id': self.other_ws.id, 'entries': [{}],
+        })
+        self.assertEqual(response.status_code, 400)
+        response = self.send(self.client_for(self.viewer), 'post', '/api/expense-forms/entries/bulk', {
+            'form_id': self.form.id, 'entries': [{}],
+        })
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ExpenseEntry.objects.exists())
+
+        response = self.send(self.client_for(self.editor), 'post', '/api/expense-forms/entries', {
+            'form_id': self.form.id, 'data': {},
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(ExpenseEntry.objects.get().workspace_id, self.ws.id)
+
+    def test_viewer_cannot_delete_entries(self):
+        entry = ExpenseEntry.objects.create(form_id=self.form.id, workspace_id=self.ws.id, creator_id=self.owner.id, data={})
+        self.assertEqual(self.client_for(self.viewer).delete(f'/api/expense-forms/entries/{entry.id}').status_code, 403)
+        self.assertTrue(ExpenseEntry.objects.filter(id=entry.id).exists())
+
+    def test_only_owners_manage_budgets_and_members(self):
+        editor = self.client_for(self.editor)
+        response = self.send(editor, 'post', '/api/budgets/', {'amount': 50, 'workspace_id': self.ws.id})
+        self.assertEqual(response.status_code, 403)
+        response = self.send(editor, 'post', f'/api/workspaces/{self.ws.id}/members', {
+            'email': self.outsider.email, 'role': 'owner',
+        })
+        self.assertIn(response.status_code, (403, 404))
+        self.assertEqual(self.client_for(self.editor).delete(f'/api/workspaces/{self.ws.id}/').status_code, 404)
@@ -0,0 +1,106 @@
+"""Soft-deleting workspaces, the chunked purge worker and orphan reconciliation."""
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.form_analytics import set_projection
+from api.models import (
+    Budget, ExpenseEntry, ExpenseEntryValue, ExpenseField, ExpenseForm, MonthlyRollup, PurgeJob, Transaction, Workspace,
+    WorkspaceMember,
+)
+from api.workspace_purge import claim_next_job, run_job, run_worker
+
+from .helpers import ApiTestCase
+
+
+class WorkspacePurgeTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.make_user('owner@example.com')
+        self.client = self.client_for(self.user)
+
+    def populate(self, ws, entries=5):
+        response = self.send(self.client, 'post', '/api/expense-forms/', {
+            'workspace_id': ws.id, 'name': 'Trip', 'fields': [{'label': 'Cost', 'field_type': 'number'}],
+        })
+        form = response.json()
+        set_projection(form['id'], True)
+        self.send(self.client, 'post', '/api/expense-forms/entries/bulk', {
+            'form_id': form['id'], 'entries': [{str(form['fields'][0]['id']): i} for i in range(entries)],
+        })
+        for day in ('2026-03-01', '2026-03-02'):
+            self.send(self.client, 'post', '/api/expenses/', {
+                'amount': 10, 'date': day, 'category': 'FOOD', 'workspace_id': ws.id,
+            })
+        Budget.objects.create(user_id=self.user.id, workspace_id=ws.id, amount=Decimal('100'))
+
+    def remaining(self, ws_id):
+        form_ids = ExpenseForm.objects.filter(workspace_id=ws_id).values('id')
+        return {
+            'values': ExpenseEntryValue.objects.filter(form_id__in=form_ids).count(),
+            'entries': ExpenseEntry.objects.filter(workspace_id=ws_id).count(),
+            'fields': ExpenseField.objects.filter(form_id__in=form_ids).count(),
+            'forms': ExpenseForm.objects.filter(workspace_id=ws_id).count(),
+            'transactions': Transaction.objects.filter(workspace_id=ws_id).count(),
+            'budgets': Budget.objects.filter(workspace_id=ws_id).count(),
+            'members': WorkspaceMember.objects.filter(workspace_id=ws_id).count(),
+        }
+
+    def test_delete_hides_the_workspace_and_the_worker_purges_it_in_chunks(self):
+        doomed, kept = self.make_workspace(self.user), self.make_workspace(self.user)
+        self.populate(doomed)
+        self.populate(kept)
+        before = self.remaining(kept.id)
+
+        response = self.client.delete(f'/api/workspaces/{doomed.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f'/api/expense-forms/?workspace_id={doomed.id}').status_code, 403)
+        self.assertEqual(self.client.delete(f'/api/workspaces/{doomed.id}/').status_code, 404)
+
+        self.assertEqual(run_worker(once=True, chunk_size=2, pause=0), 1)
+        job = PurgeJob.objects.get(id=response.json()['purge_job_id'])
+        self.assertEqual(job.status, PurgeJob.STATUS_DONE)
+        self.assertEqual((job.progress['expense_entries'], job.progress['transactions']), (5, 2))
+        self.assertFalse(Workspace.objects.filter(id=doomed.id).exists())
+        self.assertFalse(any(self.remaining(doomed.id).values()))
+        self.assertEqual(self.remaining(kept.id), before)
+        # The purged expenses left the rollups through the ledger.
+        self.assertEqual(MonthlyRollup.objects.get(year=2026, month=3).total, Decimal('20'))
+
+    def test_failed_job_is_requeued_and_resumes(self):
+        ws = self.make_workspace(self.user)
+        self.populate(ws)
+        self.client.delete(f'/api/workspaces/{ws.id}/')
+        job = claim_next_job()
+        with mock.patch('api.workspace_purge.record_deleted', side_effect=RuntimeError('ledger down')), \
+                self.assertLogs('api.workspace_purge', 'ERROR'):
+            run_job(job, chunk_size=2, pause=0)
+        self.assertEqual((job.status, job.error), (PurgeJob.STATUS_QUEUED, 'ledger down'))
+        self.assertEqual(self.remaining(ws.id)['entries'], 0)
+        self.assertEqual(self.remaining(ws.id)['transactions'], 2)
+
+        self.assertEqual(run_worker(once=True, chunk_size=2, pause=0), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (PurgeJob.STATUS_DONE, 2))
+        self.assertFalse(Workspace.objects.filter(id=ws.id).exists())
+
+    def test_reconcile_removes_orphans_detaches_transactions_and_queues_purges(self):
+        ws = self.make_workspace(self.user)
+        self.populate(ws, entries=3)
+        lost = Workspace.objects.create(name='Lost', slug='lost', owner_id=self.user.id, deleted_at=timezone.now())
+        # Rows left behind by a workspace deleted before purging existed.
+        Workspace.objects.filter(id=ws.id).delete()
+
+        out = StringIO()
+        call_command('reconcile_orphans', '--dry-run', stdout=out)
+        self.assertIn('expense_entries: 3 orphan(s)', out.getvalue())
+        self.assertIn('transactions: 2 to detach', out.getvalue())
+        self.assertEqual(ExpenseEntry.objects.count(), 3)
+
+        call_command('reconcile_orphans', '--pause', '0', stdout=StringIO())
+        self.assertFalse(any(v for k, v in self.remaining(ws.id).items() if k != 'transactions'))
+        self.assertEqual(Transaction.objects.filter(workspace_id__isnull=True).count(), 2)
+        self.assertEqual(list(PurgeJob.objects.values_list('workspace_id', flat=True)), [lost.id])
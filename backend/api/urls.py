@@ -23,14 +23,35 @@ urlpatterns = [
     path('expenses/categories', views.stub_expense_categories),
     path('income/', views.income_view),
     path('income/<int:income_id>/', views.income_delete),
+    path('income/stats', views.income_stats_view),
+    path('transactions/search', views.transactions_search_view),
+    path('transactions/export', views.transactions_export_view),
     path('workspaces/', views.workspaces_view),
     path('workspaces/<int:workspace_id>/', views.workspaces_delete),
+    path('workspaces/<int:workspace_id>/members', views.workspace_members_view),
+    path('workspaces/<int:workspace_id>/members/<int:member_id>', views.workspace_member_detail),
     path('expense-forms/', views.expense_forms_view),
     path('expense-forms/entries', views.expense_entries_view),
+    path('expense-forms/entries/bulk', views.expense_entries_bulk),
     path('expense-forms/entries/<int:entry_id>', views.expense_entries_delete),
+    path('expense-forms/<int:form_id>/analytics', views.expense_form_analytics),
     path('dashboard/summary', views.real_dashboard_summary),
     path('reports/monthly-pdf', views.monthly_report_pdf_view),
+    path('reports/range', views.range_report_view),
+    path('reports/range-pdf', views.range_report_pdf_view),
+    path('reports/forecast', views.forecast_view),
+    path('reports/category-stats', views.category_stats_view),
+    path('budgets/', views.budgets_view),
+    path('budgets/<int:budget_id>/', views.budget_detail),
+    path('recurring/', views.recurring_rules_view),
+    path('recurring/<int:rule_id>/', views.recurring_rule_detail),
+    path('reports/jobs', views.report_jobs_view),
+    path('reports/jobs/<int:report_id>', views.report_job_detail),
+    path('reports/jobs/<int:report_id>/download', views.report_job_download),
     path('assistant/query', views.assistant_query_view),
+    path('notifications/', views.notifications_list),
+    path('notifications/unread-count', views.notifications_unread_count),
+    path('notifications/read', views.notifications_mark_read),
     path('profile/update', views.profile_update),
     path('profile/photo', views.profile_photo_upload),
     path('users/', views.stub_users),
@@ -39,12 +60,14 @@ urlpatterns = [
     # Admin-only (RBAC)
     path('admin/activity-logs', admin_views.activity_logs_list),
     path('admin/activity-logs/export', admin_views.activity_logs_export),
+    path('admin/activity-stream', admin_views.activity_stream_view),
     path('admin/form-logs', admin_views.form_logs_list),
     path('admin/error-logs', admin_views.error_logs_list),
     path('admin/support-tickets', admin_views.support_tickets_list),
     path('admin/support-tickets/<int:ticket_id>/respond', admin_views.support_ticket_respond),
     path('admin/settings', admin_views.settings_view),
     path('admin/users/', admin_views.users_list),
+    path('admin/users/bulk/<str:action>/', admin_views.users_bulk_action),
     path('admin/users/<int:user_id>/lock/', admin_views.user_lock),
     path('admin/users/<int:user_id>/approve/', admin_views.user_approve),
     path('admin/users/<int:user_id>/reject/', admin_views.user_reject),
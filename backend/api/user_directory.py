@@ -0,0 +1,250 @@
+"""Admin user directory: paginated listing with prefix search and maintained counts.
+
+Search is a case-insensitive prefix match on email or full name. It is written
+as a range on ``Lower(column)`` so it uses the functional indexes on ``api_user``
+on every backend, where ``LIKE``/``ILIKE`` would often scan. Sorting by email or name
+uses the same indexes.
+
+Per-role/status/locked counts come from ``UserCounter`` rows. ``track_user_saved``
+and ``track_user_deleted`` (connected in ``ApiConfig.ready``) adjust them on every
+``save()``/``delete()`` of a user. Code that changes users with a queryset
+``update()`` must report the change through ``apply_counter_deltas`` itself. Run
+``manage.py rebuild_user_counters`` if the counters ever drift.
+
+``bulk_user_action`` applies an admin action (approve, reject, lock, unlock,
+force logout) to many users at once. It runs one locking read, one ``UPDATE``
+and one ``bulk_create`` of audit entries, whatever the number of users.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Lower
+
+from .activity_stream import notify_written
+from .models import ActivityLog, User, UserCounter
+from .notifications import notify_account_action
+from .services import get_client_ip, get_user_agent
+
+MAX_PAGE_SIZE = 100
+DEFAULT_PAGE_SIZE = 25
+# Offset paging reads and discards every earlier row; deep pages should narrow the search instead.
+MAX_PAGE = 1000
+SORTS = {
+    'email': ('email_lower',),
+    'name': ('name_lower', 'email_lower'),
+    'joined': ('date_joined',),
+}
+KEY_FIELDS = ('role', 'status', 'is_locked')
+ADMIN_ROLES = ('admin', 'super_admin')
+MAX_BULK_USERS = 1000
+# action: (field updates, audit action, whether admins and the caller themselves are protected)
+BULK_ACTIONS = {
+    'approve': ({'status': 'approved'}, 'USER_APPROVE', False),
+    'reject': ({'status': 'rejected', 'token_version': F('token_version') + 1}, 'USER_REJECT', True),
+    'lock': ({'is_locked': True}, 'USER_LOCK', True),
+    'unlock': ({'is_locked': False}, 'USER_UNLOCK', True),
+    'force-logout': ({'token_version': F('token_version') + 1}, 'FORCE_LOGOUT', True),
+}
+
+
+def counter_key(user):
+    """``(role, status, is_locked)`` of a loaded user, or None if one of them is deferred."""
+    if any(name not in user.__dict__ for name in KEY_FIELDS):
+        return None
+    return (user.role, user.status, bool(user.is_locked))
+
+
+def apply_counter_deltas(deltas):
+    """Apply ``{(role, status, is_locked): +n/-n}`` to the counters."""
+    deltas = {key: n for key, n in deltas.items() if n}
+    if not deltas:
+        return
+    UserCounter.objects.bulk_create(
+        [UserCounter(role=r, status=s, is_locked=l) for r, s, l in deltas], ignore_conflicts=True,
+    )
+    for (role, status, is_locked), n in deltas.items():
+        UserCounter.objects.filter(role=role, status=status, is_locked=is_locked).update(count=F('count') + n)
+
+
+def moved(before, after):
+    """Counter deltas for users whose keys changed from ``before`` to ``after`` (iterables of keys)."""
+    deltas = Counter(after)
+    deltas.subtract(before)
+    return deltas
+
+
+def remember_key(sender, instance, **kwargs):
+    instance._counter_key = counter_key(instance)
+
+
+def track_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not set(KEY_FIELDS) & set(update_fields):
+        return
+    before = None if created else getattr(instance, '_counter_key', None)
+    after = counter_key(instance)
+    if after is None or (before is None and not created):
+        return
+    if before != after:
+        apply_counter_deltas(moved([before] if before else [], [after]))
+    instance._counter_key = after
+
+
+def track_user_deleted(sender, instance, **kwargs):
+    key = getattr(instance, '_counter_key', None) or counter_key(instance)
+    if key is not None:
+        apply_counter_deltas({key: -1})
+
+
+def rebuild_counters():
+    """Recount users into ``UserCounter`` from scratch; returns the number of rows written."""
+    rows = User.objects.order_by().values(*KEY_FIELDS).annotate(n=Count('id'))
+    UserCounter.objects.all().delete()
+    UserCounter.objects.bulk_create([
+        UserCounter(role=r['role'], status=r['status'], is_locked=r['is_locked'], count=r['n']) for r in rows
+    ])
+    return len(rows)
+
+
+def bulk_user_action(request, action, user_ids):
+    """Apply ``action`` to ``user_ids`` on behalf of ``request.user``.
+
+    Only a super_admin may act on admins, and nobody may lock, reject or log out
+    themselves this way. These users are reported as ``forbidden`` and left
+    untouched. The rule is also part of the ``UPDATE``'s WHERE clause, so a role
+    change racing with the request cannot slip through. Returns ``{'updated',
+    'not_found', 'forbidden'}`` id lists.
+    """
+    fields, audit_action, protected = BULK_ACTIONS[action]
+    actor = request.user
+    ids = set(user_ids)
+    with transaction.atomic():
+        targets = list(
+            User.objects.select_for_update().filter(id__in=ids).values_list('id', 'email', *KEY_FIELDS)
+        )
+        allowed, forbidden = [], []
+        for target in targets:
+            if protected and (target[0] == actor.id or (target[2] in ADMIN_ROLES and actor.role != 'super_admin')):
+                forbidden.append(target)
+            else:
+                allowed.append(target)
+        if allowed:
+            qs = User.objects.filter(id__in=[t[0] for t in allowed])
+            if protected:
+                qs = qs.exclude(id=actor.id)
+                if actor.role != 'super_admin':
+                    qs = qs.exclude(role__in=ADMIN_ROLES)
+            qs.update(**fields)
+            new_status, new_locked = fields.get('status'), fields.get('is_locked')
+            before = [tuple(t[2:]) for t in allowed]
+            after = [(r, new_status or s, l if new_locked is None else new_locked) for r, s, l in before]
+            apply_counter_deltas(moved(before, after))
+            ip, device = get_client_ip(request) or None, get_user_agent(request)
+            ActivityLog.objects.bulk_create([
+                ActivityLog(
+                    user_id=actor.id, user_email=actor.email, user_name=actor.full_name or '', action=audit_action,
+                    ip_address=ip, device=device, details=f"Target: {email} (bulk)",
+                )
+                for _, email, *_ in allowed
+            ])
+            notify_written()
+            notify_account_action(audit_action, [t[0] for t in allowed])
+    return {
+        'updated': sorted(t[0] for t in allowed),
+        'not_found': sorted(ids - {t[0] for t in targets}),
+        'forbidden': sorted(t[0] for t in forbidden),
+    }
+
+
+def user_counts():
+    """Totals by status, by role and locked, from the counter rows (one query)."""
+    counts = {'total': 0, 'locked': 0, 'by_status': {}, 'by_role': {}}
+    for row in UserCounter.objects.filter(count__gt=0):
+        counts['total'] += row.count
+        counts['by_status'][row.status] = counts['by_status'].get(row.status, 0) + row.count
+        counts['by_role'][row.role] = counts['by_role'].get(row.role, 0) + row.count
+        if row.is_locked:
+            counts['locked'] += row.count
+    return counts
+
+
+def _prefix(column, text):
+    """Case-insensitive ``column`` prefix match as an index range on ``Lower(column)``."""
+    upper = text[:-1] + chr(ord(text[-1]) + 1)
+    # The startswith check keeps the result exact whatever the database collation does with the range.
+    return Q(**{f'{column}__gte': text, f'{column}__lt': upper, f'{column}__startswith': text})
+
+
+def parse_filters(params):
+    """Validate ``?q=&role=&status=&locked=&sort=`` into a filter dict; raises ValueError."""
+    locked = (params.get('locked') or '').lower()
+    if locked not in ('', 'true', 'false', '1', '0'):
+        raise ValueError("locked must be true or false")
+    sort = params.get('sort') or 'email'
+    if sort.lstrip('-') not in SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)} (prefix - for descending)")
+    return {
+        'q': (params.get('q') or '').strip().lower()[:255],
+        'role': (params.get('role') or '').strip(),
+        'status': (params.get('status') or '').strip(),
+        'locked': None if not locked else locked in ('true', '1'),
+        'sort': sort,
+    }
+
+
+def _filtered_total(filters):
+    """Row count for attribute-only filters, summed from the counters."""
+    rows = UserCounter.objects.all()
+    if filters['role']:
+        rows = rows.filter(role=filters['role'])
+    if filters['status']:
+        rows = rows.filter(status=filters['status'])
+    if filters['locked'] is not None:
+        rows = rows.filter(is_locked=filters['locked'])
+    return rows.aggregate(n=Sum('count'))['n'] or 0
+
+
+def list_users(filters, page=1, page_size=DEFAULT_PAGE_SIZE):
+    """One page of users plus ``has_more``; ``total`` is exact unless a search term is given.
+
+    A search total would need a count over the matches. Without a search the
+    counters give the total for free. The page itself is fetched with one extra
+    row to tell whether another page follows.
+    """
+    qs = User.objects.annotate(email_lower=Lower('email'), name_lower=Lower('full_name'))
+    if filters['q']:
+        qs = qs.filter(_prefix('email_lower', filters['q']) | _prefix('name_lower', filters['q']))
+    if filters['role']:
+        qs = qs.filter(role=filters['role'])
+    if filters['status']:
+        qs = qs.filter(status=filters['status'])
+    if filters['locked'] is not None:
+        qs = qs.filter(is_locked=filters['locked'])
+    sort = filters['sort']
+    descending = sort.startswith('-')
+    order = [f"{'-' if descending else ''}{f}" for f in (*SORTS[sort.lstrip('-')], 'id')]
+    offset = (page - 1) * page_size
+    rows = list(qs.order_by(*order).only(
+        'id', 'email', 'full_name', 'role', 'status', 'is_active', 'is_locked', 'date_joined', 'last_login',
+    )[offset:offset + page_size + 1])
+    return {
+        'users': [user_to_json(u) for u in rows[:page_size]],
+        'total': None if filters['q'] else _filtered_total(filters),
+        'page': page,
+        'page_size': page_size,
+        'has_more': len(rows) > page_size,
+    }
+
+
+def user_to_json(user):
+    return {
+        'id': user.id,
+        'email': user.email,
+        'full_name': user.full_name,
+        'role': user.role,
+        'status': user.status,
+        'is_active': user.is_active,
+        'is_locked': user.is_locked,
+        'date_joined': user.date_joined.isoformat() if user.date_joined else None,
+        'last_login': user.last_login.isoformat() if user.last_login else None,
+    }
@@ -1,24 +1,30 @@
 import json
-import os
+import secrets
 import datetime as dt
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import FileResponse, HttpResponseNotAllowed, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
+from django.utils.http import http_date, quote_etag
+from django.utils.text import slugify
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
 
 from .models import (
-    User, ActivityLog, FormLog, ErrorLog, Workspace, ExpenseForm, 
-    ExpenseField, ExpenseEntry, Transaction, Report
+    User, ActivityLog, FormLog, ErrorLog, Workspace, WorkspaceMember, ExpenseForm, 
+    ExpenseField, ExpenseEntry, Transaction, Report, Budget, BudgetUsage, RecurringRule
 )
-from .permissions import require_auth, require_admin
+from .permissions import require_auth, require_auth_async, require_admin
 from .services import (
     get_client_ip,
     get_user_agent,
     log_activity,
     send_alert_to_admin,
     count_recent_failed_logins,
-    generate_monthly_report_pdf
+    generate_range_report_pdf,
 )
 from .auth_utils import (
     create_access_token,
@@ -26,8 +32,37 @@ from .auth_utils import (
     decode_token,
 )
 from .rate_limit import check_rate_limit, incr_rate_limit
-from django.db.models import Sum
+from .search import MAX_PAGE as MAX_SEARCH_PAGE, search_transactions
+from .exports import EXPORT_FORMATS, export_queryset, gzip_stream, iter_export
+from .report_jobs import enqueue_monthly_report, report_to_json
+from .report_cache import content_storage_name, get_or_render as get_cached_report
+from .ledger import record_created, record_deleted
+from .range_reports import parse_range, range_report
+from .images import ImageRejected, set_profile_photo
+from .form_schema import MAX_BULK_ENTRIES, EntryInvalid, clean_entries, compile_forms, get_compiled_form, validate_field_definitions, workspace_forms
+from .form_analytics import GROUP_BY_MONTH, form_aggregate, project_entries, unproject_entries
+from .entry_listing import ListingError, list_entries
+from .workspace_acl import EDIT, MANAGE, VIEW, add_member, has_access, remove_members, request_roles
+from .workspace_purge import soft_delete_workspace
+from .assistant import answer as assistant_answer
+from .forecasting import DEFAULT_HORIZON, MAX_HORIZON, get_forecast
+from .budgets import budget_status, check_thresholds, clean_thresholds
+from .category_stats import DEFAULT_SIGMA, category_statistics, check_anomaly, user_scope, workspace_scope
+from .notifications import (
+    counter as notification_counter, feed as notification_feed, mark_read as mark_notifications_read, notify,
+    parse_feed_params, wait_for_new,
+)
+from .recurring import clean_rule, materialize_rules, rule_to_json, schedule_changed
+from django.db.models import Sum, Count
+from django.db.models.functions import ExtractMonth
 from datetime import date
+from decimal import Decimal, InvalidOperation
+
+def _photo_urls(user):
+    return {
+        "url": user.profile_thumbnail.url if user.profile_thumbnail else (user.profile_photo.url if user.profile_photo else ""),
+        "jpeg_url": user.profile_photo.url if user.profile_photo else "",
+    }
 
 def _user_to_json(user):
     return {
@@ -36,6 +71,7 @@ def _user_to_json(user):
         "full_name": user.full_name or (user.email.split("@")[0] if user.email else ""),
         "role": user.role,
         "status": user.status,
+        "profile_photo_url": _photo_urls(user)["url"],
     }
 
 @require_http_methods(["GET"])
@@ -260,6 +296,7 @@ def password_change(request):
     user.set_password(new_password)
     user.save(update_fields=['password'])
     log_activity(user.id, user.email, user.full_name or '', 'PASSWORD_CHANGED', request, status='Success')
+    notify([user.id], 'security', 'Your password was changed')
     send_alert_to_admin('PASSWORD_CHANGED', user.email, user.full_name or '', get_client_ip(request), get_user_agent(request), timezone.now().strftime("%Y-%m-%d %H:%M"))
     return JsonResponse({"message": "Password changed successfully"})
 
@@ -314,19 +351,29 @@ def expenses_view(request):
         else:
             date_obj = date_val
 
+        workspace_id = data.get("workspace_id")
+        if workspace_id is not None and not has_access(request, workspace_id, EDIT):
+            return JsonResponse({"detail": "Workspace not found"}, status=404)
+
         from django.db import transaction
         with transaction.atomic():
             t = Transaction.objects.create(
                 user_id=user.id,
-                workspace_id=data.get("workspace_id"),
+                workspace_id=workspace_id,
                 type='EXPENSE',
                 category=data.get("category", "AUTRE"),
                 amount=amount,
                 date=date_obj,
                 description=data.get("comment", "")
             )
+            record_created([t])
         log_activity(user.id, user.email, user.full_name or '', 'CREATE_EXPENSE', request, status='Success', details=f"Amount: {t.amount}")
-        return JsonResponse({"id": t.id, "category": t.category, "amount": float(t.amount), "date": t.date.isoformat()}, status=201)
+        payload = {"id": t.id, "category": t.category, "amount": float(t.amount), "date": t.date.isoformat()}
+        anomaly = check_anomaly(t)
+        if anomaly:
+            payload["anomaly"] = anomaly
+            log_activity(user.id, user.email, user.full_name or '', 'EXPENSE_ANOMALY', request, details=f"Expense {t.id}: {t.amount} in {t.category} is {anomaly['z']} std above its mean {anomaly['mean']}")
+        return JsonResponse(payload, status=201)
     
     expenses = Transaction.objects.filter(user_id=user.id, type='EXPENSE').order_by("-date")
     return JsonResponse([{"id": e.id, "category": e.category, "amount": float(e.amount), "date": e.date.isoformat(), "comment": e.description} for e in expenses], safe=False)
@@ -339,7 +386,10 @@ def expense_delete(request, expense_id):
     t = Transaction.objects.filter(id=expense_id, user_id=user.id, type='EXPENSE').first()
     if not t:
         return JsonResponse({"detail": "Not found"}, status=404)
-    t.delete()
+    from django.db import transaction
+    with transaction.atomic():
+        t.delete()
+        record_deleted([t])
     return JsonResponse({"message": "Deleted"})
 
 @require_http_methods(["GET", "POST"])
@@ -371,21 +421,32 @@ def income_view(request):
         else:
             date_obj = date_val
 
+        try:
+            student_count = int(data.get("student_count") or 0)
+        except (ValueError, TypeError):
+            return JsonResponse({"detail": "Invalid student_count"}, status=400)
+        if student_count < 0:
+            return JsonResponse({"detail": "student_count cannot be negative"}, status=400)
+        subtype = str(data.get("subtype") or "")[:100]
+
+        workspace_id = data.get("workspace_id")
+        if workspace_id is not None and not has_access(request, workspace_id, EDIT):
+            return JsonResponse({"detail": "Workspace not found"}, status=404)
+
         from django.db import transaction
         with transaction.atomic():
             t = Transaction.objects.create(
                 user_id=user.id,
-                workspace_id=data.get("workspace_id"),
+                workspace_id=workspace_id,
                 type='INCOME',
                 category=data.get("type") or data.get("category", "AUTRE"), # Use 'type' from payload as category
                 amount=amount,
                 date=date_obj,
                 description=data.get("comment", ""),
-                metadata={
-                    "subtype": data.get("subtype", ""),
-                    "student_count": data.get("student_count", 0)
-                }
+                subtype=subtype,
+                student_count=student_count,
             )
+            record_created([t])
         log_activity(user.id, user.email, user.full_name or '', 'CREATE_INCOME', request, status='Success', details=f"Amount: {t.amount}")
         return JsonResponse({"id": t.id, "type": t.category, "amount": float(t.amount), "date": t.date.isoformat()}, status=201)
     
@@ -398,11 +459,53 @@ def income_view(request):
             "amount": float(i.amount), 
             "date": i.date.isoformat(), 
             "comment": i.description,
-            "subtype": i.metadata.get("subtype", ""),
-            "student_count": i.metadata.get("student_count", 0)
+            "subtype": i.subtype,
+            "student_count": i.student_count
         })
     return JsonResponse(out, safe=False)
 
+@require_http_methods(["GET"])
+@require_auth
+def income_stats_view(request):
+    """Per-subtype and per-month income/student aggregates, computed in the database."""
+    user = request.user
+    try:
+        year = int(request.GET.get("year", dt.datetime.now().year))
+    except ValueError:
+        return JsonResponse({"detail": "Invalid year"}, status=400)
+    if not 1 <= year <= 9999:
+        return JsonResponse({"detail": "Invalid year"}, status=400)
+
+    qs = Transaction.objects.filter(user_id=user.id, type='INCOME', date__year=year)
+    subtype = request.GET.get("subtype")
+    if subtype is not None:
+        qs = qs.filter(subtype=subtype)
+
+    by_subtype = (
+        qs.order_by()
+        .values("subtype")
+        .annotate(total=Sum("amount"), students=Sum("student_count"), count=Count("id"))
+        .order_by("subtype")
+    )
+    by_month = (
+        qs.order_by()
+        .annotate(month=ExtractMonth("date"))
+        .values("month")
+        .annotate(total=Sum("amount"), students=Sum("student_count"), count=Count("id"))
+        .order_by("month")
+    )
+    return JsonResponse({
+        "year": year,
+        "by_subtype": [
+            {"subtype": r["subtype"], "total": float(r["total"] or 0), "students": r["students"] or 0, "count": r["count"]}
+            for r in by_subtype
+        ],
+        "by_month": [
+            {"month": r["month"], "total": float(r["total"] or 0), "students": r["students"] or 0, "count": r["count"]}
+            for r in by_month
+        ],
+    })
+
 @require_http_methods(["DELETE"])
 @csrf_exempt
 @require_auth
@@ -411,9 +514,77 @@ def income_delete(request, income_id):
     i = Transaction.objects.filter(id=income_id, user_id=user.id, type='INCOME').first()
     if not i:
         return JsonResponse({"detail": "Not found"}, status=404)
-    i.delete()
+    from django.db import transaction
+    with transaction.atomic():
+        i.delete()
+        record_deleted([i])
     return JsonResponse({"message": "Deleted"})
 
+@require_http_methods(["GET"])
+@require_auth
+def transactions_search_view(request):
+    """Ranked full-text search over the user's transaction descriptions and categories."""
+    user = request.user
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse({"detail": "q required"}, status=400)
+    tx_type = request.GET.get("type", "").upper() or None
+    if tx_type and tx_type not in ("INCOME", "EXPENSE"):
+        return JsonResponse({"detail": "type must be INCOME or EXPENSE"}, status=400)
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+        page_size = min(max(int(request.GET.get("page_size", 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({"detail": "Invalid page or page_size"}, status=400)
+    if page > MAX_SEARCH_PAGE:
+        return JsonResponse({"detail": f"page must be at most {MAX_SEARCH_PAGE}"}, status=400)
+
+    hits, has_more = search_transactions(user.id, query, tx_type=tx_type, page=page, page_size=page_size)
+    return JsonResponse({
+        "results": [
+            {
+                "id": t.id, "type": t.type, "category": t.category, "amount": float(t.amount),
+                "date": t.date.isoformat(), "comment": t.description, "rank": round(rank, 6),
+            }
+            for t, rank in hits
+        ],
+        "page": page,
+        "page_size": page_size,
+        "has_more": has_more,
+    })
+
+@require_http_methods(["GET"])
+@require_auth
+def transactions_export_view(request):
+    """Stream the user's transactions for any date range as CSV, NDJSON or XLSX (optionally gzipped)."""
+    user = request.user
+    fmt = request.GET.get("format", "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({"detail": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+    try:
+        start = date.fromisoformat(request.GET["start"]) if request.GET.get("start") else None
+        end = date.fromisoformat(request.GET["end"]) if request.GET.get("end") else None
+    except ValueError:
+        return JsonResponse({"detail": "Invalid date"}, status=400)
+    if start and end and start > end:
+        return JsonResponse({"detail": "start must be before end"}, status=400)
+    tx_type = request.GET.get("type", "").upper() or None
+    if tx_type and tx_type not in ("INCOME", "EXPENSE"):
+        return JsonResponse({"detail": "type must be INCOME or EXPENSE"}, status=400)
+    use_gzip = request.GET.get("gzip", "").lower() in ("1", "true", "yes")
+
+    content_type, ext = EXPORT_FORMATS[fmt]
+    stream = iter_export(fmt, export_queryset(user.id, start, end, tx_type))
+    filename = f"transactions_{start or 'all'}_{end or 'all'}.{ext}"
+    if use_gzip:
+        stream = gzip_stream(stream)
+        content_type = "application/gzip"
+        filename += ".gz"
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    log_activity(user.id, user.email, user.full_name or '', 'EXPORT', request, details=f"Format: {fmt}, Range: {start or '-'}..{end or '-'}")
+    return response
+
 @require_http_methods(["GET", "POST"])
 @csrf_exempt
 @require_auth
@@ -424,21 +595,101 @@ def workspaces_view(request):
             data = json.loads(request.body) if request.body else {}
         except json.JSONDecodeError:
             return JsonResponse({"detail": "Invalid JSON"}, status=400)
-        ws = Workspace.objects.create(owner_id=user.id, name=data.get("name", "New Workspace"))
-        return JsonResponse({"id": ws.id, "name": ws.name}, status=201)
-    workspaces = Workspace.objects.filter(owner_id=user.id)
-    return JsonResponse([{"id": w.id, "name": w.name} for w in workspaces], safe=False)
+        name = data.get("name", "New Workspace")
+        from django.db import transaction
+        with transaction.atomic():
+            ws = Workspace.objects.create(owner_id=user.id, name=name, slug=f"{slugify(name)[:200] or 'workspace'}-{secrets.token_hex(4)}")
+            add_member(ws.id, user.id, WorkspaceMember.ROLE_OWNER)
+        return JsonResponse({"id": ws.id, "name": ws.name, "role": WorkspaceMember.ROLE_OWNER}, status=201)
+    roles = request_roles(request)
+    workspaces = Workspace.objects.filter(id__in=list(roles), deleted_at__isnull=True)
+    return JsonResponse([{"id": w.id, "name": w.name, "role": roles[w.id]} for w in workspaces], safe=False)
 
 @require_http_methods(["DELETE"])
 @csrf_exempt
 @require_auth
 def workspaces_delete(request, workspace_id):
     user = request.user
-    ws = Workspace.objects.filter(id=workspace_id, owner_id=user.id).first()
+    if not has_access(request, workspace_id, MANAGE):
+        return JsonResponse({"detail": "Not found"}, status=404)
+    ws = Workspace.objects.filter(id=workspace_id, deleted_at__isnull=True).first()
     if not ws:
         return JsonResponse({"detail": "Not found"}, status=404)
-    ws.delete()
-    return JsonResponse({"message": "Deleted"})
+    # Hidden now; forms, entries and transactions are removed by the purge worker.
+    job = soft_delete_workspace(ws, requested_by=user.id)
+    log_activity(user.id, user.email, user.full_name or '', 'WORKSPACE_DELETED', request, details=f"Workspace {ws.id}: {ws.name}")
+    return JsonResponse({"message": "Deleted", "purge_job_id": job.id})
+
+def _member_to_json(member, user):
+    return {
+        "user_id": member.user_id,
+        "email": user.email if user else "",
+        "full_name": (user.full_name or "") if user else "",
+        "role": member.role,
+        "created_at": member.created_at.isoformat(),
+    }
+
+def _is_last_owner(workspace_id, user_id):
+    owners = WorkspaceMember.objects.filter(workspace_id=workspace_id, role=WorkspaceMember.ROLE_OWNER)
+    return list(owners.values_list("user_id", flat=True)[:2]) == [user_id]
+
+@require_http_methods(["GET", "POST"])
+@csrf_exempt
+@require_auth
+def workspace_members_view(request, workspace_id):
+    """GET lists members (any member); POST {email, role} adds or updates one (owners only)."""
+    user = request.user
+    if request.method == "GET":
+        if not has_access(request, workspace_id, VIEW):
+            return JsonResponse({"detail": "Not found"}, status=404)
+        members = list(WorkspaceMember.objects.filter(workspace_id=workspace_id))
+        users = User.objects.in_bulk([m.user_id for m in members])
+        return JsonResponse([_member_to_json(m, users.get(m.user_id)) for m in members], safe=False)
+    if not has_access(request, workspace_id, MANAGE):
+        return JsonResponse({"detail": "Only workspace owners can manage members"}, status=403)
+    try:
+        data = json.loads(request.body) if request.body else {}
+    except json.JSONDecodeError:
+        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+    role = data.get("role") or WorkspaceMember.ROLE_VIEWER
+    if role not in dict(WorkspaceMember.ROLE_CHOICES):
+        return JsonResponse({"detail": "role must be owner, editor or viewer"}, status=400)
+    member_user = User.objects.filter(email=(data.get("email") or "").strip()).first()
+    if not member_user:
+        return JsonResponse({"detail": "User not found"}, status=404)
+    if role != WorkspaceMember.ROLE_OWNER and _is_last_owner(workspace_id, member_user.id):
+        return JsonResponse({"detail": "A workspace needs at least one owner"}, status=400)
+    member = add_member(workspace_id, member_user.id, role)
+    log_activity(user.id, user.email, user.full_name or '', 'WORKSPACE_MEMBER_SET', request, details=f"Workspace {workspace_id}: {member_user.email} as {role}")
+    return JsonResponse(_member_to_json(member, member_user), status=201)
+
+@require_http_methods(["PATCH", "DELETE"])
+@csrf_exempt
+@require_auth
+def workspace_member_detail(request, workspace_id, member_id):
+    """PATCH {role} changes a member's role (owners only); DELETE removes a member (owners, or the member leaving)."""
+    user = request.user
+    member = WorkspaceMember.objects.filter(workspace_id=workspace_id, user_id=member_id).first()
+    leaving = request.method == "DELETE" and member_id == user.id
+    if not member or not (leaving or has_access(request, workspace_id, MANAGE)):
+        return JsonResponse({"detail": "Not found"}, status=404)
+    if request.method == "PATCH":
+        try:
+            data = json.loads(request.body) if request.body else {}
+        except json.JSONDecodeError:
+            return JsonResponse({"detail": "Invalid JSON"}, status=400)
+        role = data.get("role")
+        if role not in dict(WorkspaceMember.ROLE_CHOICES):
+            return JsonResponse({"detail": "role must be owner, editor or viewer"}, status=400)
+        if role != WorkspaceMember.ROLE_OWNER and _is_last_owner(workspace_id, member_id):
+            return JsonResponse({"detail": "A workspace needs at least one owner"}, status=400)
+        member = add_member(workspace_id, member_id, role)
+        return JsonResponse(_member_to_json(member, User.objects.filter(id=member_id).first()))
+    if _is_last_owner(workspace_id, member_id):
+        return JsonResponse({"detail": "A workspace needs at least one owner"}, status=400)
+    remove_members(workspace_id, [member_id])
+    log_activity(user.id, user.email, user.full_name or '', 'WORKSPACE_MEMBER_REMOVED', request, details=f"Workspace {workspace_id}: user {member_id}")
+    return JsonResponse({"message": "Removed"})
 
 @require_http_methods(["GET", "POST"])
 @csrf_exempt
@@ -453,40 +704,40 @@ def expense_forms_view(request):
         workspace_id = data.get("workspace_id")
         if not workspace_id:
             return JsonResponse({"detail": "workspace_id required"}, status=400)
-        ws = Workspace.objects.filter(id=workspace_id, owner_id=user.id).first()
-        if not ws:
+        if not has_access(request, workspace_id, EDIT):
             return JsonResponse({"detail": "Workspace not found"}, status=404)
-        f = ExpenseForm.objects.create(workspace_id=ws.id, name=data.get("name", "Form"), description=data.get("description", ""))
-        for field in data.get("fields", []):
-            ExpenseField.objects.create(
-                form_id=f.id,
-                label=field.get("label") or "Field",
-                field_type=field.get("field_type") or "text",
-                required=bool(field.get("required")),
-                options=field.get("options"),
-            )
-        fields = ExpenseField.objects.filter(form_id=f.id).order_by('id')
-        return JsonResponse({
-            "id": f.id, "name": f.name, "description": f.description or "",
-            "workspace_id": f.workspace_id, "created_at": f.created_at.isoformat(),
-            "fields": [{"id": fl.id, "form_id": fl.form_id, "label": fl.label, "field_type": fl.field_type, "required": fl.required, "options": fl.options or []} for fl in fields]
-        }, status=201)
+        fields = data.get("fields", [])
+        error = validate_field_definitions(fields)
+        if error:
+            return JsonResponse({"detail": error}, status=400)
+        from django.db import transaction
+        with transaction.atomic():
+            f = ExpenseForm.objects.create(workspace_id=int(workspace_id), name=data.get("name", "Form"), description=data.get("description", ""))
+            ExpenseField.objects.bulk_create([
+                ExpenseField(
+                    form_id=f.id,
+                    label=field.get("label") or "Field",
+                    field_type=field.get("field_type") or "text",
+                    required=bool(field.get("required")),
+                    options=[str(o).strip() for o in field["options"] if str(o).strip()] if field.get("options") else None,
+                )
+                for field in fields
+            ])
+        return JsonResponse(compile_forms([f])[0].json, status=201)
     workspace_id = request.GET.get("workspace_id")
     if not workspace_id:
         return JsonResponse({"detail": "workspace_id required"}, status=400)
-    ws = Workspace.objects.filter(id=int(workspace_id)).first()
-    if not ws or ws.owner_id != user.id:
+    if not has_access(request, workspace_id, VIEW):
         return JsonResponse({"detail": "Forbidden"}, status=403)
-    forms = ExpenseForm.objects.filter(workspace_id=ws.id).order_by('name')
-    out = []
-    for f in forms:
-        fields = ExpenseField.objects.filter(form_id=f.id).order_by('id')
-        out.append({
-            "id": f.id, "name": f.name, "description": f.description or "",
-            "workspace_id": f.workspace_id, "created_at": f.created_at.isoformat(),
-            "fields": [{"id": fl.id, "form_id": fl.form_id, "label": fl.label, "field_type": fl.field_type, "required": fl.required, "options": fl.options or []} for fl in fields]
-        })
-    return JsonResponse(out, safe=False)
+    return JsonResponse([form.json for form in workspace_forms(int(workspace_id))], safe=False)
+
+def _entry_write_denied(request, form, workspace_id):
+    """Error response if the caller may not add entries to ``form``; entries always go to the form's workspace."""
+    if workspace_id is not None and str(workspace_id) != str(form.workspace_id):
+        return JsonResponse({"detail": "workspace_id does not match the form's workspace"}, status=400)
+    if not has_access(request, form.workspace_id, EDIT):
+        return JsonResponse({"detail": "Forbidden"}, status=403)
+    return None
 
 @require_http_methods(["GET", "POST"])
 @csrf_exempt
@@ -497,15 +748,24 @@ def expense_entries_view(request):
         form_id = request.GET.get("form_id")
         if not form_id:
             return JsonResponse({"detail": "form_id required"}, status=400)
-        form = ExpenseForm.objects.filter(id=int(form_id)).first()
+        try:
+            form = get_compiled_form(int(form_id))
+        except ValueError:
+            return JsonResponse({"detail": "Invalid form_id"}, status=400)
         if not form:
             return JsonResponse({"detail": "Form not found"}, status=404)
-        ws = Workspace.objects.filter(id=form.workspace_id).first()
-        if not ws or ws.owner_id != user.id:
+        if not has_access(request, form.workspace_id, VIEW):
             return JsonResponse({"detail": "Forbidden"}, status=403)
-        entries = ExpenseEntry.objects.filter(form_id=form.id).order_by('-created_at')
+        # Newest first, ?limit= per page; the next page's ?cursor= comes back in X-Next-Cursor.
+        try:
+            entries, next_cursor = list_entries(form, request.GET)
+        except ListingError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
         out = [{"id": e.id, "form_id": e.form_id, "workspace_id": e.workspace_id, "data": e.data, "created_at": e.created_at.isoformat()} for e in entries]
-        return JsonResponse(out, safe=False)
+        response = JsonResponse(out, safe=False)
+        if next_cursor:
+            response["X-Next-Cursor"] = next_cursor
+        return response
     try:
         data = json.loads(request.body) if request.body else {}
     except json.JSONDecodeError:
@@ -515,18 +775,76 @@ def expense_entries_view(request):
     entry_data = data.get("data") or {}
     if form_id is None:
         return JsonResponse({"detail": "form_id required"}, status=400)
-    form = ExpenseForm.objects.filter(id=form_id).first()
+    try:
+        form = get_compiled_form(int(form_id))
+    except (TypeError, ValueError):
+        return JsonResponse({"detail": "Invalid form_id"}, status=400)
     if not form:
         return JsonResponse({"detail": "Form not found"}, status=404)
-    ws = Workspace.objects.filter(id=workspace_id or form.workspace_id).first()
-    if not ws or ws.owner_id != user.id:
-        return JsonResponse({"detail": "Forbidden"}, status=403)
-    e = ExpenseEntry.objects.create(form_id=form_id, workspace_id=ws.id, creator_id=user.id, data=entry_data)
+    denied = _entry_write_denied(request, form, workspace_id)
+    if denied:
+        return denied
+    try:
+        entry_data = form.clean(entry_data)
+    except EntryInvalid as e:
+        return JsonResponse({"detail": str(e), "errors": e.errors}, status=400)
+    e = ExpenseEntry.objects.create(form_id=form.id, workspace_id=form.workspace_id, creator_id=user.id, data=entry_data)
+    project_entries(form, [e])
     FormLog.objects.create(user_id=user.id, user_email=user.email, form_name=form.name, data_summary=json.dumps(entry_data)[:2000])
     log_activity(user.id, user.email, user.full_name or '', 'FORM_SUBMITTED', request, status='Success', details=form.name)
     send_alert_to_admin('FORM_SUBMITTED', user.email, user.full_name or '', get_client_ip(request), get_user_agent(request), timezone.now().strftime("%Y-%m-%d %H:%M"), extra=f"Form: {form.name}")
     return JsonResponse({"id": e.id, "form_id": e.form_id, "workspace_id": e.workspace_id, "data": e.data, "created_at": e.created_at.isoformat()}, status=201)
 
+@require_http_methods(["POST"])
+@csrf_exempt
+@require_auth
+def expense_entries_bulk(request):
+    """Submit many entries for one form: validated together, inserted together, logged and alerted once."""
+    user = request.user
+    try:
+        data = json.loads(request.body) if request.body else {}
+    except json.JSONDecodeError:
+        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+    form_id = data.get("form_id")
+    items = data.get("entries")
+    if form_id is None:
+        return JsonResponse({"detail": "form_id required"}, status=400)
+    if not isinstance(items, list) or not items:
+        return JsonResponse({"detail": "entries must be a non-empty list"}, status=400)
+    if len(items) > MAX_BULK_ENTRIES:
+        return JsonResponse({"detail": f"At most {MAX_BULK_ENTRIES} entries per request"}, status=400)
+    try:
+        form = get_compiled_form(int(form_id))
+    except (TypeError, ValueError):
+        return JsonResponse({"detail": "Invalid form_id"}, status=400)
+    if not form:
+        return JsonResponse({"detail": "Form not found"}, status=404)
+    denied = _entry_write_denied(request, form, data.get("workspace_id"))
+    if denied:
+        return denied
+    try:
+        cleaned = clean_entries(form, items)
+    except EntryInvalid as e:
+        return JsonResponse({"detail": str(e), "errors": e.errors}, status=400)
+    from django.db import transaction
+    with transaction.atomic():
+        entries = ExpenseEntry.objects.bulk_create([
+            ExpenseEntry(form_id=form.id, workspace_id=form.workspace_id, creator_id=user.id, data=entry_data)
+            for entry_data in cleaned
+        ])
+        project_entries(form, entries)
+        FormLog.objects.create(
+            user_id=user.id, user_email=user.email, form_name=form.name,
+            data_summary=f"{len(entries)} entries (bulk)",
+        )
+    details = f"{form.name} ({len(entries)} entries)"
+    log_activity(user.id, user.email, user.full_name or '', 'FORM_SUBMITTED', request, status='Success', details=details)
+    send_alert_to_admin('FORM_SUBMITTED', user.email, user.full_name or '', get_client_ip(request), get_user_agent(request), timezone.now().strftime("%Y-%m-%d %H:%M"), extra=f"Form: {details}")
+    return JsonResponse({
+        "created": len(entries),
+        "entries": [{"id": e.id, "form_id": e.form_id, "workspace_id": e.workspace_id, "data": e.data, "created_at": e.created_at.isoformat()} for e in entries],
+    }, status=201)
+
 @require_http_methods(["DELETE"])
 @csrf_exempt
 @require_auth
@@ -535,29 +853,89 @@ def expense_entries_delete(request, entry_id):
     e = ExpenseEntry.objects.filter(id=entry_id).first()
     if not e:
         return JsonResponse({"detail": "Not found"}, status=404)
-    ws = Workspace.objects.filter(id=e.workspace_id).first()
-    if not ws or ws.owner_id != user.id:
+    if not has_access(request, e.workspace_id, EDIT):
         return JsonResponse({"detail": "Forbidden"}, status=403)
+    unproject_entries([e.id])
     e.delete()
     return JsonResponse({"message": "Deleted"})
 
 @require_http_methods(["GET"])
 @require_auth
-def notifications_list(request):
+def expense_form_analytics(request, form_id):
+    """?metric=<number field id>&group_by=<field id>|month&date_from=&date_to= over the form's entries."""
     user = request.user
-    limit = min(int(request.GET.get("limit", 50)), 100)
-    logs = ActivityLog.objects.filter(user_id=user.id).order_by('-created_at')[:limit]
-    out = [
-        {
-            "id": log.id,
-            "action": log.action,
-            "status": log.status,
-            "details": log.details or "",
-            "created_at": log.created_at.isoformat(),
-        }
-        for log in logs
-    ]
-    return JsonResponse(out, safe=False)
+    form = get_compiled_form(form_id)
+    if not form:
+        return JsonResponse({"detail": "Form not found"}, status=404)
+    if not has_access(request, form.workspace_id, VIEW):
+        return JsonResponse({"detail": "Forbidden"}, status=403)
+    metric = group_by = None
+    if request.GET.get("metric"):
+        metric = form.field(request.GET["metric"])
+        if metric is None or metric.field_type != "number":
+            return JsonResponse({"detail": "metric must be a number field of this form"}, status=400)
+    if request.GET.get("group_by") == GROUP_BY_MONTH:
+        group_by = GROUP_BY_MONTH
+    elif request.GET.get("group_by"):
+        group_by = form.field(request.GET["group_by"])
+        if group_by is None or group_by.field_type == "number":
+            return JsonResponse({"detail": "group_by must be a text, date or select field of this form, or 'month'"}, status=400)
+    try:
+        date_from = dt.date.fromisoformat(request.GET["date_from"]) if request.GET.get("date_from") else None
+        date_to = dt.date.fromisoformat(request.GET["date_to"]) if request.GET.get("date_to") else None
+    except ValueError:
+        return JsonResponse({"detail": "date_from and date_to must be YYYY-MM-DD dates"}, status=400)
+    return JsonResponse(form_aggregate(form, metric, group_by, date_from, date_to))
+
+@require_auth_async
+async def notifications_list(request):
+    """GET ?since=<cursor>&limit=&unread=1&wait=<seconds>: newest notifications, or only those after the cursor.
+
+    With ``since`` and ``wait`` (up to 25s) the request long-polls until something new arrives (ASGI only).
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    try:
+        since, limit, wait, unread_only = parse_feed_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+    load = sync_to_async(notification_feed)
+    # Under WSGI the wait would hold a worker; answer at once and let the client poll again.
+    if since is None or not wait or not isinstance(request, ASGIRequest):
+        return JsonResponse(await load(request.user.id, since, limit, unread_only))
+
+    # Wait inside the body: sync-only middleware (WhiteNoise, audit logging) runs the view in a thread,
+    # which would stay blocked for the whole wait if the view awaited before returning.
+    async def long_poll():
+        await wait_for_new(request.user.id, since, wait)
+        yield json.dumps(await load(request.user.id, since, limit, unread_only))
+
+    response = StreamingHttpResponse(long_poll(), content_type="application/json")
+    response["Cache-Control"] = "no-cache"
+    return response
+
+@require_http_methods(["GET"])
+@require_auth
+def notifications_unread_count(request):
+    unread, cursor = notification_counter(request.user.id)
+    return JsonResponse({"unread": unread, "cursor": cursor})
+
+@require_http_methods(["POST"])
+@csrf_exempt
+@require_auth
+def notifications_mark_read(request):
+    """POST {ids: [...]} or {up_to: <id>} marks those read; an empty body marks everything read."""
+    try:
+        data = json.loads(request.body) if request.body else {}
+    except json.JSONDecodeError:
+        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+    ids, up_to = data.get("ids"), data.get("up_to")
+    # type() rather than isinstance(): JSON true/false arrive as bool, which is an int subclass.
+    if (ids is not None and (not isinstance(ids, list) or not all(type(i) is int for i in ids))) or (
+        up_to is not None and type(up_to) is not int
+    ):
+        return JsonResponse({"detail": "ids must be a list of integers and up_to an integer"}, status=400)
+    return JsonResponse({"unread": mark_notifications_read(request.user.id, ids, up_to)})
 
 @require_http_methods(["GET"])
 @require_auth
@@ -568,38 +946,312 @@ def monthly_report_pdf_view(request):
         month = int(request.GET.get("month", dt.datetime.now().month))
     except ValueError:
         return JsonResponse({"detail": "Invalid year or month"}, status=400)
-    
-    # Fetch all transactions for the month
-    txs = Transaction.objects.filter(user_id=user.id, date__year=year, date__month=month)
-    
-    expenses = [t for t in txs if t.type == 'EXPENSE']
-    income = [t for t in txs if t.type == 'INCOME']
-    
-    total_exp = sum(e.amount for e in expenses)
-    total_inc = sum(i.amount for i in income)
-    
-    # Sort for report
-    transactions = sorted(list(txs), key=lambda x: x.date, reverse=True)
-    
-    # Adapter for PDF generator which expects objects with attributes
-    # The Transaction model already has amount, date, category. 
-    # NOTE: generate_monthly_report_pdf might expect 'comment' or 'type' in a specific way.
-    # We will pass the objects as is, assuming the PDF generator is updated or compatible.
-    
-    pdf_buffer = generate_monthly_report_pdf(
-        user_name=user.full_name or user.email,
-        year=year, month=month,
-        total_income=float(total_inc),
-        total_expenses=float(total_exp),
-        transactions=transactions,
-        profile_photo_path=user.profile_photo.path if user.profile_photo and os.path.exists(user.profile_photo.path) else None
-    )
-    from django.http import HttpResponse
-    response = HttpResponse(pdf_buffer, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="Report_{year}_{month}.pdf"'
+    if not (1 <= year <= 9999 and 1 <= month <= 12):
+        return JsonResponse({"detail": "Invalid year or month"}, status=400)
+
+    # Served from the content-versioned cache; only renders when the month's data,
+    # the template or the profile photo changed since the last download.
+    entry = get_cached_report(user, year, month)
+    etag = quote_etag(entry.content_hash)
+    if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            default_storage.open(content_storage_name(entry.content_hash), "rb"),
+            as_attachment=True,
+            filename=f"Report_{year}_{month}.pdf",
+            content_type="application/pdf",
+        )
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(entry.created_at.timestamp())
+    response["Cache-Control"] = "private, no-cache"
     log_activity(user.id, user.email, user.full_name or '', 'REPORT_GENERATED', request, details=f"Month: {month}, Year: {year}")
     return response
 
+@require_http_methods(["GET"])
+@require_auth
+def range_report_view(request):
+    """Totals over ?start=&end= (YYYY-MM-DD, default year-to-date) by ?bucket=month|quarter|year|total."""
+    try:
+        start, end, bucket = parse_range(request.GET)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+    return JsonResponse(range_report(request.user.id, start, end, bucket))
+
+@require_http_methods(["GET"])
+@require_auth
+def forecast_view(request):
+    """Month-end, next-quarter and per-category projections; ?horizon= months ahead (1-12, default 3)."""
+    try:
+        horizon = int(request.GET.get("horizon") or DEFAULT_HORIZON)
+    except ValueError:
+        return JsonResponse({"detail": "horizon must be an integer"}, status=400)
+    if not 1 <= horizon <= MAX_HORIZON:
+        return JsonResponse({"detail": f"horizon must be between 1 and {MAX_HORIZON}"}, status=400)
+    return JsonResponse(get_forecast(request.user.id, horizon=horizon))
+
+@require_http_methods(["GET"])
+@require_auth
+def category_stats_view(request):
+    """Per-category mean, std, percentiles and outliers; ?workspace_id=&type=&start=&end=&sigma=."""
+    params = request.GET
+    workspace_id = params.get("workspace_id")
+    if workspace_id:
+        if not has_access(request, workspace_id, VIEW):
+            return JsonResponse({"detail": "Workspace not found"}, status=404)
+        scope = workspace_scope(int(workspace_id))
+    else:
+        scope = user_scope(request.user.id)
+    tx_type = (params.get("type") or "EXPENSE").upper()
+    if tx_type not in dict(Transaction.TYPE_CHOICES):
+        return JsonResponse({"detail": "type must be INCOME or EXPENSE"}, status=400)
+    try:
+        start = date.fromisoformat(params["start"]) if params.get("start") else None
+        end = date.fromisoformat(params["end"]) if params.get("end") else None
+        sigma = float(params.get("sigma") or DEFAULT_SIGMA)
+    except ValueError:
+        return JsonResponse({"detail": "start and end must be YYYY-MM-DD and sigma a number"}, status=400)
+    if not 1 <= sigma <= 20:
+        return JsonResponse({"detail": "sigma must be between 1 and 20"}, status=400)
+    return JsonResponse(category_statistics(scope, tx_type, start, end, sigma))
+
+def _budget_period(params):
+    """``(year, month)`` from ?month=YYYY-MM, defaulting to the current month."""
+    value = params.get("month")
+    if not value:
+        today = date.today()
+        return today.year, today.month
+    try:
+        year, month = (int(p) for p in value.split("-"))
+        date(year, month, 1)
+    except ValueError:
+        raise ValueError("month must be YYYY-MM")
+    return year, month
+
+def _parse_budget_amount(value):
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, TypeError):
+        return None
+    return amount.quantize(Decimal("0.01")) if amount.is_finite() and amount > 0 else None
+
+@require_http_methods(["GET", "POST"])
+@csrf_exempt
+@require_auth
+def budgets_view(request):
+    """GET ?workspace_id=&month=YYYY-MM lists budgets with their status; POST {amount, category?, workspace_id?, thresholds?} creates one."""
+    user = request.user
+    if request.method == "GET":
+        workspace_id = request.GET.get("workspace_id")
+        if workspace_id:
+            if not has_access(request, workspace_id, VIEW):
+                return JsonResponse({"detail": "Workspace not found"}, status=404)
+            budgets = Budget.objects.filter(workspace_id=workspace_id)
+        else:
+            budgets = Budget.objects.filter(user_id=user.id, workspace_id__isnull=True)
+        try:
+            year, month = _budget_period(request.GET)
+        except ValueError as e:
+            return JsonResponse({"detail": str(e)}, status=400)
+        return JsonResponse(budget_status(budgets.order_by("category", "id"), year, month), safe=False)
+    try:
+        data = json.loads(request.body) if request.body else {}
+    except json.JSONDecodeError:
+        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+    amount = _parse_budget_amount(data.get("amount"))
+    if amount is None:
+        return JsonResponse({"detail": "amount must be a positive number"}, status=400)
+    thresholds, error = clean_thresholds(data.get("thresholds"))
+    if error:
+        return JsonResponse({"detail": error}, status=400)
+    workspace_id = data.get("workspace_id")
+    if workspace_id is not None and not has_access(request, workspace_id, MANAGE):
+        return JsonResponse({"detail": "Only workspace owners can set budgets"}, status=403)
+    category = (data.get("category") or "").strip()
+    existing = Budget.objects.filter(workspace_id=workspace_id, category=category)
+    if workspace_id is None:
+        existing = existing.filter(user_id=user.id)
+    if existing.exists():
+        return JsonResponse({"detail": "A budget for this category already exists"}, status=400)
+    budget = Budget.objects.create(
+        user_id=user.id, workspace_id=workspace_id, category=category, amount=amount,
+        **({"thresholds": thresholds} if thresholds else {}),
+    )
+    log_activity(user.id, user.email, user.full_name or '', 'BUDGET_CREATED', request, details=f"Budget {budget.id}: {category or 'all categories'} {amount}")
+    today = date.today()
+    return JsonResponse(budget_status([budget], today.year, today.month)[0], status=201)
+
+@require_http_methods(["PATCH", "DELETE"])
+@csrf_exempt
+@require_auth
+def budget_detail(request, budget_id):
+    """PATCH {amount?, thresholds?} updates a budget; DELETE removes it (owner, or workspace owners)."""
+    budget = Budget.objects.filter(id=budget_id).first()
+    if budget and budget.workspace_id is not None:
+        allowed = has_access(request, budget.workspace_id, MANAGE)
+    else:
+        allowed = budget is not None and budget.user_id == request.user.id
+    if not allowed:
+        return JsonResponse({"detail": "Not found"}, status=404)
+    if request.method == "DELETE":
+        BudgetUsage.objects.filter(budget_id=budget.id).delete()
+        budget.delete()
+        return JsonResponse({"message": "Deleted"})
+    try:
+        data = json.loads(request.body) if request.body else {}
+    except json.JSONDecodeError:
+        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+    if "amount" in data:
+        budget.amount = _parse_budget_amount(data["amount"])
+        if budget.amount is None:
+            return JsonResponse({"detail": "amount must be a positive number"}, status=400)
+    if "thresholds" in data:
+        thresholds, error = clean_thresholds(data["thresholds"])
+        if error or thresholds is None:
+            return JsonResponse({"detail": error or "thresholds must be a non-empty list of percentages"}, status=400)
+        budget.thresholds = thresholds
+    budget.save(update_fields=["amount", "thresholds"])
+    today = date.today()
+    budget_status([budget], today.year, today.month)  # seeds this month's usage if missing
+    # A new limit can put this month over (or back under) a threshold.
+    check_thresholds(budget, BudgetUsage.objects.get(budget_id=budget.id, year=today.year, month=today.month))
+    return JsonResponse(budget_status([budget], today.year, today.month)[0])
+
+@require_http_methods(["GET", "POST"])
+@csrf_exempt
+@require_auth
+def recurring_rules_view(request):
+    """GET lists the user's recurring rules; POST creates one and materializes any occurrence already due."""
+    user = request.user
+    if request.method == "GET":
+        rules = RecurringRule.objects.filter(user_id=user.id).order_by("next_run", "id")
+        return JsonResponse([rule_to_json(r) for r in rules], safe=False)
+    try:
+        data = json.loads(request.body) if request.body else {}
+    except json.JSONDecodeError:
+        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+    fields, error = clean_rule(data)
+    if error:
+        return JsonResponse({"detail": error}, status=400)
+    workspace_id = data.get("workspace_id")
+    if workspace_id is not None and not has_access(request, workspace_id, EDIT):
+        return JsonResponse({"detail": "Workspace not found"}, status=404)
+    rule = RecurringRule(user_id=user.id, workspace_id=workspace_id, **fields)
+    schedule_changed(rule)
+    rule.save()
+    created = materialize_rules([rule], date.today())
+    log_activity(user.id, user.email, user.full_name or '', 'RECURRING_RULE_CREATED', request, details=f"Rule {rule.id}: {rule.type} {rule.category} {rule.amount} {rule.frequency}")
+    return JsonResponse({**rule_to_json(rule), "materialized": created}, status=201)
+
+@require_http_methods(["PATCH", "DELETE"])
+@csrf_exempt
+@require_auth
+def recurring_rule_detail(request, rule_id):
+    """PATCH changes a rule (future occurrences only); DELETE removes it and keeps what it already created."""
+    rule = RecurringRule.objects.filter(id=rule_id, user_id=request.user.id).first()
+    if not rule:
+        return JsonResponse({"detail": "Not found"}, status=404)
+    if request.method == "DELETE":
+        rule.delete()
+        return JsonResponse({"message": "Deleted"})
+    try:
+        data = json.loads(request.body) if request.body else {}
+    except json.JSONDecodeError:
+        return JsonResponse({"detail": "Invalid JSON"}, status=400)
+    fields, error = clean_rule(data, rule)
+    if error:
+        return JsonResponse({"detail": error}, status=400)
+    resuming = fields.get("active") and not rule.active
+    for name, value in fields.items():
+        setattr(rule, name, value)
+    today = date.today()
+    schedule_changed(rule, not_before=today if resuming else rule.next_run)
+    rule.save()
+    created = materialize_rules([rule], today)
+    return JsonResponse({**rule_to_json(rule), "materialized": created})
+
+@require_http_methods(["GET"])
+@require_auth
+def range_report_pdf_view(request):
+    user = request.user
+    try:
+        start, end, bucket = parse_range(request.GET)
+    except ValueError as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+    report = range_report(user.id, start, end, bucket)
+    buffer = generate_range_report_pdf(user.full_name or user.email, report)
+    log_activity(user.id, user.email, user.full_name or '', 'REPORT_GENERATED', request, details=f"Range: {start} to {end}")
+    return FileResponse(
+        buffer, as_attachment=True, filename=f"Report_{start}_{end}.pdf", content_type="application/pdf",
+    )
+
+@require_http_methods(["GET", "POST"])
+@csrf_exempt
+@require_auth
+def report_jobs_view(request):
+    """POST queues a monthly PDF render and returns its job id; GET lists the user's report history."""
+    user = request.user
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body) if request.body else {}
+        except json.JSONDecodeError:
+            return JsonResponse({"detail": "Invalid JSON"}, status=400)
+        try:
+            year = int(data.get("year", dt.datetime.now().year))
+            month = int(data.get("month", dt.datetime.now().month))
+        except (ValueError, TypeError):
+            return JsonResponse({"detail": "Invalid year or month"}, status=400)
+        if not (1 <= year <= 9999 and 1 <= month <= 12):
+            return JsonResponse({"detail": "Invalid year or month"}, status=400)
+        report = enqueue_monthly_report(user.id, year, month)
+        return JsonResponse(report_to_json(report), status=202)
+
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+        page_size = min(max(int(request.GET.get("page_size", 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({"detail": "Invalid page or page_size"}, status=400)
+    qs = Report.objects.filter(user_id=user.id).order_by("-created_at")
+    status_filter = request.GET.get("status", "").strip()
+    if status_filter:
+        qs = qs.filter(status=status_filter)
+    paginator = Paginator(qs, page_size)
+    page_obj = paginator.get_page(page)
+    return JsonResponse({
+        "reports": [report_to_json(r) for r in page_obj],
+        "total": paginator.count,
+        "page": page,
+        "page_size": page_size,
+    })
+
+@require_http_methods(["GET"])
+@require_auth
+def report_job_detail(request, report_id):
+    report = Report.objects.filter(id=report_id, user_id=request.user.id).first()
+    if not report:
+        return JsonResponse({"detail": "Not found"}, status=404)
+    return JsonResponse(report_to_json(report))
+
+@require_http_methods(["GET"])
+@require_auth
+def report_job_download(request, report_id):
+    user = request.user
+    report = Report.objects.filter(id=report_id, user_id=user.id).first()
+    if not report:
+        return JsonResponse({"detail": "Not found"}, status=404)
+    if report.status != Report.STATUS_DONE or not report.file_path:
+        return JsonResponse({"detail": f"Report is {report.status}"}, status=409)
+    if not default_storage.exists(report.file_path):
+        return JsonResponse({"detail": "Report file missing"}, status=410)
+    response = FileResponse(
+        default_storage.open(report.file_path, "rb"),
+        as_attachment=True,
+        filename=f"Report_{report.year}_{report.month}.pdf",
+        content_type="application/pdf",
+    )
+    log_activity(user.id, user.email, user.full_name or '', 'REPORT_DOWNLOADED', request, details=f"Report: {report.id}")
+    return response
+
 @require_http_methods(["GET"])
 @require_auth
 def real_dashboard_summary(request):
@@ -608,24 +1260,18 @@ def real_dashboard_summary(request):
         year = int(request.GET.get("year", dt.datetime.now().year))
     except ValueError:
         year = dt.datetime.now().year
-        
-    qs = Transaction.objects.filter(user_id=user.id, date__year=year)
-    
-    # Aggregations
-    total_exp = qs.filter(type='EXPENSE').aggregate(Sum('amount'))['amount__sum'] or 0
-    total_inc = qs.filter(type='INCOME').aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    monthly_stats = []
-    for m in range(1, 13):
-        m_qs = qs.filter(date__month=m)
-        m_exp = m_qs.filter(type='EXPENSE').aggregate(Sum('amount'))['amount__sum'] or 0
-        m_inc = m_qs.filter(type='INCOME').aggregate(Sum('amount'))['amount__sum'] or 0
-        monthly_stats.append({"month": m, "income": float(m_inc), "expense": float(m_exp)})
-        
+    if not 1 <= year <= 9999:
+        year = dt.datetime.now().year
+
+    report = range_report(user.id, date(year, 1, 1), date(year, 12, 31), bucket='month')
+    monthly_stats = [
+        {"month": m, "income": b["income"], "expense": b["expenses"]}
+        for m, b in enumerate(report["buckets"], start=1)
+    ]
     return JsonResponse({
-        "total_income": float(total_inc),
-        "total_expenses": float(total_exp),
-        "net_result": float(total_inc - total_exp),
+        "total_income": report["totals"]["income"],
+        "total_expenses": report["totals"]["expenses"],
+        "net_result": report["totals"]["net"],
         "monthly_stats": monthly_stats
     })
 
@@ -729,27 +1375,10 @@ def assistant_query_view(request):
     try:
         data = json.loads(request.body) if request.body else {}
     except json.JSONDecodeError: return JsonResponse({"detail": "Invalid JSON"}, status=400)
-    query = data.get("query", "").lower().strip()
-    if not query: return JsonResponse({"detail": "query required"}, status=400)
-    
-    now = dt.datetime.now()
-    txs = Transaction.objects.filter(user_id=user.id, date__year=now.year, date__month=now.month)
-    
-    total_exp = sum(t.amount for t in txs if t.type == 'EXPENSE')
-    total_inc = sum(t.amount for t in txs if t.type == 'INCOME')
-    
-    if "spend" in query or "expense" in query:
-        response = f"You have spent ${total_exp:,.2f} this month."
-    elif "income" in query or "earn" in query:
-        response = f"Your total income for this month is ${total_inc:,.2f}."
-    elif "save" in query or "net" in query:
-        response = f"Your net savings this month is ${(total_inc - total_exp):,.2f}."
-    elif "biggest" in query:
-        biggest = txs.filter(type='EXPENSE').order_by('-amount').first()
-        response = f"Your biggest expense this month was {biggest.category} for ${biggest.amount:,.2f}." if biggest else "No expenses found."
-    else:
-        response = "I can only help with basic questions about spending, income, and savings."
-    return JsonResponse({"response": response})
+    query = data.get("query", "")
+    if not isinstance(query, str) or not query.strip():
+        return JsonResponse({"detail": "query required"}, status=400)
+    return JsonResponse(assistant_answer(user.id, query[:500]))
 
 @require_http_methods(["POST"])
 @csrf_exempt
@@ -767,8 +1396,19 @@ def profile_update(request):
 @require_auth
 def profile_photo_upload(request):
     user = request.user
+    # Reject oversized bodies before Django spools them to disk.
+    try:
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > settings.PROFILE_PHOTO_MAX_BYTES + 64 * 1024:
+        return JsonResponse({"detail": "Photo is too large"}, status=413)
     photo = request.FILES.get("photo")
     if not photo: return JsonResponse({"detail": "No photo provided"}, status=400)
-    user.profile_photo = photo
-    user.save(update_fields=['profile_photo'])
-    return JsonResponse({"message": "Photo uploaded", "url": user.profile_photo.url if user.profile_photo else ""})
+    if photo.size > settings.PROFILE_PHOTO_MAX_BYTES:
+        return JsonResponse({"detail": "Photo is too large"}, status=413)
+    try:
+        set_profile_photo(user, photo)
+    except ImageRejected as e:
+        return JsonResponse({"detail": str(e)}, status=400)
+    return JsonResponse({"message": "Photo uploaded", **_photo_urls(user)})
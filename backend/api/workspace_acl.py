@@ -0,0 +1,99 @@
+"""Workspace access checks served from memory.
+
+A user's ``{workspace_id: role}`` map is loaded with one query and cached per
+process, keyed by ``(user_id, User.acl_version)``, and memoized on the request.
+``require_auth`` already loads the user row, so checking the version costs
+nothing; any membership change bumps ``acl_version`` for the affected users,
+which makes every process reload on their next request.
+"""
+import threading
+from collections import OrderedDict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import User, WorkspaceMember
+
+ROLE_RANK = {
+    WorkspaceMember.ROLE_VIEWER: 1,
+    WorkspaceMember.ROLE_EDITOR: 2,
+    WorkspaceMember.ROLE_OWNER: 3,
+}
+# What each access level needs: read forms/entries, write entries/forms, manage members/workspace.
+VIEW, EDIT, MANAGE = WorkspaceMember.ROLE_VIEWER, WorkspaceMember.ROLE_EDITOR, WorkspaceMember.ROLE_OWNER
+CACHE_SIZE = 10000
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _load(user_id):
+    return dict(WorkspaceMember.objects.filter(user_id=user_id).values_list('workspace_id', 'role'))
+
+
+def user_roles(user):
+    """``{workspace_id: role}`` for ``user`` (a loaded ``User``)."""
+    key = (user.id, user.acl_version)
+    with _lock:
+        roles = _cache.get(key)
+        if roles is not None:
+            _cache.move_to_end(key)
+            return roles
+    roles = _load(user.id)
+    with _lock:
+        _cache[key] = roles
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return roles
+
+
+def request_roles(request):
+    roles = getattr(request, '_workspace_roles', None)
+    if roles is None:
+        roles = request._workspace_roles = user_roles(request.user)
+    return roles
+
+
+def workspace_role(request, workspace_id):
+    try:
+        return request_roles(request).get(int(workspace_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def has_access(request, workspace_id, level=VIEW):
+    role = workspace_role(request, workspace_id)
+    return role is not None and ROLE_RANK[role] >= ROLE_RANK[level]
+
+
+def invalidate_users(user_ids):
+    """Make every process reload these users' roles (call after any membership change)."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    User.objects.filter(id__in=user_ids).update(acl_version=F('acl_version') + 1)
+    with _lock:
+        for key in [k for k in _cache if k[0] in user_ids]:
+            del _cache[key]
+
+
+def add_member(workspace_id, user_id, role):
+    """Add or change a membership; returns the ``WorkspaceMember``."""
+    try:
+        with transaction.atomic():
+            member = WorkspaceMember.objects.create(workspace_id=workspace_id, user_id=user_id, role=role)
+    except IntegrityError:
+        WorkspaceMember.objects.filter(workspace_id=workspace_id, user_id=user_id).update(role=role)
+        member = WorkspaceMember.objects.get(workspace_id=workspace_id, user_id=user_id)
+    invalidate_users([user_id])
+    return member
+
+
+def remove_members(workspace_id, user_ids=None):
+    """Drop some (or all) members of a workspace."""
+    qs = WorkspaceMember.objects.filter(workspace_id=workspace_id)
+    if user_ids is not None:
+        qs = qs.filter(user_id__in=list(user_ids))
+    affected = list(qs.values_list('user_id', flat=True))
+    qs.delete()
+    invalidate_users(affected)
@@ -0,0 +1,193 @@
+"""Background purge of deleted workspaces and reconciliation of orphaned rows.
+
+Deleting a workspace only stamps ``deleted_at``, drops its memberships (so
+nobody can reach it any more) and queues a ``PurgeJob``. A worker then deletes
+the dependents (projected entry values, entries, fields, forms, workspace-scoped
+transactions, budgets) in small id-bounded chunks, each in its own short
+transaction and separated by a pause, so no table is locked for long. Progress is saved after
+every chunk and each step just deletes "whatever is left", so a job that dies
+midway is requeued and resumes where it stopped.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from .category_stats import workspace_scope
+from .ledger import record_deleted
+from .models import (
+    Budget, BudgetUsage, CategoryStats, ExpenseEntry, ExpenseEntryValue, ExpenseField, ExpenseForm, PurgeJob,
+    Transaction, Workspace, WorkspaceMember,
+)
+from .workspace_acl import remove_members
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+PAUSE_SECONDS = 0.1
+STALE_JOB_MINUTES = 10
+MAX_ATTEMPTS = 3
+
+
+def delete_in_chunks(qs, chunk_size=CHUNK_SIZE, pause=PAUSE_SECONDS):
+    """Delete every row of ``qs`` in chunks, yielding the size of each chunk."""
+    model = qs.model
+    while True:
+        ids = list(qs.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        with transaction.atomic():
+            if model is Transaction:
+                # Keep rollups, data versions and the report cache in step with the ledger.
+                rows = list(Transaction.objects.filter(pk__in=ids).only('id', 'user_id', 'workspace_id', 'date', 'type', 'category', 'amount'))
+                Transaction.objects.filter(pk__in=ids).delete()
+                record_deleted(rows)
+            else:
+                model.objects.filter(pk__in=ids).delete()
+        yield len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def purge_steps(workspace_id):
+    """``[(name, queryset)]`` for one workspace, children before parents."""
+    form_ids = ExpenseForm.objects.filter(workspace_id=workspace_id).values('id')
+    return [
+        ('expense_entry_values', ExpenseEntryValue.objects.filter(form_id__in=form_ids)),
+        ('expense_entries', ExpenseEntry.objects.filter(form_id__in=form_ids)),
+        ('expense_entries', ExpenseEntry.objects.filter(workspace_id=workspace_id)),
+        ('expense_fields', ExpenseField.objects.filter(form_id__in=form_ids)),
+        ('expense_forms', ExpenseForm.objects.filter(workspace_id=workspace_id)),
+        ('transactions', Transaction.objects.filter(workspace_id=workspace_id)),
+        ('category_stats', CategoryStats.objects.filter(scope=workspace_scope(workspace_id))),
+        ('budget_usage', BudgetUsage.objects.filter(budget_id__in=Budget.objects.filter(workspace_id=workspace_id).values('id'))),
+        ('budgets', Budget.objects.filter(workspace_id=workspace_id)),
+        ('workspace_members', WorkspaceMember.objects.filter(workspace_id=workspace_id)),
+    ]
+
+
+def enqueue_purge(workspace_id, requested_by=None):
+    pending = PurgeJob.objects.filter(
+        workspace_id=workspace_id, status__in=(PurgeJob.STATUS_QUEUED, PurgeJob.STATUS_RUNNING),
+    ).first()
+    return pending or PurgeJob.objects.create(workspace_id=workspace_id, requested_by=requested_by)
+
+
+def soft_delete_workspace(workspace, requested_by=None):
+    """Hide the workspace immediately and queue the purge of its data."""
+    Workspace.objects.filter(id=workspace.id, deleted_at__isnull=True).update(deleted_at=timezone.now())
+    remove_members(workspace.id)
+    return enqueue_purge(workspace.id, requested_by)
+
+
+def requeue_stale_jobs(minutes=STALE_JOB_MINUTES):
+    """Put back running jobs whose heartbeat stopped (the worker died)."""
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return PurgeJob.objects.filter(status=PurgeJob.STATUS_RUNNING, updated_at__lt=cutoff).update(
+        status=PurgeJob.STATUS_QUEUED,
+    )
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job to ``running`` (same scheme as ``report_jobs``)."""
+    while True:
+        job_id = (
+            PurgeJob.objects.filter(status=PurgeJob.STATUS_QUEUED)
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        claimed = PurgeJob.objects.filter(id=job_id, status=PurgeJob.STATUS_QUEUED).update(
+            status=PurgeJob.STATUS_RUNNING, started_at=timezone.now(), attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return PurgeJob.objects.get(id=job_id)
+
+
+def run_job(job, chunk_size=CHUNK_SIZE, pause=PAUSE_SECONDS):
+    try:
+        for name, qs in purge_steps(job.workspace_id):
+            for deleted in delete_in_chunks(qs, chunk_size, pause):
+                job.progress[name] = job.progress.get(name, 0) + deleted
+                job.deleted_count += deleted
+                job.save(update_fields=['progress', 'deleted_count', 'updated_at'])
+        Workspace.objects.filter(id=job.workspace_id, deleted_at__isnull=False).delete()
+        job.status, job.error = PurgeJob.STATUS_DONE, ''
+    except Exception as e:
+        logger.exception('Purge job %s failed', job.id)
+        job.error = str(e)[:2000]
+        job.status = PurgeJob.STATUS_QUEUED if job.attempts < MAX_ATTEMPTS else PurgeJob.STATUS_FAILED
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    return job
+
+
+def run_worker(poll_interval=5.0, once=False, chunk_size=CHUNK_SIZE, pause=PAUSE_SECONDS):
+    requeue_stale_jobs()
+    processed = 0
+    while True:
+        job = claim_next_job()
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            requeue_stale_jobs()
+            continue
+        run_job(job, chunk_size, pause)
+        processed += 1
+        logger.info('Purge job %s (workspace %s) -> %s, %s rows', job.id, job.workspace_id, job.status, job.deleted_count)
+
+
+def orphan_querysets():
+    """``[(name, queryset)]`` of rows whose parent no longer exists, children first.
+
+    Each level is defined against live parents, so the counts already include rows
+    that only become orphans once their parent is removed. Soft-deleted workspaces
+    still exist here; their data belongs to their purge job.
+    """
+    workspace_exists = Workspace.objects.filter(id=OuterRef('workspace_id'))
+    live_forms = ExpenseForm.objects.filter(Exists(workspace_exists))
+    live_entries = ExpenseEntry.objects.filter(Exists(live_forms.filter(id=OuterRef('form_id'))))
+    return [
+        ('expense_entry_values', ExpenseEntryValue.objects.exclude(Exists(live_entries.filter(id=OuterRef('entry_id'))))),
+        ('expense_entries', ExpenseEntry.objects.exclude(Exists(live_forms.filter(id=OuterRef('form_id'))))),
+        ('expense_fields', ExpenseField.objects.exclude(Exists(live_forms.filter(id=OuterRef('form_id'))))),
+        ('expense_forms', ExpenseForm.objects.exclude(Exists(workspace_exists))),
+        ('workspace_members', WorkspaceMember.objects.exclude(Exists(workspace_exists))),
+        ('budget_usage', BudgetUsage.objects.exclude(Exists(Budget.objects.filter(id=OuterRef('budget_id'))))),
+        ('budgets', Budget.objects.filter(workspace_id__isnull=False).exclude(Exists(workspace_exists))),
+    ]
+
+
+def orphan_transactions():
+    """Transactions pointing at a workspace that no longer exists.
+
+    ``workspace_id`` on transactions was never validated, so a dangling id is not
+    proof the row belonged to a purged workspace; reconciliation detaches these
+    (personal ledger entries stay) rather than deleting them.
+    """
+    workspace_exists = Workspace.objects.filter(id=OuterRef('workspace_id'))
+    return Transaction.objects.filter(workspace_id__isnull=False).exclude(Exists(workspace_exists))
+
+
+def detach_in_chunks(qs, chunk_size=CHUNK_SIZE, pause=PAUSE_SECONDS):
+    """Set ``workspace_id`` to NULL on every row of ``qs`` in chunks, yielding chunk sizes."""
+    while True:
+        ids = list(qs.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        qs.model.objects.filter(pk__in=ids).update(workspace_id=None)
+        yield len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def unpurged_workspaces():
+    """Soft-deleted workspaces with no queued, running or finished purge job."""
+    has_job = PurgeJob.objects.filter(workspace_id=OuterRef('id')).exclude(status=PurgeJob.STATUS_FAILED)
+    return Workspace.objects.filter(deleted_at__isnull=False).exclude(Exists(has_job))
@@ -84,6 +84,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # CORS: allow frontend origins (local + Render + Vercel subdomains)
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ['X-Next-Cursor']
 CORS_ALLOWED_ORIGIN_REGEXES = [
     r"^https?://localhost:\d+$",
     r"^https?://127\.0\.0\.1:\d+$",
@@ -130,6 +131,13 @@ CACHES = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Profile photo uploads: anything above FILE_UPLOAD_MAX_MEMORY_SIZE is streamed to a
+# temp file instead of being held in memory; larger bodies are rejected outright.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+PROFILE_PHOTO_MAX_BYTES = int(os.environ.get('PROFILE_PHOTO_MAX_BYTES', str(10 * 1024 * 1024)))
+PROFILE_PHOTO_MAX_PIXELS = 40_000_000
+PROFILE_THUMBNAIL_SIZE = 256
+
 # Standardize SMTP for django core mail
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = SMTP_HOST